@@ -0,0 +1,194 @@
+"""
+Response cache for the workflow's chat model
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional
+from app.services.cache_service import TTLCache
+
+# Cache sizing and optional on-disk tier
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB")
+# Sampled (temperature > 0) responses are only cached when explicitly allowed
+LLM_CACHE_ALLOW_SAMPLED = os.getenv("LLM_CACHE_ALLOW_SAMPLED", "").lower() in ("1", "true", "yes")
+# Invoke options whose result is more than the message text (tool calls,
+# structured output); only the content is cached, so these calls bypass it
+UNCACHEABLE_OPTIONS = frozenset({"tools", "tool_choice", "functions", "function_call", "response_format"})
+
+def _normalize_content(content: Any) -> Any:
+    """Normalize message text so trivially different prompts share a key"""
+    if isinstance(content, str):
+        return " ".join(unicodedata.normalize("NFC", content).split())
+    if isinstance(content, list):
+        return [_normalize_content(part) for part in content]
+    if isinstance(content, dict):
+        return {key: _normalize_content(value) for key, value in content.items()}
+    return content
+
+def cache_key(model: str, temperature: float, messages: List[Any],
+              options: Optional[Dict[str, Any]] = None) -> str:
+    """Key a request on model, temperature, normalized messages and invoke options (e.g. stop)"""
+    normalized = [
+        (getattr(message, "type", "human"), _normalize_content(getattr(message, "content", message)))
+        for message in messages
+    ]
+    payload = json.dumps([model, temperature, normalized, options or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SQLiteResponseStore:
+    """On-disk tier for cached responses, shared across workers and restarts"""
+
+    def __init__(self, path: str, ttl: float = LLM_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] + self.ttl <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, content: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, content, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(content), time.time())
+            )
+            self._conn.commit()
+
+class LLMResponseCache:
+    """Two-tier (memory, optional SQLite) cache of chat model responses with per-node counters"""
+
+    def __init__(self, maxsize: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL,
+                 db_path: Optional[str] = LLM_CACHE_DB, allow_sampled: bool = LLM_CACHE_ALLOW_SAMPLED):
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.disk = SQLiteResponseStore(db_path, ttl) if db_path else None
+        self.allow_sampled = allow_sampled
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+
+    def enabled_for(self, temperature: Optional[float]) -> bool:
+        """Sampled output is not reproducible, so skip it unless allowed"""
+        return self.allow_sampled or not temperature
+
+    def record(self, node: Optional[str], outcome: str):
+        """Count a hit, miss or bypass for an agent node"""
+        with self._stats_lock:
+            counters = self._stats.setdefault(node or "unknown", {"hits": 0, "misses": 0, "bypassed": 0})
+            counters[outcome] += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        content = self.memory.get(key)
+        if content is None and self.disk is not None:
+            content = self.disk.get(key)
+            if content is not None:
+                self.memory.set(key, content)
+        return content
+
+    def set(self, key: str, content: Any):
+        self.memory.set(key, content)
+        if self.disk is not None:
+            self.disk.set(key, content)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rates per agent node plus memory tier counters"""
+        with self._stats_lock:
+            nodes = {}
+            for node, counters in self._stats.items():
+                lookups = counters["hits"] + counters["misses"]
+                nodes[node] = {
+                    **counters,
+                    "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+                }
+        return {
+            "allow_sampled": self.allow_sampled,
+            "disk_tier": self.disk is not None,
+            "memory": self.memory.stats(),
+            "nodes": nodes,
+        }
+
+def _current_node() -> Optional[str]:
+    """Name of the LangGraph node making the call, from the active runnable config"""
+    try:
+        from langchain_core.runnables.config import ensure_config
+        return ensure_config().get("metadata", {}).get("langgraph_node")
+    except Exception:
+        return None
+
+class CachedChatModel:
+    """
+    Chat model wrapper that answers repeated prompts from LLMResponseCache
+
+    Exposes invoke/ainvoke like the wrapped model and forwards anything else
+    to it. Cache misses go through the wrapped model, so callbacks (and token
+    streaming) behave as before; hits return a plain AIMessage. Invoke
+    options such as `stop` or `temperature` are part of the key; calls
+    passing tools or a response format are not cached.
+    """
+
+    def __init__(self, model, cache: LLMResponseCache):
+        self.model = model
+        self.cache = cache
+
+    def _lookup(self, messages: List[Any], node: Optional[str], options: Dict[str, Any]):
+        # A per-call temperature overrides the model's
+        temperature = options.get("temperature", getattr(self.model, "temperature", None))
+        if not self.cache.enabled_for(temperature) or UNCACHEABLE_OPTIONS.intersection(options):
+            self.cache.record(node, "bypassed")
+            return None, None
+
+        model_name = getattr(self.model, "model_name", None) or getattr(self.model, "model", "")
+        key = cache_key(model_name, temperature, messages, options)
+        content = self.cache.get(key)
+        self.cache.record(node, "hits" if content is not None else "misses")
+        return key, content
+
+    def invoke(self, messages: List[Any], config: Optional[Dict[str, Any]] = None,
+               node: Optional[str] = None, **kwargs):
+        from langchain_core.messages import AIMessage
+
+        node = node or _current_node()
+        key, content = self._lookup(messages, node, kwargs)
+        if content is not None:
+            return AIMessage(content=content)
+
+        response = self.model.invoke(messages, config=config, **kwargs)
+        if key is not None:
+            self.cache.set(key, response.content)
+        return response
+
+    async def ainvoke(self, messages: List[Any], config: Optional[Dict[str, Any]] = None,
+                      node: Optional[str] = None, **kwargs):
+        from langchain_core.messages import AIMessage
+
+        node = node or _current_node()
+        key, content = self._lookup(messages, node, kwargs)
+        if content is not None:
+            return AIMessage(content=content)
+
+        response = await self.model.ainvoke(messages, config=config, **kwargs)
+        if key is not None:
+            self.cache.set(key, response.content)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+# Singleton instance
+llm_cache = LLMResponseCache()
@@ -0,0 +1,93 @@
+"""
+State containers and reducers for the agent workflow
+"""
+from collections.abc import Sequence
+from typing import Any, Iterable, List
+
+class MessageLog(Sequence):
+    """
+    Append-only, immutable view over a shared message list
+
+    A log is a prefix of a backing list. Appending to the newest log extends
+    the backing list in place and returns a longer view, so adding k messages
+    costs O(k) no matter how long the history is. Older views still see only
+    their own prefix; appending to one of those (a fork) copies once.
+    """
+
+    __slots__ = ("_items", "_length")
+
+    def __init__(self, items: Iterable[Any] = (), _shared: List[Any] = None, _length: int = None):
+        if _shared is not None:
+            self._items = _shared
+            self._length = _length
+        else:
+            self._items = list(items)
+            self._length = len(self._items)
+
+    def extend(self, messages: Iterable[Any]) -> "MessageLog":
+        """Return a log with `messages` appended"""
+        messages = list(messages)
+        if not messages:
+            return self
+        if self._length == len(self._items):
+            self._items.extend(messages)
+            return MessageLog(_shared=self._items, _length=self._length + len(messages))
+        # Someone already appended past this view; branch off a copy
+        return MessageLog(self._items[:self._length] + messages)
+
+    def append(self, message: Any) -> "MessageLog":
+        """Return a log with one message appended"""
+        return self.extend([message])
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._items[:self._length][index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("MessageLog index out of range")
+        return self._items[index]
+
+    def __iter__(self):
+        items = self._items
+        for i in range(self._length):
+            yield items[i]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (MessageLog, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"MessageLog({list(self)!r})"
+
+def as_message_log(messages: Iterable[Any]) -> MessageLog:
+    """Wrap a plain message list (e.g. one loaded from storage) as a MessageLog"""
+    return messages if isinstance(messages, MessageLog) else MessageLog(messages)
+
+def append_messages(current: Any, update: Any) -> MessageLog:
+    """
+    Reducer for the messages channel
+
+    The channel starts out empty on every run, so the first update (the
+    input history) is adopted as-is instead of copied; later updates from
+    agents are appended without touching the existing history.
+    """
+    if not current:
+        return as_message_log(update)
+    return as_message_log(current).extend(update)
+
+def merge_report_data(current: dict, update: dict) -> dict:
+    """
+    Reducer for the report_data channel
+
+    Agents return only the fields they set, and they are merged field by
+    field into a new dict. Neither argument is modified: the first value
+    can be the caller's own input dict, and earlier values are still held by
+    stream snapshots. report_data has a fixed set of fields, so the copy
+    costs the same on every turn however long the conversation gets.
+    """
+    return {**(current or {}), **update}
@@ -0,0 +1,258 @@
+"""
+Per-node tracing and timing for the agent workflow
+
+Every graph node is wrapped so that, when tracing is enabled, each call
+produces a span in the OpenTelemetry span data model (trace/span ids, start
+and end times in Unix nanoseconds, attributes, status) and feeds per-node
+latency percentiles. Node spans are children of the run's "agent.turn" span
+and carry the request id. When tracing is disabled the wrapper only checks
+a flag.
+"""
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from app.services.logging_service import request_id_var
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per node for percentile estimates
+SAMPLES_PER_NODE = int(os.getenv("AGENT_TRACING_SAMPLES", "2048"))
+
+_current_trace_id: contextvars.ContextVar = contextvars.ContextVar("agent_trace_id", default=None)
+# Span id of the running workflow turn; parent of its node spans
+_current_span_id: contextvars.ContextVar = contextvars.ContextVar("agent_span_id", default=None)
+
+def _state_size(value: Any) -> int:
+    """
+    Approximate size of a state or update in bytes
+
+    Counts text and keys structurally instead of serializing, so measuring a
+    long conversation stays cheap; messages count by their content.
+    """
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(key)) + _state_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_state_size(item) for item in value)
+    content = getattr(value, "content", None)
+    if content is not None:
+        return _state_size(content)
+    return 8
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+class InMemorySpanExporter:
+    """Keeps finished spans in memory; meant for tests and debugging"""
+
+    def __init__(self, maxlen: int = 10000):
+        self._spans: Deque[Dict[str, Any]] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Dict[str, Any]]):
+        with self._lock:
+            self._spans.extend(spans)
+
+    def get_finished_spans(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+class OpenTelemetrySpanExporter:
+    """Re-emits spans through the OpenTelemetry API, if it is installed"""
+
+    def __init__(self):
+        from opentelemetry import trace
+        self._tracer = trace.get_tracer("app.agents")
+
+    def export(self, spans: List[Dict[str, Any]]):
+        from opentelemetry.trace import Status, StatusCode
+
+        for data in spans:
+            span = self._tracer.start_span(
+                data["name"],
+                start_time=data["start_time_unix_nano"],
+                attributes=data["attributes"]
+            )
+            if data["status"]["code"] == "ERROR":
+                span.set_status(Status(StatusCode.ERROR, data["status"].get("message")))
+            span.end(end_time=data["end_time_unix_nano"])
+
+class NodeTracer:
+    """Wraps workflow nodes with timing, state-size and error capture"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.exporters: List[Any] = []
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def add_exporter(self, exporter):
+        """Register an exporter with an export(spans) method"""
+        self.exporters.append(exporter)
+
+    @contextmanager
+    def trace(self, trace_id: Optional[str] = None):
+        """
+        Group the spans of one workflow run under a single trace id
+
+        With tracing enabled the run itself becomes an "agent.turn" span,
+        the parent of every node span recorded inside the block.
+        """
+        trace_token = _current_trace_id.set(trace_id or secrets.token_hex(16))
+        span_id = secrets.token_hex(8) if self.enabled else None
+        span_token = _current_span_id.set(span_id)
+        start = time.time_ns()
+        error = None
+        try:
+            yield _current_trace_id.get()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if span_id is not None:
+                self._export(self._span("agent.turn", span_id, None, start, time.time_ns(), {}, error))
+            _current_span_id.reset(span_token)
+            _current_trace_id.reset(trace_token)
+
+    def wrap(self, name: str, node: Callable) -> Callable:
+        """Return a traced version of a node function"""
+        if inspect.iscoroutinefunction(node):
+            @functools.wraps(node)
+            async def traced_async(state, *args, **kwargs):
+                if not self.enabled:
+                    return await node(state, *args, **kwargs)
+                start = time.time_ns()
+                try:
+                    update = await node(state, *args, **kwargs)
+                except Exception as e:
+                    self._record(name, state, None, start, e)
+                    raise
+                self._record(name, state, update, start, None)
+                return update
+            return traced_async
+
+        @functools.wraps(node)
+        def traced(state, *args, **kwargs):
+            if not self.enabled:
+                return node(state, *args, **kwargs)
+            start = time.time_ns()
+            try:
+                update = node(state, *args, **kwargs)
+            except Exception as e:
+                self._record(name, state, None, start, e)
+                raise
+            self._record(name, state, update, start, None)
+            return update
+        return traced
+
+    @staticmethod
+    def _span(name: str, span_id: str, parent_span_id: Optional[str], start: int, end: int,
+              attributes: Dict[str, Any], error: Optional[BaseException]) -> Dict[str, Any]:
+        request_id = request_id_var.get()
+        if request_id:
+            attributes["request.id"] = request_id
+        span = {
+            "trace_id": _current_trace_id.get() or secrets.token_hex(16),
+            "span_id": span_id,
+            "parent_span_id": parent_span_id,
+            "name": name,
+            "kind": "INTERNAL",
+            "start_time_unix_nano": start,
+            "end_time_unix_nano": end,
+            "attributes": attributes,
+            "status": {"code": "OK"},
+            "events": [],
+        }
+        if error is not None:
+            span["status"] = {"code": "ERROR", "message": str(error)}
+            span["events"].append({
+                "name": "exception",
+                "time_unix_nano": end,
+                "attributes": {
+                    "exception.type": type(error).__name__,
+                    "exception.message": str(error),
+                },
+            })
+        return span
+
+    def _export(self, span: Dict[str, Any]):
+        for exporter in self.exporters:
+            try:
+                exporter.export([span])
+            except Exception as e:
+                logger.warning("Span export failed: %s", e)
+
+    def _record(self, name: str, state: Any, update: Any, start: int, error: Optional[Exception]):
+        """Build the span for a finished node call, export it and update aggregates"""
+        end = time.time_ns()
+        input_bytes = _state_size(state)
+        output_bytes = _state_size(update) if update is not None else 0
+
+        span = self._span(f"agent.{name}", secrets.token_hex(8), _current_span_id.get(), start, end, {
+            "langgraph.node": name,
+            "agent.state.input_bytes": input_bytes,
+            "agent.state.output_bytes": output_bytes,
+        }, error)
+
+        with self._lock:
+            samples = self._samples.setdefault(name, deque(maxlen=SAMPLES_PER_NODE))
+            samples.append((end - start) / 1e6)
+            counters = self._counters.setdefault(
+                name, {"calls": 0, "errors": 0, "input_bytes": 0, "output_bytes": 0}
+            )
+            counters["calls"] += 1
+            counters["errors"] += 1 if error is not None else 0
+            counters["input_bytes"] += input_bytes
+            counters["output_bytes"] += output_bytes
+
+        self._export(span)
+
+    def stats(self) -> Dict[str, Any]:
+        """Latency percentiles (ms) and call counters per node"""
+        with self._lock:
+            nodes = {}
+            for name, samples in self._samples.items():
+                ordered = sorted(samples)
+                counters = self._counters[name]
+                nodes[name] = {
+                    "calls": counters["calls"],
+                    "errors": counters["errors"],
+                    "p50_ms": round(_percentile(ordered, 50), 3),
+                    "p95_ms": round(_percentile(ordered, 95), 3),
+                    "p99_ms": round(_percentile(ordered, 99), 3),
+                    "avg_input_bytes": counters["input_bytes"] // counters["calls"],
+                    "avg_output_bytes": counters["output_bytes"] // counters["calls"],
+                }
+        return {"enabled": self.enabled, "nodes": nodes}
+
+    def reset(self):
+        """Drop collected samples and counters"""
+        with self._lock:
+            self._samples.clear()
+            self._counters.clear()
+
+# Singleton instances; the in-memory exporter always holds the latest spans
+memory_exporter = InMemorySpanExporter(maxlen=int(os.getenv("AGENT_TRACING_SPANS", "1000")))
+tracer = NodeTracer(enabled=os.getenv("AGENT_TRACING", "").lower() in ("1", "true", "yes"))
+tracer.add_exporter(memory_exporter)
+
+if os.getenv("AGENT_TRACING_OTEL", "").lower() in ("1", "true", "yes"):
+    try:
+        tracer.add_exporter(OpenTelemetrySpanExporter())
+    except ImportError:
+        logger.warning("AGENT_TRACING_OTEL is set but opentelemetry-api is not installed")
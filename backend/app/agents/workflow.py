@@ -3,24 +3,93 @@ LangGraph-based agentic workflow for road damage reporting
 """
 from typing import TypedDict, Annotated, Literal
 from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+import logging
 import os
+import threading
+from app.agents.tracing import tracer
+from app.agents.state import append_messages, merge_report_data
 
-# Initialize LLM
-llm = ChatOpenAI(
-    model="gpt-4",
-    temperature=0.7,
-    api_key=os.getenv("OPENAI_API_KEY")
+# The LLM client and compiled graph are built on first use rather than at
+# import time, so importing this module stays cheap and a missing
+# OPENAI_API_KEY only matters to code that actually calls the model
+_llm = None
+_workflow = None
+_lock = threading.Lock()
+logger = logging.getLogger(__name__)
+
+# Default sampling temperature of the shared chat model. Agents that want
+# cacheable replies pass temperature=0 per call; the response cache skips
+# sampled calls (see LLM_CACHE_ALLOW_SAMPLED)
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+
+PHRASING_PROMPT = (
+    "You are a road damage reporting assistant. Rewrite the instruction you are given "
+    "as one or two short, friendly sentences addressed to the user. Do not add new requests."
 )
 
+def get_llm():
+    """Return the shared chat model, creating it on first use"""
+    global _llm
+    if _llm is None:
+        with _lock:
+            if _llm is None:
+                from langchain_openai import ChatOpenAI
+                from app.agents.llm_cache import CachedChatModel, llm_cache
+                # Repeated prompts are answered from the response cache
+                _llm = CachedChatModel(
+                    ChatOpenAI(
+                        model="gpt-4",
+                        temperature=LLM_TEMPERATURE,
+                        api_key=os.getenv("OPENAI_API_KEY")
+                    ),
+                    llm_cache
+                )
+    return _llm
+
+def set_llm(model):
+    """Replace the shared chat model (e.g. with a fake model in benchmarks)"""
+    global _llm
+    with _lock:
+        _llm = model
+
+def llm_configured() -> bool:
+    """Whether agents may call the chat model (an API key is set or a model was installed)"""
+    return _llm is not None or bool(os.getenv("OPENAI_API_KEY"))
+
+def phrase_reply(instruction: str) -> str:
+    """
+    Have the chat model word a reply, falling back to the instruction itself
+
+    Calls run at temperature 0 with a fixed system prompt, so the same
+    instruction always makes the same request and repeats are answered
+    from the response cache.
+    """
+    if not llm_configured():
+        return instruction
+    try:
+        response = get_llm().invoke(
+            [SystemMessage(content=PHRASING_PROMPT), HumanMessage(content=instruction)],
+            temperature=0
+        )
+    except Exception as e:
+        logger.warning("Chat model call failed, using the fixed reply: %s", e)
+        return instruction
+    return response.content or instruction
+
+def latest(current, update):
+    """Keep the most recent value; lets parallel agents write the same key"""
+    return update
+
 class AgentState(TypedDict):
     """State shared across all agents"""
     step: str
-    messages: Annotated[list, lambda x, y: x + y]
-    report_data: dict
+    # Append-only log: adding messages never copies the history
+    messages: Annotated[list, append_messages]
+    # Agents return only the fields they add; merged field by field
+    report_data: Annotated[dict, merge_report_data]
     validation_status: str
-    next_action: str
+    next_action: Annotated[str, latest]
 
 def greeting_agent(state: AgentState) -> AgentState:
     """
@@ -37,7 +106,7 @@ def greeting_agent(state: AgentState) -> AgentState:
             "messages": [AIMessage(content=message)],
             "next_action": "collect_image"
         }
-    return state
+    return {}
 
 def vision_analysis_agent(state: AgentState) -> AgentState:
     """
@@ -52,10 +121,10 @@ def vision_analysis_agent(state: AgentState) -> AgentState:
         )
         return {
             "messages": [AIMessage(content=message)],
-            "report_data": {**state["report_data"], "image_analyzed": True},
+            "report_data": {"image_analyzed": True},
             "next_action": "collect_location"
         }
-    return state
+    return {}
 
 def location_authority_agent(state: AgentState) -> AgentState:
     """
@@ -67,20 +136,17 @@ def location_authority_agent(state: AgentState) -> AgentState:
         
         # Determine authority (simplified logic)
         authority = "City Public Works Department"
-        if location.get("address", "").lower().find("highway") != -1:
+        if (location.get("address") or "").lower().find("highway") != -1:
             authority = "State Department of Transportation"
         
         message = f"Location confirmed. The responsible authority is: {authority}."
         
         return {
             "messages": [AIMessage(content=message)],
-            "report_data": {
-                **state["report_data"],
-                "authority": authority
-            },
+            "report_data": {"authority": authority},
             "next_action": "collect_damage_type"
         }
-    return state
+    return {}
 
 def validation_agent(state: AgentState) -> AgentState:
     """
@@ -102,11 +168,12 @@ def validation_agent(state: AgentState) -> AgentState:
             missing_fields.append(label)
     
     if missing_fields:
-        message = f"Please provide: {', '.join(missing_fields)}"
+        message = phrase_reply(f"Please provide: {', '.join(missing_fields)}")
+        first_missing = next(field for field in required_fields if not report_data.get(field))
         return {
             "messages": [AIMessage(content=message)],
             "validation_status": "incomplete",
-            "next_action": "collect_missing_data"
+            "next_action": f"collect_{first_missing}"
         }
     else:
         return {
@@ -152,34 +219,29 @@ def action_agent(state: AgentState) -> AgentState:
             "messages": [AIMessage(content=message)],
             "next_action": "complete"
         }
-    return state
+    return {}
 
 # Build the workflow graph
 def create_workflow():
     """Create and return the LangGraph workflow"""
     workflow = StateGraph(AgentState)
     
-    # Add nodes (agents)
-    workflow.add_node("greeting", greeting_agent)
-    workflow.add_node("vision_analysis", vision_analysis_agent)
-    workflow.add_node("location_authority", location_authority_agent)
-    workflow.add_node("validation", validation_agent)
-    workflow.add_node("decision", decision_agent)
-    workflow.add_node("action", action_agent)
+    # Add nodes (agents), each wrapped for tracing
+    workflow.add_node("greeting", tracer.wrap("greeting", greeting_agent))
+    workflow.add_node("vision_analysis", tracer.wrap("vision_analysis", vision_analysis_agent))
+    workflow.add_node("location_authority", tracer.wrap("location_authority", location_authority_agent))
+    workflow.add_node("validation", tracer.wrap("validation", validation_agent))
+    workflow.add_node("decision", tracer.wrap("decision", decision_agent))
+    workflow.add_node("action", tracer.wrap("action", action_agent))
     
     # Define edges
     workflow.set_entry_point("greeting")
     
+    # Vision analysis and location/authority mapping don't depend on each
+    # other, so they run as parallel branches; validation waits for both
     workflow.add_edge("greeting", "vision_analysis")
-    workflow.add_conditional_edges(
-        "vision_analysis",
-        lambda x: "location_authority" if x["report_data"].get("image") else "greeting",
-        {
-            "location_authority": "location_authority",
-            "greeting": "greeting"
-        }
-    )
-    workflow.add_edge("location_authority", "validation")
+    workflow.add_edge("greeting", "location_authority")
+    workflow.add_edge(["vision_analysis", "location_authority"], "validation")
     workflow.add_conditional_edges(
         "validation",
         lambda x: "decision" if x["validation_status"] == "complete" else "decision",
@@ -199,7 +261,21 @@ def create_workflow():
     
     return workflow.compile()
 
-# Export workflow instance
-workflow = create_workflow()
+def get_workflow():
+    """Return the compiled workflow, compiling it on first use"""
+    global _workflow
+    if _workflow is None:
+        with _lock:
+            if _workflow is None:
+                _workflow = create_workflow()
+    return _workflow
+
+def __getattr__(name):
+    """Keep `workflow` and `llm` importable as module attributes, built lazily"""
+    if name == "workflow":
+        return get_workflow()
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
@@ -2,23 +2,49 @@
 FastAPI main application entry point for Road Damage Reporting System
 """
 from fastapi import FastAPI
+from fastapi.responses import Response, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from dotenv import load_dotenv
+import asyncio
+import logging
 import os
 
 # Load environment variables from .env file
 load_dotenv()
 
-from app.routers import reports, chat, analyze
+from app.services.logging_service import configure_logging, shutdown_logging, RequestContextMiddleware
+configure_logging()
+logger = logging.getLogger(__name__)
+
+from app.routers import reports, chat, analyze, authorities
+from app.services.submission_queue import submission_queue
+from app.services.supabase_service import supabase_service
+from app.services.session_store import session_store
+from app.services.idempotency_store import idempotency_store
+from app.services.report_stats import report_stats
+from app.services.open_reports_index import open_reports_index
+from app.services.triage_service import triage_engine
+from app.services.metrics import PrometheusMiddleware, render_metrics
+from app.services.rate_limiter import AdmissionControlMiddleware
+from app.services.compression import CompressionMiddleware
 
 app = FastAPI(
     title="Road Damage Reporting API",
     description="Agentic AI-based road damage reporting and authority notification system",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson encodes report rows several times faster than the json module
+    default_response_class=ORJSONResponse
 )
 
+# Gzip/brotli for large response bodies (innermost, so metrics see wire sizes)
+app.add_middleware(CompressionMiddleware)
+
+# Per-client rate limits and the in-flight cap; inside CORS so browsers can
+# read the 429/503 responses
+app.add_middleware(AdmissionControlMiddleware)
+
 # CORS middleware for frontend communication
 app.add_middleware(
     CORSMiddleware,
@@ -28,13 +54,117 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency, size and in-flight metrics for /metrics
+app.add_middleware(PrometheusMiddleware)
+
+# Correlation id for every log line of a request (outermost middleware)
+app.add_middleware(RequestContextMiddleware)
+
 # Include routers
 app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
 app.include_router(chat.router, prefix="/api", tags=["chat"])
 app.include_router(analyze.router, prefix="/api", tags=["analyze"])
+app.include_router(authorities.router, prefix="/api/authorities", tags=["authorities"])
 
 # Images are now served from Supabase Storage - no local static serving needed
 
+def _prewarm_workflow():
+    """Import the agent stack and compile the workflow"""
+    try:
+        from app.agents.workflow import get_workflow
+        get_workflow()
+    except Exception as e:
+        logger.warning("Workflow pre-warm failed: %s", e)
+
+@app.on_event("startup")
+async def prewarm_workflow():
+    """
+    Compile the agent workflow in the background once the server is up
+
+    The LangGraph/LangChain imports take seconds on a cold start. Doing them
+    in a worker thread lets /health answer immediately while the first chat
+    request usually finds the graph ready. Set PREWARM_WORKFLOW=0 to build
+    it on first use instead.
+    """
+    if os.getenv("PREWARM_WORKFLOW", "1").lower() in ("0", "false", "no"):
+        return
+    app.state.prewarm_task = asyncio.create_task(asyncio.to_thread(_prewarm_workflow))
+
+@app.on_event("startup")
+async def start_submission_workers():
+    """Start the background workers for asynchronous report submissions"""
+    submission_queue.start()
+
+@app.on_event("shutdown")
+async def stop_submission_workers():
+    await submission_queue.stop()
+
+@app.on_event("startup")
+async def start_session_purge():
+    """Delete expired chat sessions from CHAT_SESSION_DB periodically"""
+    session_store.start()
+
+@app.on_event("shutdown")
+async def stop_session_purge():
+    await session_store.stop()
+
+@app.on_event("startup")
+async def start_idempotency_purge():
+    """Delete expired Idempotency-Key records from IDEMPOTENCY_DB periodically"""
+    idempotency_store.start()
+
+@app.on_event("shutdown")
+async def stop_idempotency_purge():
+    await idempotency_store.stop()
+
+@app.on_event("startup")
+async def start_report_sync():
+    """Replicate locally committed reports to Supabase (REPORT_WRITE_AHEAD=1)"""
+    if supabase_service.outbox is not None:
+        supabase_service.outbox.start()
+
+@app.on_event("shutdown")
+async def stop_report_sync():
+    if supabase_service.outbox is not None:
+        await supabase_service.outbox.stop()
+
+@app.on_event("shutdown")
+async def flush_report_inserts():
+    """Finish coalesced inserts (REPORT_WRITE_COALESCING=1) still in flight"""
+    if supabase_service.insert_batcher is not None:
+        await supabase_service.insert_batcher.close()
+
+@app.on_event("startup")
+async def start_report_stats():
+    """Count existing reports and reconcile the live counters periodically"""
+    report_stats.start()
+
+@app.on_event("shutdown")
+async def stop_report_stats():
+    await report_stats.stop()
+
+@app.on_event("startup")
+async def start_open_reports_index():
+    """Load open reports into memory and reload them periodically"""
+    open_reports_index.start()
+
+@app.on_event("shutdown")
+async def stop_open_reports_index():
+    await open_reports_index.stop()
+
+@app.on_event("startup")
+async def start_triage_engine():
+    """Rescore the authority work queues periodically"""
+    triage_engine.start()
+
+@app.on_event("shutdown")
+async def stop_triage_engine():
+    await triage_engine.stop()
+
+@app.on_event("shutdown")
+async def flush_logs():
+    shutdown_logging()
+
 @app.get("/")
 async def root():
     return {
@@ -43,6 +173,12 @@ async def root():
         "status": "operational"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in the text exposition format"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
@@ -4,9 +4,12 @@ API router for image analysis
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from pydantic import BaseModel
 from typing import Optional
+import logging
 import os
 import base64
-from openai import OpenAI
+from app.services.metrics import track_dependency, observe_payload, OPENAI_VISION
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -58,6 +61,8 @@ async def analyze_image(image: UploadFile = File(...)):
                 confidence=0.85
             )
         
+        # Deferred: the openai package is slow to import and only needed here
+        from openai import OpenAI
         client = OpenAI(api_key=api_key)
         
         # Encode image as base64
@@ -65,27 +70,29 @@ async def analyze_image(image: UploadFile = File(...)):
         image_mime_type = image.content_type or "image/jpeg"
         
         # Use OpenAI Vision API to analyze the image
-        response = client.chat.completions.create(
-            model="gpt-4-vision-preview",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": "Analyze this image for road damage. Identify if there is any pothole, crack, or surface damage. Respond with a brief analysis."
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{image_mime_type};base64,{image_base64}"
+        observe_payload(OPENAI_VISION, "analyze_image", len(image_data))
+        with track_dependency(OPENAI_VISION, "analyze_image"):
+            response = client.chat.completions.create(
+                model="gpt-4-vision-preview",
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": "Analyze this image for road damage. Identify if there is any pothole, crack, or surface damage. Respond with a brief analysis."
+                            },
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:{image_mime_type};base64,{image_base64}"
+                                }
                             }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=300
-        )
+                        ]
+                    }
+                ],
+                max_tokens=300
+            )
         
         analysis_text = response.choices[0].message.content
         
@@ -102,9 +109,7 @@ async def analyze_image(image: UploadFile = File(...)):
     
     except Exception as e:
         # Log the actual error for debugging
-        print(f"Image analysis error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Image analysis error: %s", e)
         
         # Return a fallback response if analysis fails
         return AnalysisResponse(
@@ -0,0 +1,29 @@
+"""
+API router for authority work queues
+"""
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+
+from app.services.authority_service import authority_service
+from app.services.triage_service import triage_engine
+
+router = APIRouter()
+
+@router.get("/{authority_id}/queue")
+async def get_authority_queue(authority_id: str, limit: int = Query(50, ge=1, le=500)):
+    """
+    Open reports of an authority, highest priority first
+    
+    Priority weighs severity, report age, the number of other open reports
+    nearby, the authority's road class and status. Served from in-memory
+    ranked queues kept current on every write.
+    """
+    authority = authority_service.get_authority(authority_id)
+    if not authority:
+        raise HTTPException(status_code=404, detail="Authority not found")
+    
+    return ORJSONResponse({
+        "authority": authority,
+        "open_reports": triage_engine.open_count(authority_id),
+        "queue": triage_engine.queue(authority_id, min(limit, triage_engine.queue_size)),
+    })
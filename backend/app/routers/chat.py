@@ -2,75 +2,200 @@
 API router for chat interactions with AI assistant
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple, AsyncIterator
+import json
+import uuid
+
+from app.services.session_store import session_store
 
 router = APIRouter()
 
 class ChatMessage(BaseModel):
     """Chat message schema"""
     message: str
-    step: Optional[str] = None
+    session_id: Optional[str] = None
+    # Only fields collected since the last turn; merged into the session.
+    # The image is uploaded with the report, so `image` carries just its file name
     report_data: Optional[Dict[str, Any]] = None
+    # Legacy clients that track the step themselves may still send it
+    step: Optional[str] = None
 
 class ChatResponse(BaseModel):
     """Chat response schema"""
     message: str
     next_step: Optional[str] = None
     requires_input: bool = True
+    session_id: Optional[str] = None
+
+# Workflow steps as named by the frontend
+CLIENT_STEPS = {
+    "damage_type": "damageType",
+}
+
+def new_session_state() -> Dict[str, Any]:
+    """Initial workflow state for a new conversation"""
+    return {
+        "step": "greeting",
+        "messages": [],
+        "report_data": {},
+        "validation_status": "",
+        "next_action": "",
+    }
+
+def _step_for_turn(current_step: str, report_data: Dict[str, Any]) -> str:
+    """Pick the workflow step that should handle newly supplied data"""
+    if report_data.get("image"):
+        return "analyze_image"
+    if report_data.get("location"):
+        return "map_authority"
+    return current_step
+
+async def _start_turn(chat_message: ChatMessage) -> Tuple[str, Dict[str, Any]]:
+    """Load (or create) the session and fold this turn's input into its state"""
+    from langchain_core.messages import HumanMessage
+    from app.agents.state import as_message_log
+
+    session_id = chat_message.session_id or str(uuid.uuid4())
+    state = await session_store.get(session_id) or new_session_state()
+
+    report_data = chat_message.report_data or {}
+    state = {
+        **state,
+        "messages": as_message_log(state["messages"]).append(HumanMessage(content=chat_message.message)),
+        "report_data": {**state["report_data"], **report_data},
+        "step": chat_message.step or _step_for_turn(state["step"], report_data),
+    }
+    return session_id, state
+
+def _next_step(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Describe where the conversation goes after a turn"""
+    return {
+        "next_step": CLIENT_STEPS.get(result["step"], result["step"]),
+        "requires_input": result.get("next_action") != "complete",
+    }
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(chat_message: ChatMessage):
     """
     Handle chat interactions with the AI assistant
-    
-    This endpoint processes user messages and determines the next step
-    in the reporting workflow.
+
+    Conversation state is kept server-side per session. Each turn merges the
+    new message and any newly collected report data into the session, runs
+    the LangGraph workflow, and returns the assistant's replies together with
+    the session id to send on the next turn.
     """
-    user_message = chat_message.message.lower()
-    current_step = chat_message.step or "greeting"
-    
-    # Simple rule-based responses (in production, this would use LangGraph workflow)
-    if current_step == "greeting" or "hello" in user_message or "hi" in user_message:
-        return ChatResponse(
-            message="Hello! I'll help you report road damage. Let's start by uploading a photo of the damage.",
-            next_step="image",
-            requires_input=True
-        )
-    
-    elif "location" in user_message or current_step == "location":
-        return ChatResponse(
-            message="Please provide the location using the map picker or by entering coordinates.",
-            next_step="location",
-            requires_input=True
-        )
-    
-    elif "type" in user_message or "damage" in user_message or current_step == "damageType":
-        return ChatResponse(
-            message="What type of damage is this? Please select from the options provided.",
-            next_step="damageType",
-            requires_input=True
-        )
-    
-    elif "severity" in user_message or "how bad" in user_message or current_step == "severity":
-        return ChatResponse(
-            message="How severe is this damage? Please select the severity level.",
-            next_step="severity",
-            requires_input=True
-        )
-    
-    elif "remarks" in user_message or "additional" in user_message or current_step == "remarks":
-        return ChatResponse(
-            message="Would you like to add any additional remarks or details?",
-            next_step="remarks",
-            requires_input=True
-        )
-    
-    else:
-        return ChatResponse(
-            message="I understand. Please continue with the reporting process using the options provided.",
-            next_step=current_step,
-            requires_input=True
-        )
+    # Imported here so the agent stack loads after startup, not before it
+    from app.agents.workflow import get_workflow
+    workflow = get_workflow()
+
+    session_id, state = await _start_turn(chat_message)
+    history_length = len(state["messages"])
+
+    from app.agents.tracing import tracer
+    try:
+        with tracer.trace():
+            result = await workflow.ainvoke(state)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Chat workflow error: {str(e)}")
+
+    await session_store.save(session_id, result)
+
+    replies = [message.content for message in result["messages"][history_length:]]
+    return ChatResponse(
+        message=" ".join(replies) or "Please continue with the reporting process using the options provided.",
+        session_id=session_id,
+        **_next_step(result)
+    )
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def _stream_turn(session_id: str, state: Dict[str, Any]) -> AsyncIterator[str]:
+    """Run one workflow turn and translate LangGraph stream output into SSE events"""
+    from app.agents.workflow import get_workflow
+    from app.agents.tracing import tracer
+    from langchain_core.messages import AIMessage, AIMessageChunk
+
+    # Sent before the graph runs so the client gets its first byte immediately
+    yield _sse("session", {"session_id": session_id})
+
+    result = state
+    try:
+        workflow = get_workflow()
+        with tracer.trace():
+            async for mode, payload in workflow.astream(state, stream_mode=["debug", "messages", "values"]):
+                if mode == "messages":
+                    # Token chunks from LLM calls inside a node
+                    chunk, metadata = payload
+                    if isinstance(chunk, AIMessageChunk) and chunk.content:
+                        yield _sse("token", {"node": metadata.get("langgraph_node"), "content": chunk.content})
+
+                elif mode == "debug" and payload["type"] == "task":
+                    yield _sse("node_enter", {"node": payload["payload"]["name"]})
+
+                elif mode == "debug" and payload["type"] == "task_result":
+                    task = payload["payload"]
+                    # Older LangGraph releases report writes as (channel, value) pairs
+                    writes = task.get("result") or {}
+                    if not isinstance(writes, dict):
+                        writes = dict(writes)
+                    for message in writes.get("messages") or []:
+                        if isinstance(message, AIMessage):
+                            yield _sse("message", {"node": task["name"], "content": message.content})
+                    yield _sse("node_exit", {"node": task["name"], "error": task.get("error")})
+
+                elif mode == "values":
+                    result = payload
+
+    except Exception as e:
+        yield _sse("error", {"detail": f"Chat workflow error: {str(e)}"})
+        return
+
+    await session_store.save(session_id, result)
+    yield _sse("next_step", _next_step(result))
+    yield _sse("done", {"session_id": session_id})
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(chat_message: ChatMessage):
+    """
+    Stream a chat turn as Server-Sent Events
+
+    Takes the same body as /chat. Events, in order of arrival:
+    - session: the session id to send on the next turn
+    - node_enter / node_exit: an agent started or finished
+    - token: a chunk of LLM output from the running agent
+    - message: a complete assistant message produced by an agent
+    - next_step: where the conversation goes next and whether input is needed
+    - done / error: end of the turn
+    """
+    session_id, state = await _start_turn(chat_message)
+    return StreamingResponse(
+        _stream_turn(session_id, state),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop nginx-style proxies from buffering the stream
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@router.get("/chat/llm-cache/stats")
+async def llm_cache_stats():
+    """Hit rates of the LLM response cache, per agent node"""
+    from app.agents.llm_cache import llm_cache
+    return llm_cache.stats()
 
+@router.get("/chat/debug/node-stats")
+async def agent_node_stats():
+    """Per-node latency percentiles and state sizes from agent tracing"""
+    from app.agents.tracing import tracer
+    return tracer.stats()
 
+@router.get("/chat/debug/spans")
+async def agent_spans(limit: int = 100):
+    """Most recent agent spans, in OpenTelemetry span data format"""
+    from app.agents.tracing import memory_exporter
+    return memory_exporter.get_finished_spans()[-limit:]
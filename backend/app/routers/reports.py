@@ -1,100 +1,299 @@
 """
 API router for report submission and management
 """
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import Optional
+from fastapi import (
+    APIRouter, UploadFile, File, Form, HTTPException, Query, Depends,
+    Request, BackgroundTasks, Header
+)
+from fastapi.responses import StreamingResponse, Response, JSONResponse, ORJSONResponse
+from pydantic import ValidationError
+from typing import Optional, List, Dict, Any, Tuple
+import asyncio
 import json
+import logging
+import os
+import time
+import hashlib
 from datetime import datetime
 import uuid
 
-from app.schemas.report import ReportCreate, ReportResponse, Location, DamageType, Severity
-from app.services.supabase_service import supabase_service
+import orjson
+
+from app.schemas.report import (
+    ReportCreate, ReportResponse, Location, DamageType, Severity,
+    ReportStatus, ReportFilter, ExportFormat, BulkItemResult, BulkIngestResponse,
+    StatusUpdateRequest, StatusUpdateResponse, JobStatus, SubmitJobResponse,
+    JobStatusResponse
+)
+from app.services.supabase_service import supabase_service, EmptyFilterError
 from app.services.authority_service import authority_service
 from app.services.webhook_service import webhook_service
 from app.services.storage_service import storage_service
+from app.services.export_service import export_service
+from app.services.submission_queue import submission_queue
+from app.services.report_stats import report_stats, GRANULARITIES
+from app.services.open_reports_index import open_reports_index
+from app.services.idempotency_store import (
+    idempotency_store, IdempotencyKeyMismatch, IdempotencyKeyInFlight
+)
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Bulk ingestion limits
+BULK_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "500"))
+BULK_MAX_BATCH_SIZE = 1000
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Seconds clients and CDNs may reuse a report before revalidating
+REPORT_MAX_AGE = int(os.getenv("REPORT_MAX_AGE", "15"))
+
+def report_filters(
+    status: Optional[ReportStatus] = Query(None),
+    damage_type: Optional[DamageType] = Query(None),
+    severity: Optional[Severity] = Query(None),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None)
+) -> ReportFilter:
+    """Collect listing filters from query parameters"""
+    return ReportFilter(
+        status=status,
+        damage_type=damage_type,
+        severity=severity,
+        created_after=created_after,
+        created_before=created_before
+    )
+
+def _validate_submission(location: str, damage_type: str, severity: str) -> Tuple[Location, DamageType, Severity]:
+    """Parse and validate the form fields of a report submission"""
+    # Parse location JSON
+    try:
+        location_data = json.loads(location)
+        location_obj = Location(**location_data)
+    except (json.JSONDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid location data: {str(e)}")
+    
+    # Validate damage type and severity
+    try:
+        damage_type_enum = DamageType(damage_type)
+        severity_enum = Severity(severity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid damage type or severity: {str(e)}")
+    
+    return location_obj, damage_type_enum, severity_enum
+
+class _StageTimings:
+    """Wall-clock duration of each submit stage, reported as a Server-Timing header"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+    
+    async def run(self, name: str, awaitable):
+        """Await a stage and record how long it took"""
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.durations[name] = (time.perf_counter() - start) * 1000
+    
+    def start(self, name: str, func, *args) -> asyncio.Task:
+        """
+        Run func(*args) as a stage in its own task
+        
+        The coroutine is created inside the task, so cancelling the task
+        before it starts leaves no coroutine that was never awaited.
+        """
+        async def stage():
+            return await self.run(name, func(*args))
+        return asyncio.create_task(stage())
+    
+    def header(self) -> str:
+        stages = [f"{name};dur={ms:.1f}" for name, ms in self.durations.items()]
+        stages.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(stages)
 
-@router.post("/submit", response_model=ReportResponse)
+async def _upload_image(image: UploadFile) -> Optional[str]:
+    """Read an uploaded image and store it without blocking the event loop"""
+    content = await image.read()
+    return await asyncio.to_thread(storage_service.upload_image_bytes, content, image.filename, image.content_type)
+
+@router.post(
+    "/submit",
+    response_model=ReportResponse,
+    responses={202: {"model": SubmitJobResponse, "description": "Accepted for background processing"}}
+)
 async def submit_report(
+    request: Request,
+    response: Response,
     image: Optional[UploadFile] = File(None),
     location: str = Form(...),
     damage_type: str = Form(...),
     severity: str = Form(...),
-    remarks: Optional[str] = Form(None)
+    remarks: Optional[str] = Form(None),
+    async_mode: bool = Query(False, alias="async"),
+    idempotency_key: Optional[str] = Header(None, max_length=IDEMPOTENCY_KEY_MAX_LENGTH)
 ):
     """
     Submit a complete road damage report
     
     This endpoint:
     1. Validates all input data
-    2. Stores image if provided
-    3. Creates report in Supabase
-    4. Identifies responsible authority
-    5. Triggers webhook to relay.app
-    6. Returns confirmation with report ID
+    2. Stores image if provided, while identifying the responsible authority
+    3. Creates report in Supabase once the image URL is known
+    4. Triggers webhook to relay.app
+    5. Returns confirmation with report ID
+    
+    The duration of each stage is reported in the Server-Timing header.
+    
+    With `?async=true` only step 1 happens in the request: the submission is
+    written to the local job queue and the response is `202` with a job id.
+    Steps 2-4 run in background workers; poll `GET /api/reports/jobs/{job_id}`
+    for progress and the report ID.
+    
+    Send an `Idempotency-Key` header to make retries safe: a retry with the
+    same key and payload waits for the original attempt if it is still
+    running, then replays its response (marked `Idempotent-Replayed: true`)
+    without uploading, inserting or notifying again. Reusing a key with a
+    different payload is rejected with 422.
     """
+    if not idempotency_key:
+        return await _submit_report(
+            request, response, image, location, damage_type, severity, remarks, async_mode
+        )
+    
+    fingerprint = await _submission_fingerprint(image, location, damage_type, severity, remarks, async_mode)
     try:
-        # Parse location JSON
-        try:
-            location_data = json.loads(location)
-            location_obj = Location(**location_data)
-        except (json.JSONDecodeError, ValueError) as e:
-            raise HTTPException(status_code=400, detail=f"Invalid location data: {str(e)}")
-        
-        # Validate damage type and severity
-        try:
-            damage_type_enum = DamageType(damage_type)
-            severity_enum = Severity(severity)
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=f"Invalid damage type or severity: {str(e)}")
+        stored = await idempotency_store.begin(idempotency_key, fingerprint)
+    except IdempotencyKeyMismatch as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyKeyInFlight as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if stored is not None:
+        return JSONResponse(
+            status_code=stored["status_code"],
+            content=stored["body"],
+            headers={**stored["headers"], "Idempotent-Replayed": "true"}
+        )
+    
+    try:
+        result = await _submit_report(
+            request, response, image, location, damage_type, severity, remarks, async_mode
+        )
+    except BaseException:
+        # Failed attempts are not recorded; the client's retry runs again
+        await idempotency_store.release(idempotency_key)
+        raise
+    
+    if isinstance(result, JSONResponse):
+        status_code, body = result.status_code, json.loads(result.body)
+        headers = {"Location": result.headers["location"]}
+    else:
+        status_code, body, headers = 200, result.model_dump(mode="json"), {}
+    await idempotency_store.complete(idempotency_key, fingerprint, status_code, body, headers)
+    return result
+
+async def _submission_fingerprint(
+    image: Optional[UploadFile],
+    location: str,
+    damage_type: str,
+    severity: str,
+    remarks: Optional[str],
+    async_mode: bool
+) -> str:
+    """Hash of everything a submission sends, to spot a key reused for another request"""
+    digest = hashlib.sha256(json.dumps(
+        [location, damage_type, severity, remarks, async_mode], separators=(",", ":")
+    ).encode("utf-8"))
+    if image:
+        digest.update(hashlib.sha256(await image.read()).digest())
+        await image.seek(0)
+    return digest.hexdigest()
+
+async def _submit_report(
+    request: Request,
+    response: Response,
+    image: Optional[UploadFile],
+    location: str,
+    damage_type: str,
+    severity: str,
+    remarks: Optional[str],
+    async_mode: bool
+):
+    """Validate and process a submission, or queue it in async mode"""
+    timings = _StageTimings()
+    try:
+        start = time.perf_counter()
+        location_obj, damage_type_enum, severity_enum = _validate_submission(location, damage_type, severity)
+        timings.durations["validate"] = (time.perf_counter() - start) * 1000
         
-        # Save image if provided
-        image_url = None
-        if image:
-            image_url = await storage_service.save_image(image)
+        if async_mode:
+            return await _enqueue_submission(
+                request, timings, image, location_obj, damage_type_enum, severity_enum, remarks
+            )
         
-        # Create report data
-        report_data = ReportCreate(
-            location=location_obj,
-            damage_type=damage_type_enum,
-            severity=severity_enum,
-            remarks=remarks or "No additional remarks",
-            image_url=image_url
+        # Upload and authority lookup are independent; run them side by side
+        upload = timings.start("upload", _upload_image, image) if image else None
+        authority_lookup = timings.start(
+            "authority", asyncio.to_thread, authority_service.identify_authority, location_obj
         )
         
-        # Store in Supabase
         try:
-            db_report = await supabase_service.create_report(report_data, image_url)
-            report_id = db_report.get("id")
-            
-            if not report_id:
-                raise HTTPException(status_code=500, detail="Failed to create report in database")
-        except ValueError as e:
-            # Supabase configuration error
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Database configuration error: {str(e)}. Please check SUPABASE_URL and SUPABASE_KEY in .env file."
-            )
-        except Exception as e:
-            # Other Supabase errors
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Failed to save report to database: {str(e)}"
+            # The insert only has to wait for the upload when there is an image
+            image_url = await upload if upload else None
+        
+            # Create report data
+            report_data = ReportCreate(
+                location=location_obj,
+                damage_type=damage_type_enum,
+                severity=severity_enum,
+                remarks=remarks or "No additional remarks",
+                image_url=image_url
             )
         
-        # Identify responsible authority
-        authority = authority_service.identify_authority(location_obj)
+            # Store in Supabase
+            try:
+                db_report = await timings.run("insert", supabase_service.create_report(report_data, image_url))
+                report_id = db_report.get("id")
+            
+                if not report_id:
+                    raise HTTPException(status_code=500, detail="Failed to create report in database")
+            except HTTPException:
+                raise
+            except ValueError as e:
+                # Supabase configuration error
+                raise HTTPException(
+                    status_code=500, 
+                    detail=f"Database configuration error: {str(e)}. Please check SUPABASE_URL and SUPABASE_KEY in .env file."
+                )
+            except Exception as e:
+                # Other Supabase errors
+                raise HTTPException(
+                    status_code=500, 
+                    detail=f"Failed to save report to database: {str(e)}"
+                )
+        
+            authority = await authority_lookup
+        finally:
+            # On failure the other stage may still be running; cancel it and
+            # collect its outcome so the task is neither leaked nor unretrieved
+            stages = [task for task in (upload, authority_lookup) if task is not None]
+            for task in stages:
+                task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
         
-        # Send webhook notification to relay.app (non-blocking)
+        # Send webhook notification to relay.app
         webhook_sent = False
         try:
-            webhook_sent = await webhook_service.send_notification(db_report, authority)
+            webhook_sent = await timings.run("webhook", webhook_service.send_notification(db_report, authority))
             if not webhook_sent:
-                print(f"Warning: Webhook notification failed for report {report_id}")
+                logger.warning("Webhook notification failed for report %s", report_id)
         except Exception as webhook_error:
             # Log webhook error but don't fail the request
-            print(f"Warning: Webhook notification error for report {report_id}: {str(webhook_error)}")
+            logger.warning("Webhook notification error for report %s: %s", report_id, webhook_error)
         
         # Determine success message based on webhook status
         if webhook_sent:
@@ -102,6 +301,16 @@ async def submit_report(
         else:
             message = "Report submitted successfully. (Webhook notification was not sent - check configuration)"
 
+        response.headers["Server-Timing"] = timings.header()
+        logger.info(
+            "Report submitted",
+            extra={
+                "sample": True,
+                "report_id": str(report_id),
+                "authority_notified": webhook_sent,
+                "stages_ms": {name: round(ms, 1) for name, ms in timings.durations.items()},
+            }
+        )
         return ReportResponse(
             report_id=str(report_id),
             status="submitted",
@@ -114,15 +323,345 @@ async def submit_report(
     except HTTPException:
         raise
     except Exception as e:
+        logger.exception("Report submission failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+def _parse_bulk_body(body: bytes, content_type: str) -> List[Any]:
+    """
+    Parse a bulk request body as NDJSON or a JSON array
+    
+    NDJSON lines that are not valid JSON are kept as error strings so they are
+    reported against their own index instead of failing the whole request.
+    """
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Request body is not valid UTF-8: {str(e)}")
+    
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                items.append(ValueError(f"Invalid JSON: {str(e)}"))
+        return items
+    
+    try:
+        items = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON array of reports")
+    return items
+
+@router.post("/bulk", response_model=BulkIngestResponse)
+async def bulk_ingest_reports(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    batch_size: int = Query(BULK_BATCH_SIZE, ge=1, le=BULK_MAX_BATCH_SIZE)
+):
+    """
+    Ingest many reports in one request
+    
+    Accepts a JSON array or NDJSON (Content-Type: application/x-ndjson) of
+    ReportCreate items. This endpoint:
+    1. Validates every item up front
+    2. Inserts valid items in multi-row batches of `batch_size`
+    3. Retries a failed batch row by row so only the bad rows fail
+    4. Queues authority notifications for all inserted reports
+    5. Returns a per-item outcome, indexed by position in the input
+    """
+    items = _parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many reports in one request ({len(items)} > {BULK_MAX_ITEMS})"
+        )
+    
+    results: List[Optional[BulkItemResult]] = [None] * len(items)
+    valid: List[Tuple[int, ReportCreate]] = []
+    
+    # Validate everything in one pass before touching the database
+    for index, item in enumerate(items):
+        if isinstance(item, Exception):
+            results[index] = BulkItemResult(index=index, success=False, error=str(item))
+            continue
+        try:
+            valid.append((index, ReportCreate.model_validate(item)))
+        except ValidationError as e:
+            results[index] = BulkItemResult(index=index, success=False, error=str(e))
+    
+    notifications: List[Tuple[Dict[str, Any], Dict[str, str]]] = []
+    
+    def record_inserted(batch: List[Tuple[int, ReportCreate]], rows: List[Dict[str, Any]]):
+        for (index, report), row in zip(batch, rows):
+            results[index] = BulkItemResult(index=index, success=True, report_id=str(row.get("id")))
+            notifications.append((row, authority_service.identify_authority(report.location)))
+    
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        try:
+            rows = await supabase_service.create_reports([report for _, report in batch])
+            record_inserted(batch, rows)
+        except ValueError as e:
+            # Supabase configuration error - nothing else will succeed either
+            raise HTTPException(status_code=500, detail=f"Database configuration error: {str(e)}")
+        except Exception:
+            # Isolate the offending rows so the rest of the batch still lands
+            for entry in batch:
+                try:
+                    rows = await supabase_service.create_reports([entry[1]])
+                    record_inserted([entry], rows)
+                except Exception as e:
+                    results[entry[0]] = BulkItemResult(
+                        index=entry[0],
+                        success=False,
+                        error=f"Failed to save report to database: {str(e)}"
+                    )
+    
+    # Notify authorities after the response is sent
+    if notifications:
+        background_tasks.add_task(webhook_service.send_notifications, notifications)
+    
+    inserted = len(notifications)
+    return BulkIngestResponse(
+        total=len(items),
+        inserted=inserted,
+        failed=len(items) - inserted,
+        results=results
+    )
+
+@router.patch("/status", response_model=StatusUpdateResponse)
+async def update_reports_status(update: StatusUpdateRequest):
+    """
+    Move a set of reports to a new status
+    
+    Reports are selected either by `report_ids` or by `filter` (the listing
+    filters). An empty filter matches every report and is refused unless
+    `all_reports` is true. Transitions not allowed from a report's current
+    status, and ids that are not UUIDs, are rejected for that report only;
+    the response lists the outcome per id.
+    """
+    if (update.report_ids is None) == (update.filter is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of report_ids or filter")
+    
+    try:
+        results = await supabase_service.update_reports_status(
+            update.status,
+            report_ids=update.report_ids,
+            filters=update.filter,
+            all_reports=update.all_reports
+        )
+    except EmptyFilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=f"Database configuration error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update report status: {str(e)}")
+    
+    updated = sum(1 for result in results if result.success)
+    return StatusUpdateResponse(
+        status=update.status,
+        updated=updated,
+        failed=len(results) - updated,
+        results=results
+    )
+
+@router.get("/export")
+async def export_reports(
+    format: ExportFormat = Query(ExportFormat.NDJSON),
+    gzip: bool = Query(False),
+    filters: ReportFilter = Depends(report_filters)
+):
+    """
+    Stream all matching reports as NDJSON, CSV or GeoJSON
+    
+    Rows are read from the database in pages and written out as they arrive,
+    so the export never holds the full result set in memory.
+    """
+    headers = {
+        "Content-Disposition": f'attachment; filename="{export_service.filename(format)}"'
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(
+        export_service.stream(format, filters, compress=gzip),
+        media_type=export_service.media_type(format),
+        headers=headers
+    )
+
+@router.get("/stats")
+async def get_report_stats(
+    granularity: str = Query("day", pattern="^(" + "|".join(GRANULARITIES) + ")$"),
+    buckets: int = Query(30, ge=1, le=400)
+):
+    """
+    Report counts by status, damage type, severity, authority and time bucket
+    
+    Served from in-process counters kept current on every write made through
+    this API and recounted against the database periodically. `buckets`
+    limits the time series to the newest hour/day/week buckets.
+    """
+    return ORJSONResponse(report_stats.snapshot(granularity, buckets))
+
+@router.post("/stats/rebuild")
+async def rebuild_report_stats():
+    """Recount all reports from the database and replace the counters"""
+    try:
+        return await report_stats.rebuild()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Could not rebuild report stats: {str(e)}")
+
+@router.get("/open")
+async def list_open_reports(
+    status: Optional[ReportStatus] = Query(None),
+    damage_type: Optional[DamageType] = Query(None),
+    severity: Optional[Severity] = Query(None),
+    authority_id: Optional[str] = Query(None),
+    bbox: Optional[str] = Query(None, description="min_lat,min_lng,max_lat,max_lng"),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_m: float = Query(500, gt=0, le=50_000),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Open reports for map views and nearby search
+    
+    Answered from the in-memory open reports index rather than the database.
+    With lat/lng, only reports within radius_m are returned, nearest first
+    with their distance; otherwise the newest come first. bbox restricts
+    results to a map viewport.
+    """
+    box = None
+    if bbox is not None:
+        try:
+            box = tuple(float(value) for value in bbox.split(","))
+        except ValueError:
+            box = ()
+        if len(box) != 4:
+            raise HTTPException(status_code=422, detail="bbox must be min_lat,min_lng,max_lat,max_lng")
+    if (lat is None) != (lng is None):
+        raise HTTPException(status_code=422, detail="lat and lng must be given together")
+    
+    total, reports = open_reports_index.query(
+        status=status.value if status else None,
+        damage_type=damage_type.value if damage_type else None,
+        severity=severity.value if severity else None,
+        authority_id=authority_id,
+        bbox=box,
+        near=(lat, lng, radius_m) if lat is not None else None,
+        limit=limit
+    )
+    return ORJSONResponse({"total": total, "reports": reports})
+
+@router.get("/cache/stats")
+async def report_cache_stats():
+    """Hit/miss counters for the report read-through cache"""
+    return ORJSONResponse(supabase_service.report_cache.stats())
+
+async def _enqueue_submission(
+    request: Request,
+    timings: _StageTimings,
+    image: Optional[UploadFile],
+    location: Location,
+    damage_type: DamageType,
+    severity: Severity,
+    remarks: Optional[str]
+) -> JSONResponse:
+    """Queue a validated submission for the background workers"""
+    try:
+        payload = ReportCreate(
+            location=location,
+            damage_type=damage_type,
+            severity=severity,
+            remarks=remarks or "No additional remarks"
+        ).model_dump(mode="json", exclude={"image_url"})
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid report data: {str(e)}")
+    
+    image_bytes = await image.read() if image else None
+    try:
+        job = await timings.run("enqueue", submission_queue.enqueue(
+            payload,
+            image_bytes,
+            image.filename if image else None,
+            image.content_type if image else None
+        ))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Could not queue report: {str(e)}")
+    
+    logger.info("Submission queued", extra={"sample": True, "job_id": job["id"]})
+    
+    status_url = str(request.url_for("get_submission_job", job_id=job["id"]))
+    body = SubmitJobResponse(
+        job_id=job["id"],
+        status=JobStatus(job["status"]),
+        status_url=status_url,
+        message="Report accepted and queued for processing."
+    )
+    return JSONResponse(
+        status_code=202,
+        content=body.model_dump(mode="json"),
+        headers={"Location": status_url, "Server-Timing": timings.header()}
+    )
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_submission_job(job_id: str):
+    """Progress of an asynchronous submission"""
+    job = await submission_queue.get(job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    result = job["result"]
+    return JobStatusResponse(
+        job_id=job["id"],
+        status=JobStatus(job["status"]),
+        stage=job["stage"],
+        attempts=job["attempts"],
+        report_id=result.get("report_id"),
+        authority=result.get("authority"),
+        authority_notified=result.get("authority_notified"),
+        image_url=result.get("image_url"),
+        error=job["error"],
+        created_at=datetime.fromtimestamp(job["created_at"]),
+        updated_at=datetime.fromtimestamp(job["updated_at"])
+    )
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.replace("W/", "", 1) == etag for tag in candidates)
+
 @router.get("/{report_id}")
-async def get_report(report_id: str):
-    """Retrieve a report by ID"""
+async def get_report(report_id: str, request: Request):
+    """
+    Retrieve a report by ID
+    
+    Responses carry an ETag and Cache-Control header; a request whose
+    If-None-Match matches the current ETag gets an empty 304.
+    """
     report = await supabase_service.get_report(report_id)
     
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
-    return report
+    body = orjson.dumps(report, default=str)
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={REPORT_MAX_AGE}, must-revalidate"
+    }
+    
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
 
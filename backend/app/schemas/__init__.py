@@ -4,7 +4,18 @@ from .report import (
     DamageType,
     Severity,
     Location,
-    ReportStatus
+    ReportStatus,
+    ReportFilter,
+    ExportFormat,
+    BulkItemResult,
+    BulkIngestResponse,
+    StatusUpdateRequest,
+    StatusUpdateResult,
+    StatusUpdateResponse,
+    ALLOWED_STATUS_TRANSITIONS,
+    JobStatus,
+    SubmitJobResponse,
+    JobStatusResponse
 )
 
 __all__ = [
@@ -13,7 +24,18 @@ __all__ = [
     "DamageType",
     "Severity",
     "Location",
-    "ReportStatus"
+    "ReportStatus",
+    "ReportFilter",
+    "ExportFormat",
+    "BulkItemResult",
+    "BulkIngestResponse",
+    "StatusUpdateRequest",
+    "StatusUpdateResult",
+    "StatusUpdateResponse",
+    "ALLOWED_STATUS_TRANSITIONS",
+    "JobStatus",
+    "SubmitJobResponse",
+    "JobStatusResponse"
 ]
 
 
@@ -2,7 +2,7 @@
 Pydantic schemas for report data validation
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List, Dict, Set
 from datetime import datetime
 from enum import Enum
 
@@ -50,4 +50,91 @@ class ReportStatus(str, Enum):
     RESOLVED = "resolved"
     CLOSED = "closed"
 
+# Status changes a report may go through; closed reports are final
+ALLOWED_STATUS_TRANSITIONS: Dict[ReportStatus, Set[ReportStatus]] = {
+    ReportStatus.PENDING: {ReportStatus.SUBMITTED, ReportStatus.IN_PROGRESS, ReportStatus.CLOSED},
+    ReportStatus.SUBMITTED: {ReportStatus.IN_PROGRESS, ReportStatus.RESOLVED, ReportStatus.CLOSED},
+    ReportStatus.IN_PROGRESS: {ReportStatus.SUBMITTED, ReportStatus.RESOLVED, ReportStatus.CLOSED},
+    ReportStatus.RESOLVED: {ReportStatus.IN_PROGRESS, ReportStatus.CLOSED},
+    ReportStatus.CLOSED: set(),
+}
 
+
+
+class ExportFormat(str, Enum):
+    """Supported bulk export formats"""
+    NDJSON = "ndjson"
+    CSV = "csv"
+    GEOJSON = "geojson"
+
+class ReportFilter(BaseModel):
+    """Filters shared by report listing and export queries"""
+    status: Optional[ReportStatus] = None
+    damage_type: Optional[DamageType] = None
+    severity: Optional[Severity] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+class BulkItemResult(BaseModel):
+    """Outcome of a single item in a bulk request"""
+    index: int
+    success: bool
+    report_id: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkIngestResponse(BaseModel):
+    """Schema for bulk ingestion response"""
+    total: int
+    inserted: int
+    failed: int
+    results: List[BulkItemResult]
+
+class StatusUpdateRequest(BaseModel):
+    """Schema for a bulk status transition; select reports by id or by filter"""
+    status: ReportStatus
+    report_ids: Optional[List[str]] = Field(None, max_length=10000)
+    filter: Optional[ReportFilter] = None
+    # Required with an empty filter, which selects every report
+    all_reports: bool = False
+
+class StatusUpdateResult(BaseModel):
+    """Outcome of a status transition for one report"""
+    report_id: str
+    success: bool
+    previous_status: Optional[ReportStatus] = None
+    error: Optional[str] = None
+
+class StatusUpdateResponse(BaseModel):
+    """Schema for bulk status transition response"""
+    status: ReportStatus
+    updated: int
+    failed: int
+    results: List[StatusUpdateResult]
+
+class JobStatus(str, Enum):
+    """Lifecycle of an asynchronous submission job"""
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class SubmitJobResponse(BaseModel):
+    """Schema for an accepted asynchronous submission"""
+    job_id: str
+    status: JobStatus
+    status_url: str
+    message: str
+
+class JobStatusResponse(BaseModel):
+    """Progress of an asynchronous submission job"""
+    job_id: str
+    status: JobStatus
+    stage: Optional[str] = Field(None, description="Last completed processing stage")
+    attempts: int
+    report_id: Optional[str] = None
+    authority: Optional[Dict[str, str]] = None
+    authority_notified: Optional[bool] = None
+    image_url: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
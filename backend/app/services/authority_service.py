@@ -7,25 +7,31 @@ from app.schemas.report import Location
 class AuthorityService:
     """Service for mapping locations to responsible authorities"""
     
-    # Example authority mapping - in production, this would query a geospatial database
+    # Example authority mapping - in production, this would query a geospatial database.
+    # Keyed by authority id; road_class is the class of road each one maintains.
     AUTHORITY_MAPPING = {
         "default": {
             "name": "City Public Works Department",
             "contact": "publicworks@city.gov",
-            "department": "Infrastructure Maintenance"
+            "department": "Infrastructure Maintenance",
+            "road_class": "local"
+        },
+        "state_dot": {
+            "name": "State Department of Transportation",
+            "contact": "dot@state.gov",
+            "department": "Highway Maintenance",
+            "road_class": "highway"
+        },
+        "county_public_works": {
+            "name": "County Public Works",
+            "contact": "countypw@county.gov",
+            "department": "Road Maintenance",
+            "road_class": "county"
         }
     }
     
-    def identify_authority(self, location: Location) -> Dict[str, str]:
-        """
-        Identify the responsible authority for a given location
-        
-        Args:
-            location: Location coordinates and address
-            
-        Returns:
-            Dictionary with authority information
-        """
+    def identify_authority_id(self, location: Location) -> str:
+        """Id of the authority responsible for a location"""
         # In a real implementation, this would:
         # 1. Query a geospatial database to determine jurisdiction
         # 2. Check city/county/state boundaries
@@ -37,25 +43,33 @@ class AuthorityService:
         # - Database lookup for jurisdiction boundaries
         # - Road classification (highway vs local road)
         
-        authority = self.AUTHORITY_MAPPING["default"].copy()
-        
         # Example: If address contains certain keywords, assign different authority
         if location.address:
             address_lower = location.address.lower()
             if "highway" in address_lower or "interstate" in address_lower:
-                authority = {
-                    "name": "State Department of Transportation",
-                    "contact": "dot@state.gov",
-                    "department": "Highway Maintenance"
-                }
+                return "state_dot"
             elif "county" in address_lower:
-                authority = {
-                    "name": "County Public Works",
-                    "contact": "countypw@county.gov",
-                    "department": "Road Maintenance"
-                }
+                return "county_public_works"
         
-        return authority
+        return "default"
+    
+    def identify_authority(self, location: Location) -> Dict[str, str]:
+        """
+        Identify the responsible authority for a given location
+        
+        Args:
+            location: Location coordinates and address
+            
+        Returns:
+            Dictionary with authority information
+        """
+        authority_id = self.identify_authority_id(location)
+        return {"id": authority_id, **self.AUTHORITY_MAPPING[authority_id]}
+    
+    def get_authority(self, authority_id: str) -> Optional[Dict[str, str]]:
+        """Look up an authority by id"""
+        authority = self.AUTHORITY_MAPPING.get(authority_id)
+        return {"id": authority_id, **authority} if authority else None
 
 # Singleton instance
 authority_service = AuthorityService()
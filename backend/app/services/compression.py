@@ -0,0 +1,154 @@
+"""
+Response compression for large JSON, NDJSON, CSV and GeoJSON bodies
+"""
+import os
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as they are; compressing them costs more
+# CPU than the bytes saved are worth
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Gzip level and brotli quality; the defaults favour speed over ratio
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Content types worth compressing (Server-Sent Events are left alone so
+# tokens are not held back in the compressor)
+COMPRESSIBLE_TYPES = (
+    b"application/json", b"application/x-ndjson", b"application/geo+json", b"text/csv", b"text/plain",
+    b"text/html", b"application/javascript",
+)
+
+class _StreamCompressor:
+    """Incremental brotli or gzip encoder; each chunk is flushed so it can be decoded on arrival"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # zlib.compress only takes wbits from Python 3.11, so gzip goes through compressobj
+            self._gzip = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        return self._gzip.compress(data) + self._gzip.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+def _accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """br when the client takes it and brotli is installed, else gzip, else None"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with brotli or gzip
+
+    A complete body is compressed in one call when it is at least
+    COMPRESSION_MIN_SIZE bytes. Streamed bodies (exports) are compressed
+    chunk by chunk with the negotiated encoding and flushed after each chunk,
+    so every page reaches the client as soon as it is encoded. Responses that already carry a Content-Encoding, such as
+    exports requested with gzip=true, pass through. An ETag on a compressed
+    response is made weak, since the bytes no longer match the original
+    representation. Plain ASGI for the same reasons as PrometheusMiddleware;
+    Starlette's GZipMiddleware compresses at level 9 and buffers streamed
+    chunks.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = b""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value
+                break
+        encoding = _accepted_encoding(accept_encoding.decode("latin-1")) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                content_type = headers.get(b"content-type", b"").split(b";")[0].strip()
+                passthrough = (
+                    b"content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or message["status"] in (204, 304)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                start, start_message = start_message, None
+                if not more_body:
+                    if len(body) < self.minimum_size:
+                        await send(start)
+                        await send(message)
+                        passthrough = True
+                        return
+                    body = _StreamCompressor(encoding).compress(body, final=True)
+                    await send(self._compressed_start(start, encoding, len(body)))
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                # Streamed body: compress it incrementally
+                compressor = _StreamCompressor(encoding)
+                await send(self._compressed_start(start, encoding, None))
+
+            data = compressor.compress(body, final=not more_body)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _compressed_start(message, encoding: str, length: Optional[int]):
+        headers = []
+        vary = None
+        for name, value in message.get("headers", []):
+            if name == b"content-length":
+                continue
+            if name == b"vary":
+                vary = value
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                value = b"W/" + value
+            headers.append((name, value))
+        headers.append((b"content-encoding", encoding.encode("ascii")))
+        headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode("ascii")))
+        return {**message, "headers": headers}
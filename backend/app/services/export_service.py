@@ -0,0 +1,147 @@
+"""
+Service for streaming bulk exports of reports
+"""
+import csv
+import io
+import zlib
+import orjson
+from typing import Iterator, Iterable, Dict, Any, List, Optional
+from app.schemas.report import ExportFormat, ReportFilter
+from app.services.supabase_service import supabase_service
+
+class ExportService:
+    """Service for encoding report pages as NDJSON, CSV or GeoJSON streams"""
+
+    # Column order for CSV exports (mirrors the reports table)
+    CSV_COLUMNS = [
+        "id",
+        "created_at",
+        "updated_at",
+        "status",
+        "damage_type",
+        "severity",
+        "location_lat",
+        "location_lng",
+        "location_address",
+        "remarks",
+        "image_url",
+        "authority_name",
+        "authority_contact",
+        "webhook_sent",
+    ]
+
+    MEDIA_TYPES = {
+        ExportFormat.NDJSON: "application/x-ndjson",
+        ExportFormat.CSV: "text/csv",
+        ExportFormat.GEOJSON: "application/geo+json",
+    }
+
+    FILE_EXTENSIONS = {
+        ExportFormat.NDJSON: "ndjson",
+        ExportFormat.CSV: "csv",
+        ExportFormat.GEOJSON: "geojson",
+    }
+
+    def media_type(self, export_format: ExportFormat) -> str:
+        """Return the Content-Type for an export format"""
+        return self.MEDIA_TYPES[export_format]
+
+    def filename(self, export_format: ExportFormat) -> str:
+        """Return the download filename for an export format"""
+        return f"reports.{self.FILE_EXTENSIONS[export_format]}"
+
+    def stream(
+        self,
+        export_format: ExportFormat,
+        filters: Optional[ReportFilter] = None,
+        compress: bool = False
+    ) -> Iterator[bytes]:
+        """
+        Stream matching reports in the requested format
+
+        The database is scanned one page at a time and every page is encoded
+        and yielded before the next one is fetched, so memory use is bounded by
+        the page size rather than the number of matching rows.
+
+        Args:
+            export_format: Output encoding
+            filters: Optional listing filters
+            compress: Gzip the stream
+
+        Yields:
+            Encoded chunks, one per page (plus header/footer where needed)
+        """
+        pages = supabase_service.iter_report_pages(filters)
+
+        encoders = {
+            ExportFormat.NDJSON: self._encode_ndjson,
+            ExportFormat.CSV: self._encode_csv,
+            ExportFormat.GEOJSON: self._encode_geojson,
+        }
+        chunks = encoders[export_format](pages)
+
+        if compress:
+            chunks = self._gzip(chunks)
+        return chunks
+
+    def _encode_ndjson(self, pages: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+        """Encode pages as newline-delimited JSON"""
+        for rows in pages:
+            yield b"".join(orjson.dumps(row, default=str) + b"\n" for row in rows)
+
+    def _encode_csv(self, pages: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+        """Encode pages as CSV with a header row"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.CSV_COLUMNS, extrasaction="ignore")
+
+        # Send the header before the first page is fetched
+        writer.writeheader()
+        yield buffer.getvalue().encode("utf-8")
+
+        for rows in pages:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+
+    def _encode_geojson(self, pages: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+        """Encode pages as a GeoJSON FeatureCollection of points"""
+        yield b'{"type":"FeatureCollection","features":['
+
+        first = True
+        for rows in pages:
+            features = []
+            for row in rows:
+                properties = {
+                    key: value for key, value in row.items()
+                    if key not in ("location_lat", "location_lng")
+                }
+                feature = {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": [row.get("location_lng"), row.get("location_lat")]
+                    },
+                    "properties": properties
+                }
+                features.append(orjson.dumps(feature, default=str))
+
+            if not features:
+                continue
+            chunk = b",".join(features)
+            yield chunk if first else b"," + chunk
+            first = False
+
+        yield b"]}"
+
+    def _gzip(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Gzip a chunk stream, flushing after every chunk so pages are not held back"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+# Singleton instance
+export_service = ExportService()
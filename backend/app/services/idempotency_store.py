@@ -0,0 +1,237 @@
+"""
+Idempotency-Key bookkeeping for report submission
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from app.services.cache_service import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# How long a completed response is replayed, and how many are kept in memory
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_MAX = int(os.getenv("IDEMPOTENCY_MAX", "10000"))
+# Optional SQLite file shared by workers; memory-only when unset
+IDEMPOTENCY_DB_PATH = os.getenv("IDEMPOTENCY_DB")
+# An in-flight attempt older than this is assumed dead and may be taken over
+IDEMPOTENCY_LOCK_TIMEOUT = float(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", "60"))
+# Seconds between deletions of expired keys from the SQLite file
+IDEMPOTENCY_PURGE_INTERVAL = float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL", "300"))
+POLL_INTERVAL = 0.1
+
+class IdempotencyKeyMismatch(Exception):
+    """The key was already used for a request with a different payload"""
+
+class IdempotencyKeyInFlight(Exception):
+    """The original request with this key is still running"""
+
+class SQLiteIdempotencyBackend:
+    """Shared record of in-flight and completed keys in a local SQLite database"""
+
+    def __init__(self, path: str, ttl: float = IDEMPOTENCY_TTL, lock_timeout: float = IDEMPOTENCY_LOCK_TIMEOUT):
+        self.path = path
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+        # Autocommit mode so claim() can take an explicit write lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS idempotency_keys ("
+            "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, response TEXT, updated_at REAL NOT NULL)"
+        )
+
+    def claim(self, key: str, fingerprint: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Try to become the request that executes `key`
+
+        Returns ("acquired", None), ("in_flight", {"fingerprint": ...}) or
+        ("completed", record). Expired records and in-flight attempts past
+        the lock timeout are taken over.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT fingerprint, response, updated_at FROM idempotency_keys WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    stored_fingerprint, response, updated_at = row
+                    if response is not None and updated_at + self.ttl > now:
+                        self._conn.execute("COMMIT")
+                        return "completed", json.loads(response)
+                    if response is None and updated_at + self.lock_timeout > now:
+                        self._conn.execute("COMMIT")
+                        return "in_flight", {"fingerprint": stored_fingerprint}
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO idempotency_keys (key, fingerprint, response, updated_at) "
+                    "VALUES (?, ?, NULL, ?)",
+                    (key, fingerprint, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return "acquired", None
+
+    def complete(self, key: str, record: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE idempotency_keys SET response = ?, updated_at = ? WHERE key = ?",
+                (json.dumps(record), time.time(), key)
+            )
+
+    def release(self, key: str):
+        """Forget an in-flight attempt that failed, so a retry runs again"""
+        with self._lock:
+            self._conn.execute("DELETE FROM idempotency_keys WHERE key = ? AND response IS NULL", (key,))
+
+    def purge_expired(self) -> int:
+        """Delete expired records and return how many were removed"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM idempotency_keys WHERE updated_at < ?", (time.time() - self.ttl,)
+            )
+        return cursor.rowcount
+
+class IdempotencyStore:
+    """
+    Tracks requests by Idempotency-Key so retries never redo their I/O
+
+    The first request with a key executes; concurrent retries wait for it and
+    later ones replay its stored response. Completed responses live in a
+    bounded LRU/TTL cache and, when a backend is configured, in SQLite so
+    other workers see them too. A failed attempt releases its key.
+    Records are dicts with fingerprint, status_code, body and headers.
+    """
+
+    def __init__(self, backend: Optional[SQLiteIdempotencyBackend] = None,
+                 maxsize: int = IDEMPOTENCY_MAX, ttl: float = IDEMPOTENCY_TTL,
+                 lock_timeout: float = IDEMPOTENCY_LOCK_TIMEOUT,
+                 purge_interval: float = IDEMPOTENCY_PURGE_INTERVAL):
+        self.completed = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.backend = backend
+        self.lock_timeout = lock_timeout
+        self.purge_interval = purge_interval
+        self._in_flight: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    @staticmethod
+    def _check(key: str, fingerprint: str, stored_fingerprint: str):
+        if fingerprint != stored_fingerprint:
+            raise IdempotencyKeyMismatch(f"Idempotency-Key {key!r} was used with a different request")
+
+    async def begin(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Start a request with `key`
+
+        Returns the stored record if the request already completed (waiting
+        for an in-flight attempt first), or None if the caller should run it
+        and then call complete() or release().
+        """
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            record = self.completed.get(key)
+            if record is not None:
+                self._check(key, fingerprint, record["fingerprint"])
+                return record
+
+            if key in self._in_flight:
+                stored_fingerprint, future = self._in_flight[key]
+                self._check(key, fingerprint, stored_fingerprint)
+                await self._wait(future, deadline)
+                continue
+
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = (fingerprint, future)
+            if self.backend is None:
+                return None
+
+            try:
+                state, record = await asyncio.to_thread(self.backend.claim, key, fingerprint)
+            except BaseException:
+                self._settle(key)
+                raise
+            if state == "acquired":
+                return None
+
+            # Another worker owns or finished this key
+            self._settle(key)
+            self._check(key, fingerprint, record["fingerprint"])
+            if state == "completed":
+                self.completed.set(key, record)
+                return record
+            await self._wait(None, deadline)
+
+    async def _wait(self, future: Optional[asyncio.Future], deadline: float):
+        """Wait for a local in-flight attempt, or one poll interval, within the lock timeout"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise IdempotencyKeyInFlight("The original request with this Idempotency-Key is still in progress")
+        if future is None:
+            await asyncio.sleep(min(POLL_INTERVAL, remaining))
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(future), remaining)
+        except asyncio.TimeoutError:
+            raise IdempotencyKeyInFlight("The original request with this Idempotency-Key is still in progress")
+
+    def _settle(self, key: str):
+        """Drop the local in-flight marker and wake anyone waiting on it"""
+        entry = self._in_flight.pop(key, None)
+        if entry is not None and not entry[1].done():
+            entry[1].set_result(None)
+
+    async def complete(self, key: str, fingerprint: str, status_code: int,
+                       body: Any, headers: Optional[Dict[str, str]] = None):
+        """Store the response of a finished request for replay"""
+        record = {
+            "fingerprint": fingerprint,
+            "status_code": status_code,
+            "body": body,
+            "headers": headers or {},
+        }
+        self.completed.set(key, record)
+        try:
+            if self.backend is not None:
+                await asyncio.to_thread(self.backend.complete, key, record)
+        finally:
+            self._settle(key)
+
+    async def release(self, key: str):
+        """Give up a key after a failed attempt so a retry executes again"""
+        try:
+            if self.backend is not None:
+                await asyncio.to_thread(self.backend.release, key)
+        finally:
+            self._settle(key)
+
+    def start(self):
+        """Delete expired keys from the backend periodically"""
+        if self.backend is not None and not self._tasks:
+            self._tasks.append(asyncio.create_task(self._purge_loop()))
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _purge_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.backend.purge_expired)
+            except Exception as e:
+                logger.exception("Could not purge idempotency keys: %s", e)
+            await asyncio.sleep(self.purge_interval)
+
+# Singleton instance
+idempotency_store = IdempotencyStore(
+    backend=SQLiteIdempotencyBackend(IDEMPOTENCY_DB_PATH) if IDEMPOTENCY_DB_PATH else None
+)
@@ -0,0 +1,167 @@
+"""
+Structured JSON logging with a background writer and request correlation ids
+"""
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from typing import Optional
+
+# Log level, output format ("json" or "text") and the share of sampled
+# success logs that are kept
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Correlation id of the request (or background job) being handled; copied
+# into tasks and asyncio.to_thread calls along with the rest of the context
+request_id_var: contextvars.ContextVar = contextvars.ContextVar("request_id", default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "request_id", "sample"
+}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.request_id = getattr(record, "request_id", None) or "-"
+        line = super().format(record)
+        extras = {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+        return f"{line} {extras}" if extras else line
+
+class ContextFilter(logging.Filter):
+    """
+    Stamp records with the current request id and drop unsampled success logs
+
+    Runs on the thread that logs the record, where the request's context
+    is active. Records logged with extra={"sample": True} are kept with
+    probability LOG_SAMPLE_RATE; warnings and errors are always kept.
+    """
+
+    def __init__(self, sample_rate: float = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sample", False) and record.levelno < logging.WARNING:
+            if random.random() >= self.sample_rate:
+                return False
+            record.sample_rate = self.sample_rate
+        record.request_id = request_id_var.get()
+        return True
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a background listener thread instead of writing them
+
+    Only the message and any traceback are rendered on the caller's side;
+    JSON encoding and the write to stdout happen on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, sample_rate: float = LOG_SAMPLE_RATE):
+    """Route the root logger through the queue handler; safe to call more than once"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(ContextFilter(sample_rate))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+    # httpx logs every request at INFO; our dependency metrics cover that
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware giving each request a correlation id
+
+    Uses the client's X-Request-ID when present, otherwise generates one,
+    sets it for the duration of the request and echoes it in the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        header = (REQUEST_ID_HEADER.lower().encode("latin-1"), request_id.encode("latin-1"))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
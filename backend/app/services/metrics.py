@@ -0,0 +1,195 @@
+"""
+Prometheus metrics for HTTP routes and outbound dependencies
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+
+# Latency buckets (seconds) and payload buckets (bytes, 256 B to 16 MiB)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(9))
+
+# Route label for requests that matched no route, so 404 scans cannot
+# create one series per path
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status code",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum"
+)
+HTTP_REQUEST_SIZE = Histogram(
+    "http_request_size_bytes",
+    "HTTP request body size by route template (from Content-Length)",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size by route template",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS
+)
+
+DEPENDENCY_DURATION = Histogram(
+    "dependency_request_duration_seconds",
+    "Latency of calls to outbound dependencies",
+    ["dependency", "operation"],
+    buckets=LATENCY_BUCKETS
+)
+DEPENDENCY_ERRORS = Counter(
+    "dependency_request_errors_total",
+    "Failed calls to outbound dependencies",
+    ["dependency", "operation", "error"]
+)
+DEPENDENCY_IN_FLIGHT = Gauge(
+    "dependency_requests_in_flight",
+    "Calls to outbound dependencies currently waiting for a response",
+    ["dependency"],
+    multiprocess_mode="livesum"
+)
+DEPENDENCY_PAYLOAD_SIZE = Histogram(
+    "dependency_payload_size_bytes",
+    "Size of payloads sent to outbound dependencies",
+    ["dependency", "operation"],
+    buckets=SIZE_BUCKETS
+)
+
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Requests rejected by admission control (rate_limited or overloaded)",
+    ["reason"]
+)
+
+REPORT_OUTBOX_PENDING = Gauge(
+    "report_outbox_pending",
+    "Reports committed locally and not yet replicated to Supabase",
+    multiprocess_mode="max"
+)
+
+# Dependency label values
+SUPABASE_DB = "supabase_db"
+SUPABASE_STORAGE = "supabase_storage"
+OPENAI_VISION = "openai_vision"
+RELAY_WEBHOOK = "relay_webhook"
+
+@contextmanager
+def track_dependency(dependency: str, operation: str) -> Iterator[None]:
+    """
+    Time a call to an outbound dependency and count it if it raises
+
+    Works for both blocking and awaited calls, since it only measures
+    wall-clock time between entering and leaving the block.
+    """
+    in_flight = DEPENDENCY_IN_FLIGHT.labels(dependency)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        DEPENDENCY_ERRORS.labels(dependency, operation, type(e).__name__).inc()
+        raise
+    finally:
+        DEPENDENCY_DURATION.labels(dependency, operation).observe(time.perf_counter() - start)
+        in_flight.dec()
+
+def record_dependency_error(dependency: str, operation: str, error: str):
+    """Count a failure that a dependency reported without raising"""
+    DEPENDENCY_ERRORS.labels(dependency, operation, error).inc()
+
+def observe_payload(dependency: str, operation: str, size: int):
+    """Record the size of a payload sent to a dependency"""
+    DEPENDENCY_PAYLOAD_SIZE.labels(dependency, operation).observe(size)
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware recording latency, sizes and in-flight requests per route
+
+    Routes are labelled by their template (e.g. /api/reports/{report_id}),
+    read from the scope after routing, so label cardinality stays bounded.
+    Written as plain ASGI rather than BaseHTTPMiddleware so streaming
+    responses pass through untouched and the per-request cost stays at a
+    few dictionary lookups and histogram updates.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # Labelled children by (method, route, status); labels() is the
+        # costliest part of an observation, and the key space is small
+        self._series: Dict[Tuple[str, str, str], Tuple[Any, Any, Any]] = {}
+
+    def _children(self, method: str, route: str, status: str):
+        key = (method, route, status)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = (
+                HTTP_REQUEST_DURATION.labels(method, route, status),
+                HTTP_RESPONSE_SIZE.labels(method, route),
+                HTTP_REQUEST_SIZE.labels(method, route),
+            )
+        return series
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            latency, response_bytes, request_bytes = self._children(scope["method"], template, str(status_code))
+            latency.observe(duration)
+            response_bytes.observe(response_size)
+
+            content_length = _header(scope, b"content-length")
+            if content_length and content_length.isdigit():
+                request_bytes.observe(int(content_length))
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+def render_metrics():
+    """
+    Metrics in the Prometheus text format, with their content type
+
+    With several worker processes, set PROMETHEUS_MULTIPROC_DIR so every
+    worker writes its samples there and any of them can serve the total.
+    """
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
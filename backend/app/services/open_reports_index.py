@@ -0,0 +1,351 @@
+"""
+Compact columnar in-memory index of open reports
+"""
+import asyncio
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.schemas.report import DamageType, Location, ReportFilter, ReportStatus, Severity
+from app.services.authority_service import authority_service
+from app.services.supabase_service import supabase_service
+
+logger = logging.getLogger(__name__)
+
+# Seconds between full reloads from the database (picks up writes made by
+# other workers); with 0 the index is only loaded once, at startup
+OPEN_INDEX_RELOAD_INTERVAL = float(os.getenv("OPEN_INDEX_RELOAD_INTERVAL", "900"))
+INITIAL_CAPACITY = 1024
+
+OPEN_STATUSES = (ReportStatus.PENDING.value, ReportStatus.SUBMITTED.value, ReportStatus.IN_PROGRESS.value)
+INDEX_COLUMNS = "id,status,damage_type,severity,location_lat,location_lng,location_address,created_at"
+
+# Categorical columns are stored as int8 codes into these tuples
+STATUS_CODES = tuple(status.value for status in ReportStatus)
+SEVERITY_CODES = tuple(severity.value for severity in Severity)
+DAMAGE_TYPE_CODES = tuple(damage_type.value for damage_type in DamageType)
+AUTHORITY_CODES = tuple(authority_service.AUTHORITY_MAPPING)
+
+EARTH_RADIUS_METERS = 6_371_000.0
+
+def _code(values: Tuple[str, ...], value: Optional[str], default: int = 0) -> int:
+    try:
+        return values.index(value)
+    except ValueError:
+        return default
+
+def _timestamp(created_at: Any) -> float:
+    if not created_at:
+        return time.time()
+    try:
+        moment = datetime.fromisoformat(str(created_at).replace("Z", "+00:00"))
+    except ValueError:
+        return time.time()
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+def distance_meters(lat: np.ndarray, lng: np.ndarray, from_lat: float, from_lng: float) -> np.ndarray:
+    """Great-circle distance (haversine) from one point to arrays of points"""
+    lat1, lng1 = math.radians(from_lat), math.radians(from_lng)
+    lat2, lng2 = np.radians(lat), np.radians(lng)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+class OpenReportsIndex:
+    """
+    Open reports (pending, submitted, in progress) held as NumPy columns
+
+    Coordinates, creation time and the categorical fields (status,
+    severity, damage type, authority as int8 codes) live in preallocated
+    arrays that grow by doubling; ids and addresses are the only
+    per-report Python objects. Removing a report moves the last row into
+    its slot, so the first `size` rows are always the open set and filters
+    are plain array operations over them.
+
+    The index loads with a paged scan, follows SupabaseService change
+    events and reloads periodically; changes that arrive during a reload
+    are replayed onto the reloaded arrays. Listeners added with add_listener()
+    are called with ("changed", ids) after incremental updates and
+    ("reloaded", []) after a full load.
+    """
+
+    def __init__(self, reload_interval: float = OPEN_INDEX_RELOAD_INTERVAL, capacity: int = INITIAL_CAPACITY):
+        self.reload_interval = reload_interval
+        self._lock = threading.RLock()
+        self._allocate(capacity)
+        self._listeners: List[Callable[[str, List[str]], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        # Change events received while load() scans the table; replayed onto
+        # the fresh arrays before they replace the current ones
+        self._reload_changes: Optional[List[Tuple[str, List[Dict[str, Any]]]]] = None
+        self.loaded_at: Optional[float] = None
+
+    def _allocate(self, capacity: int):
+        self.size = 0
+        self.lat = np.zeros(capacity, dtype=np.float64)
+        self.lng = np.zeros(capacity, dtype=np.float64)
+        self.created = np.zeros(capacity, dtype=np.float64)
+        self.status = np.zeros(capacity, dtype=np.int8)
+        self.severity = np.zeros(capacity, dtype=np.int8)
+        self.damage_type = np.zeros(capacity, dtype=np.int8)
+        self.authority = np.zeros(capacity, dtype=np.int8)
+        self.ids: List[str] = []
+        self.addresses: List[Optional[str]] = []
+        self._positions: Dict[str, int] = {}
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Hold while reading several columns that must agree with each other"""
+        return self._lock
+
+    def add_listener(self, listener: Callable[[str, List[str]], None]):
+        self._listeners.append(listener)
+
+    def _grow(self):
+        capacity = len(self.lat) * 2
+        for name in ("lat", "lng", "created", "status", "severity", "damage_type", "authority"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def _upsert(self, row: Dict[str, Any]):
+        report_id = str(row["id"])
+        position = self._positions.get(report_id)
+        if position is None:
+            if self.size == len(self.lat):
+                self._grow()
+            position = self.size
+            self.size += 1
+            self._positions[report_id] = position
+            self.ids.append(report_id)
+            self.addresses.append(None)
+
+        lat = float(row.get("location_lat") or 0.0)
+        lng = float(row.get("location_lng") or 0.0)
+        address = row.get("location_address")
+        try:
+            authority_id = authority_service.identify_authority_id(Location(lat=lat, lng=lng, address=address))
+        except ValueError:
+            authority_id = "default"
+
+        self.lat[position] = lat
+        self.lng[position] = lng
+        self.created[position] = _timestamp(row.get("created_at"))
+        self.status[position] = _code(STATUS_CODES, row.get("status") or ReportStatus.PENDING.value)
+        self.severity[position] = _code(SEVERITY_CODES, row.get("severity"))
+        self.damage_type[position] = _code(DAMAGE_TYPE_CODES, row.get("damage_type"), len(DAMAGE_TYPE_CODES) - 1)
+        self.authority[position] = _code(AUTHORITY_CODES, authority_id)
+        self.addresses[position] = address
+
+    def _remove(self, report_id: str):
+        position = self._positions.pop(report_id, None)
+        if position is None:
+            return
+        last = self.size - 1
+        if position != last:
+            for column in (self.lat, self.lng, self.created, self.status, self.severity,
+                           self.damage_type, self.authority):
+                column[position] = column[last]
+            self.ids[position] = self.ids[last]
+            self.addresses[position] = self.addresses[last]
+            self._positions[self.ids[position]] = position
+        self.ids.pop()
+        self.addresses.pop()
+        self.size = last
+
+    def _apply(self, row: Dict[str, Any]):
+        if (row.get("status") or ReportStatus.PENDING.value) in OPEN_STATUSES:
+            self._upsert(row)
+        else:
+            self._remove(str(row["id"]))
+
+    def _apply_change(self, event: str, rows: List[Dict[str, Any]]):
+        for row in rows:
+            if row.get("id") is None:
+                continue
+            if event == "status_changed" and str(row["id"]) in self._positions:
+                # Only the status moved; keep the indexed fields
+                if row.get("status") in OPEN_STATUSES:
+                    self.status[self._positions[str(row["id"])]] = _code(STATUS_CODES, row["status"])
+                else:
+                    self._remove(str(row["id"]))
+                continue
+            self._apply(row)
+
+    def on_change(self, event: str, rows: List[Dict[str, Any]]):
+        """SupabaseService change listener"""
+        with self._lock:
+            self._apply_change(event, rows)
+            if self._reload_changes is not None:
+                self._reload_changes.append((event, rows))
+        self._emit("changed", [str(row["id"]) for row in rows if row.get("id") is not None])
+
+    def _emit(self, event: str, ids: List[str]):
+        for listener in self._listeners:
+            try:
+                listener(event, ids)
+            except Exception as e:
+                logger.exception("Open reports index listener failed on %s: %s", event, e)
+
+    def load(self, pages: Optional[Iterable[List[Dict[str, Any]]]] = None):
+        """Replace the contents with every open report, read page by page"""
+        if pages is None:
+            pages = (
+                rows
+                for status in OPEN_STATUSES
+                for rows in supabase_service.iter_report_pages(
+                    ReportFilter(status=ReportStatus(status)), columns=INDEX_COLUMNS
+                )
+            )
+        fresh = OpenReportsIndex(capacity=INITIAL_CAPACITY)
+        with self._lock:
+            self._reload_changes = []
+        try:
+            for rows in pages:
+                for row in rows:
+                    fresh._apply(row)
+        except BaseException:
+            with self._lock:
+                self._reload_changes = None
+            raise
+        with self._lock:
+            # Pages read before a change still hold the old row
+            for event, rows in self._reload_changes:
+                fresh._apply_change(event, rows)
+            self._reload_changes = None
+            for name in ("size", "lat", "lng", "created", "status", "severity", "damage_type",
+                         "authority", "ids", "addresses", "_positions"):
+                setattr(self, name, getattr(fresh, name))
+            self.loaded_at = time.time()
+        self._emit("reloaded", [])
+
+    def position(self, report_id: str) -> Optional[int]:
+        return self._positions.get(report_id)
+
+    def row(self, position: int) -> Dict[str, Any]:
+        """One indexed report as a dict"""
+        return {
+            "id": self.ids[position],
+            "status": STATUS_CODES[self.status[position]],
+            "damage_type": DAMAGE_TYPE_CODES[self.damage_type[position]],
+            "severity": SEVERITY_CODES[self.severity[position]],
+            "location_lat": float(self.lat[position]),
+            "location_lng": float(self.lng[position]),
+            "location_address": self.addresses[position],
+            "authority_id": AUTHORITY_CODES[self.authority[position]],
+            "created_at": datetime.fromtimestamp(float(self.created[position]), timezone.utc).isoformat(),
+        }
+
+    def count(self, authority_id: Optional[str] = None) -> int:
+        with self._lock:
+            if authority_id is None:
+                return self.size
+            return int(np.count_nonzero(self.authority[:self.size] == _code(AUTHORITY_CODES, authority_id, -1)))
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        damage_type: Optional[str] = None,
+        severity: Optional[str] = None,
+        authority_id: Optional[str] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        near: Optional[Tuple[float, float, float]] = None,
+        limit: int = 100
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Filter open reports with array operations
+
+        bbox is (min_lat, min_lng, max_lat, max_lng); near is (lat, lng,
+        radius in meters) and orders results by distance, otherwise the
+        newest come first. Returns the number of matches and up to `limit`
+        of them.
+        """
+        with self._lock:
+            n = self.size
+            mask = np.ones(n, dtype=bool)
+            for column, values, value in (
+                (self.status, STATUS_CODES, status),
+                (self.damage_type, DAMAGE_TYPE_CODES, damage_type),
+                (self.severity, SEVERITY_CODES, severity),
+                (self.authority, AUTHORITY_CODES, authority_id),
+            ):
+                if value is not None:
+                    mask &= column[:n] == _code(values, value, -1)
+            if bbox is not None:
+                min_lat, min_lng, max_lat, max_lng = bbox
+                lat, lng = self.lat[:n], self.lng[:n]
+                mask &= (lat >= min_lat) & (lat <= max_lat) & (lng >= min_lng) & (lng <= max_lng)
+
+            distances = None
+            if near is not None:
+                center_lat, center_lng, radius = near
+                # Cheap bounding-box prefilter before the exact distance
+                dlat = math.degrees(radius / EARTH_RADIUS_METERS)
+                dlng = dlat / max(math.cos(math.radians(center_lat)), 1e-6)
+                lat, lng = self.lat[:n], self.lng[:n]
+                mask &= np.abs(lat - center_lat) <= dlat
+                mask &= np.abs(lng - center_lng) <= dlng
+                candidates = np.flatnonzero(mask)
+                distances = distance_meters(lat[candidates], lng[candidates], center_lat, center_lng)
+                keep = distances <= radius
+                matches, distances = candidates[keep], distances[keep]
+                order = np.argsort(distances, kind="stable")
+            else:
+                matches = np.flatnonzero(mask)
+                order = np.argsort(-self.created[matches], kind="stable")
+
+            selected = order[:limit]
+            rows = []
+            for index in selected:
+                row = self.row(int(matches[index]))
+                if distances is not None:
+                    row["distance_m"] = round(float(distances[index]), 1)
+                rows.append(row)
+            return len(matches), rows
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held for the open reports"""
+        with self._lock:
+            columns = sum(
+                getattr(self, name)[:self.size].nbytes
+                for name in ("lat", "lng", "created", "status", "severity", "damage_type", "authority")
+            )
+            objects = sys.getsizeof(self.ids) + sys.getsizeof(self.addresses) + sys.getsizeof(self._positions)
+            objects += sum(sys.getsizeof(report_id) for report_id in self.ids)
+            objects += sum(sys.getsizeof(address) for address in self.addresses if address is not None)
+            objects += sum(sys.getsizeof(position) for position in self._positions.values())
+            return columns + objects
+
+    def start(self):
+        """Load the index, then reload it periodically, in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._reload_loop())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _reload_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.load)
+            except Exception as e:
+                logger.warning("Open reports index load failed: %s", e)
+            if self.reload_interval <= 0 and self.loaded_at is not None:
+                return
+            await asyncio.sleep(self.reload_interval if self.reload_interval > 0 else 60)
+
+# Singleton instance
+open_reports_index = OpenReportsIndex()
+supabase_service.add_change_listener(open_reports_index.on_change)
@@ -0,0 +1,257 @@
+"""
+Per-client token-bucket rate limiting and a global in-flight cap
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from app.services.cache_service import TTLCache
+from app.services.metrics import ADMISSION_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Tokens added to each client's bucket per second and the bucket size;
+# limiting is off until RATE_LIMIT_RATE is set above 0, since clients behind
+# one NAT share an address
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "0"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "30"))
+# Requests handled at once by this worker before new ones get 503; 0 = no
+# cap. Long-lived streams (STREAMING_ROUTES) are not counted
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "64"))
+# Optional SQLite file so workers share buckets; memory-only when unset
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB")
+# Clients tracked in memory; an evicted bucket starts full again
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+# Take the client address from X-Forwarded-For (only behind a trusted proxy)
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0").lower() in ("1", "true", "yes")
+# Token cost per route as JSON, e.g. {"POST /api/analyze-image": 10}; merged
+# over ROUTE_COSTS
+RATE_LIMIT_COSTS = os.getenv("RATE_LIMIT_COSTS")
+
+API_KEY_HEADER = b"x-api-key"
+
+# Tokens charged per request; vision calls and submissions (image upload,
+# database write, webhook) cost the most. Other /api routes cost
+# DEFAULT_COST and everything outside /api is not limited.
+ROUTE_COSTS: Dict[str, float] = {
+    "POST /api/analyze-image": 10,
+    "POST /api/reports/submit": 5,
+    "POST /api/chat": 2,
+    "POST /api/chat/stream": 2,
+}
+DEFAULT_COST = 1.0
+# Responses that stay open for the length of a stream; they are rate
+# limited but left out of the in-flight cap
+STREAMING_ROUTES = frozenset({
+    "POST /api/chat/stream",
+    "GET /api/reports/export",
+})
+LIMITED_PREFIX = "/api/"
+PURGE_INTERVAL = 300.0
+
+class MemoryRateLimitBackend:
+    """Token buckets of this process, dropped once they would be full again"""
+
+    def __init__(self, maxsize: int = RATE_LIMIT_MAX_CLIENTS):
+        self.buckets = TTLCache(maxsize=maxsize, ttl=0)
+
+    def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        """
+        Charge `cost` tokens to `key`'s bucket
+
+        Returns 0 if the request is allowed, otherwise the seconds until
+        enough tokens are available.
+        """
+        now = time.monotonic()
+        tokens, updated = self.buckets.get(key) or (burst, now)
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens < cost:
+            return (cost - tokens) / rate
+        tokens -= cost
+        self.buckets.set(key, (tokens, now), ttl=(burst - tokens) / rate)
+        return 0.0
+
+class SQLiteRateLimitBackend:
+    """Token buckets in a local SQLite database shared by worker processes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_purge = time.time()
+        # Autocommit mode so take() can take an explicit write lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        now = time.time()
+        if now - self._last_purge > PURGE_INTERVAL:
+            self._last_purge = now
+            self.purge_full(rate, burst)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated = row if row is not None else (burst, now)
+                tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+                if tokens < cost:
+                    self._conn.execute("COMMIT")
+                    return (cost - tokens) / rate
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens - cost, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return 0.0
+
+    def purge_full(self, rate: float, burst: float) -> int:
+        """Delete buckets that have refilled completely and return how many were removed"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM rate_limit_buckets WHERE tokens + (? - updated_at) * ? >= ?",
+                (time.time(), rate, burst)
+            )
+        return cursor.rowcount
+
+class RateLimiter:
+    """
+    Decides whether a request is admitted
+
+    Each client (API key, else IP address) has a bucket of `burst` tokens
+    refilled at `rate` per second; a request costs its route's tokens. With
+    a shared backend the buckets are checked in a worker thread, since the
+    SQLite lock can block.
+    """
+
+    def __init__(self, rate: float = RATE_LIMIT_RATE, burst: float = RATE_LIMIT_BURST,
+                 backend=None, costs: Optional[Dict[str, float]] = None):
+        self.rate = rate
+        self.burst = burst
+        self.backend = backend or MemoryRateLimitBackend()
+        self.costs = dict(ROUTE_COSTS, **(costs or {}))
+        self._shared = not isinstance(self.backend, MemoryRateLimitBackend)
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def cost(self, method: str, path: str) -> float:
+        """Tokens charged for a request; 0 for routes that are not limited"""
+        cost = self.costs.get(f"{method} {path}")
+        if cost is not None:
+            return cost
+        return DEFAULT_COST if path.startswith(LIMITED_PREFIX) else 0.0
+
+    async def take(self, client: str, cost: float) -> float:
+        """Charge a client; returns 0 if admitted, else seconds to wait"""
+        # A request costing more than the whole bucket could never pass
+        cost = min(cost, self.burst)
+        if self._shared:
+            return await asyncio.to_thread(self.backend.take, client, cost, self.rate, self.burst)
+        return self.backend.take(client, cost, self.rate, self.burst)
+
+def _client_key(scope) -> str:
+    """Identify the caller by API key (hashed) or by address"""
+    forwarded = None
+    for key, value in scope["headers"]:
+        if key == API_KEY_HEADER:
+            return "key:" + hashlib.sha256(value).hexdigest()[:32]
+        if key == b"x-forwarded-for":
+            forwarded = value.decode("latin-1")
+    if RATE_LIMIT_TRUST_PROXY and forwarded:
+        return "ip:" + forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+async def _reject(send, status: int, retry_after: float, detail: str):
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware that rejects excess requests immediately
+
+    Requests beyond the in-flight cap get 503 and clients that used up
+    their bucket get 429, both with Retry-After, rather than queueing until
+    they time out. The in-flight cap is per worker process and skips
+    STREAMING_ROUTES; buckets are shared between workers when RATE_LIMIT_DB
+    is set.
+    """
+
+    def __init__(self, app, limiter: Optional["RateLimiter"] = None, max_in_flight: int = MAX_IN_FLIGHT):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cost = self.limiter.cost(scope["method"], scope["path"])
+        if cost <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        counted = f"{scope['method']} {scope['path']}" not in STREAMING_ROUTES
+        if counted and self.max_in_flight and self.in_flight >= self.max_in_flight:
+            ADMISSION_REJECTIONS.labels("overloaded").inc()
+            await _reject(send, 503, 1, "Server is busy, please retry shortly")
+            return
+
+        self.in_flight += counted
+        try:
+            if self.limiter.enabled:
+                try:
+                    retry_after = await self.limiter.take(_client_key(scope), cost)
+                except Exception as e:
+                    # Fail open: a broken shared backend must not take the API down
+                    logger.warning("Rate limit check failed: %s", e)
+                    retry_after = 0.0
+                if retry_after > 0:
+                    ADMISSION_REJECTIONS.labels("rate_limited").inc()
+                    await _reject(send, 429, retry_after, "Too many requests")
+                    return
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= counted
+
+def _load_costs() -> Dict[str, float]:
+    if not RATE_LIMIT_COSTS:
+        return {}
+    try:
+        return {route: float(cost) for route, cost in json.loads(RATE_LIMIT_COSTS).items()}
+    except (ValueError, AttributeError) as e:
+        logger.warning("Ignoring invalid RATE_LIMIT_COSTS: %s", e)
+        return {}
+
+# Singleton instance
+rate_limiter = RateLimiter(
+    backend=SQLiteRateLimitBackend(RATE_LIMIT_DB_PATH) if RATE_LIMIT_DB_PATH else None,
+    costs=_load_costs()
+)
@@ -0,0 +1,265 @@
+"""
+Local write-ahead store for new reports, replicated to Supabase in the background
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services.metrics import REPORT_OUTBOX_PENDING
+from app.services.write_buffer import InsertBatcher
+
+logger = logging.getLogger(__name__)
+
+# Outbox file and sync policy
+REPORT_OUTBOX_DB = os.getenv("REPORT_OUTBOX_DB", "report_outbox.db")
+REPORT_SYNC_BATCH = int(os.getenv("REPORT_SYNC_BATCH", "100"))
+REPORT_SYNC_INTERVAL = float(os.getenv("REPORT_SYNC_INTERVAL", "1"))
+REPORT_SYNC_MAX_BACKOFF = float(os.getenv("REPORT_SYNC_MAX_BACKOFF", "60"))
+# A row rejected this many times on its own is parked as failed
+REPORT_SYNC_MAX_ATTEMPTS = int(os.getenv("REPORT_SYNC_MAX_ATTEMPTS", "10"))
+# Synced rows are kept locally for this long
+REPORT_OUTBOX_RETENTION = float(os.getenv("REPORT_OUTBOX_RETENTION", "86400"))
+# Group commit: local writes arriving this close together share one fsync
+REPORT_OUTBOX_COMMIT_DELAY_MS = float(os.getenv("REPORT_OUTBOX_COMMIT_DELAY_MS", "2"))
+PURGE_INTERVAL = 300.0
+
+PENDING = "pending"
+SYNCED = "synced"
+FAILED = "failed"
+
+def _is_rejection(error: Exception) -> bool:
+    """
+    True when Supabase refused the row itself rather than being unavailable
+
+    PostgREST reports the SQLSTATE as the error code; classes 22 (data
+    exception) and 23 (integrity constraint violation) are about the row.
+    """
+    code = str(getattr(error, "code", None) or "")
+    return code[:2] in ("22", "23")
+
+class SQLiteReportOutbox:
+    """Report rows awaiting replication, in a local SQLite database"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Every commit reaches the disk before the submitter gets its id
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS report_outbox ("
+            "id TEXT PRIMARY KEY, row TEXT NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS report_outbox_pending ON report_outbox (status, created_at)"
+        )
+        self._conn.commit()
+
+    def append(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Commit rows (which carry their own id) in one transaction and return them"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO report_outbox (id, row, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(row["id"], json.dumps(row, default=str), PENDING, now, now) for row in rows]
+            )
+        return rows
+
+    def pending(self, limit: int) -> List[Dict[str, Any]]:
+        """Oldest rows not yet replicated"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT row FROM report_outbox WHERE status = ? ORDER BY created_at LIMIT ?", (PENDING, limit)
+            )
+            return [json.loads(row) for (row,) in cursor.fetchall()]
+
+    def get(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """A row that has not reached Supabase yet, if any"""
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT row FROM report_outbox WHERE id = ? AND status != ?", (report_id, SYNCED)
+            ).fetchone()
+        return json.loads(found[0]) if found else None
+
+    def mark_synced(self, ids: List[str]):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE report_outbox SET status = ?, error = NULL, updated_at = ? WHERE id = ?",
+                [(SYNCED, now, report_id) for report_id in ids]
+            )
+
+    def mark_rejected(self, report_id: str, error: str, max_attempts: int) -> bool:
+        """Record a failed attempt for one row; returns True if the row is now parked as failed"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE report_outbox SET attempts = attempts + 1, error = ?, updated_at = ?, "
+                "status = CASE WHEN attempts + 1 >= ? THEN ? ELSE status END WHERE id = ?",
+                (error, time.time(), max_attempts, FAILED, report_id)
+            )
+            status = self._conn.execute(
+                "SELECT status FROM report_outbox WHERE id = ?", (report_id,)
+            ).fetchone()
+        return bool(status) and status[0] == FAILED
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM report_outbox GROUP BY status").fetchall()
+        return {PENDING: 0, SYNCED: 0, FAILED: 0, **dict(rows)}
+
+    def purge_synced(self, retention: float = REPORT_OUTBOX_RETENTION) -> int:
+        """Delete replicated rows older than `retention` seconds"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM report_outbox WHERE status = ? AND updated_at < ?", (SYNCED, time.time() - retention)
+            )
+        return cursor.rowcount
+
+class ReportOutbox:
+    """
+    Commits new reports locally and replicates them to Supabase
+
+    A submission is durable once its row is committed to the local SQLite
+    file; concurrent submissions are grouped into one transaction (one
+    fsync) by an InsertBatcher. A background task upserts pending rows in
+    batches keyed by id, so a batch that landed but was not acknowledged is
+    not duplicated when it is sent again. While Supabase is unreachable the
+    syncer backs off exponentially. If Supabase rejects a batch because of
+    bad data, the batch is retried row by row; rows that are rejected
+    `max_attempts` times are parked as failed.
+    """
+
+    def __init__(self, upsert_rows: Callable[[List[Dict[str, Any]]], Any],
+                 db_path: str = REPORT_OUTBOX_DB, batch_size: int = REPORT_SYNC_BATCH,
+                 interval: float = REPORT_SYNC_INTERVAL, max_backoff: float = REPORT_SYNC_MAX_BACKOFF,
+                 max_attempts: int = REPORT_SYNC_MAX_ATTEMPTS):
+        self._upsert_rows = upsert_rows
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self._store: Optional[SQLiteReportOutbox] = None
+        self._store_lock = threading.Lock()
+        self._writer = InsertBatcher(self._append, max_delay_ms=REPORT_OUTBOX_COMMIT_DELAY_MS)
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self.synced = 0
+
+    @property
+    def store(self) -> SQLiteReportOutbox:
+        """Open the outbox database on first use"""
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = SQLiteReportOutbox(self.db_path)
+        return self._store
+
+    def _append(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self.store.append(rows)
+
+    async def append(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Durably record a new report row and schedule its replication"""
+        stored = await self._writer.submit(row)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return stored
+
+    def get(self, report_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(report_id)
+
+    def start(self):
+        """Start the sync task on the running event loop"""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._sync_loop()), asyncio.create_task(self._purge_loop())]
+
+    async def stop(self):
+        """Stop syncing; pending rows are sent after the next start"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Let rows accepted just before shutdown reach the local commit
+        await self._writer.close()
+
+    async def _sync_loop(self):
+        failures = 0
+        while True:
+            try:
+                sent = await self.sync_once()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = min(self.max_backoff, self.interval * 2 ** failures)
+                logger.warning("Report sync failed (attempt %d), retrying in %.1fs: %s", failures, delay, e)
+                await asyncio.sleep(delay)
+                continue
+
+            if sent >= self.batch_size:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _purge_loop(self):
+        while True:
+            await asyncio.sleep(PURGE_INTERVAL)
+            try:
+                await asyncio.to_thread(self.store.purge_synced)
+            except Exception as e:
+                logger.exception("Could not purge report outbox: %s", e)
+
+    async def sync_once(self) -> int:
+        """
+        Replicate one batch of pending rows and return how many were taken
+
+        Raises if Supabase could not take the rows, so the caller backs off.
+        """
+        rows = await asyncio.to_thread(self.store.pending, self.batch_size)
+        if rows:
+            try:
+                await self._send(rows)
+            except Exception as e:
+                if len(rows) == 1 and not _is_rejection(e):
+                    raise
+                # Find the rows Supabase refuses so the rest still land
+                for row in rows:
+                    try:
+                        await self._send([row])
+                    except Exception as e:
+                        if not _is_rejection(e):
+                            raise
+                        await self._reject(row, e)
+        REPORT_OUTBOX_PENDING.set((await asyncio.to_thread(self.store.counts))[PENDING])
+        return len(rows)
+
+    async def _send(self, rows: List[Dict[str, Any]]):
+        await asyncio.to_thread(self._upsert_rows, rows)
+        await asyncio.to_thread(self.store.mark_synced, [row["id"] for row in rows])
+        self.synced += len(rows)
+
+    async def _reject(self, row: Dict[str, Any], error: Exception):
+        parked = await asyncio.to_thread(
+            self.store.mark_rejected, row["id"], f"{type(error).__name__}: {error}", self.max_attempts
+        )
+        if parked:
+            logger.error("Report %s could not be synced after %d attempts: %s", row["id"], self.max_attempts, error)
+        else:
+            logger.warning("Report %s was rejected by Supabase: %s", row["id"], error)
+
+    def stats(self) -> Dict[str, Any]:
+        """Row counts by status plus group-commit counters"""
+        return {**self.store.counts(), "synced_since_start": self.synced, "local_commits": self._writer.stats()}
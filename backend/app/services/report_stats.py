@@ -0,0 +1,213 @@
+"""
+Report counts kept up to date in memory as reports are created and change status
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.schemas.report import Location, ReportStatus
+from app.services.authority_service import authority_service
+from app.services.supabase_service import supabase_service
+
+logger = logging.getLogger(__name__)
+
+# Seconds between full recounts against the database; with 0 the reports
+# are only counted once, at startup
+REPORT_STATS_RECONCILE_INTERVAL = float(os.getenv("REPORT_STATS_RECONCILE_INTERVAL", "900"))
+
+# Time buckets kept per granularity
+BUCKET_RETENTION = {"hour": 24 * 14, "day": 400, "week": 260}
+GRANULARITIES = tuple(BUCKET_RETENTION)
+
+# Columns a recount needs
+STATS_COLUMNS = "id,status,damage_type,severity,location_lat,location_lng,location_address,created_at"
+
+def _bucket_keys(created_at: Any) -> Optional[Dict[str, str]]:
+    """Start of the hour, day and ISO week (UTC) a report was created in"""
+    if not created_at:
+        return None
+    try:
+        moment = datetime.fromisoformat(str(created_at).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    moment = moment.astimezone(timezone.utc)
+    day = moment.date()
+    return {
+        "hour": moment.strftime("%Y-%m-%dT%H:00:00Z"),
+        "day": day.isoformat(),
+        "week": (day - timedelta(days=day.weekday())).isoformat(),
+    }
+
+def _authority(row: Dict[str, Any]) -> str:
+    try:
+        location = Location(
+            lat=row.get("location_lat") or 0.0,
+            lng=row.get("location_lng") or 0.0,
+            address=row.get("location_address")
+        )
+    except ValueError:
+        return "unknown"
+    return authority_service.identify_authority(location)["name"]
+
+class _Counts:
+    """One consistent set of counters"""
+
+    def __init__(self):
+        self.total = 0
+        self.dimensions: Dict[str, Counter] = {
+            "status": Counter(), "damage_type": Counter(), "severity": Counter(), "authority": Counter()
+        }
+        self.buckets: Dict[str, Dict[str, Dict[str, Any]]] = {name: {} for name in GRANULARITIES}
+
+    def add(self, row: Dict[str, Any]):
+        self.total += 1
+        damage_type = row.get("damage_type") or "unknown"
+        severity = row.get("severity") or "unknown"
+        self.dimensions["status"][row.get("status") or ReportStatus.PENDING.value] += 1
+        self.dimensions["damage_type"][damage_type] += 1
+        self.dimensions["severity"][severity] += 1
+        self.dimensions["authority"][_authority(row)] += 1
+
+        keys = _bucket_keys(row.get("created_at"))
+        if keys is None:
+            return
+        for granularity, key in keys.items():
+            buckets = self.buckets[granularity]
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = {"total": 0, "damage_type": Counter(), "severity": Counter()}
+                if len(buckets) > BUCKET_RETENTION[granularity]:
+                    del buckets[min(buckets)]
+            bucket["total"] += 1
+            bucket["damage_type"][damage_type] += 1
+            bucket["severity"][severity] += 1
+
+    def move_status(self, previous: str, current: str):
+        statuses = self.dimensions["status"]
+        statuses[previous] -= 1
+        if statuses[previous] <= 0:
+            del statuses[previous]
+        statuses[current] += 1
+
+class ReportStats:
+    """
+    Live report counts by status, damage type, severity, authority and time
+
+    Counters are updated from SupabaseService change events, so a read is a
+    dictionary copy whatever the table size; the rendered snapshot is
+    cached until the next change. A full recount (at startup, every
+    REPORT_STATS_RECONCILE_INTERVAL seconds and on demand) corrects drift
+    from writes made by other workers or outside the API. Changes that land
+    while a recount scans the table can be off until the next recount.
+    """
+
+    def __init__(self, reconcile_interval: float = REPORT_STATS_RECONCILE_INTERVAL):
+        self.reconcile_interval = reconcile_interval
+        self._counts = _Counts()
+        self._lock = threading.Lock()
+        self._rebuild_lock = asyncio.Lock()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self.reconciled_at: Optional[float] = None
+        self.last_drift: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def on_change(self, event: str, rows: List[Dict[str, Any]]):
+        """SupabaseService change listener"""
+        with self._lock:
+            if event == "created":
+                for row in rows:
+                    self._counts.add(row)
+            elif event == "status_changed":
+                for row in rows:
+                    previous = row.get("previous_status")
+                    if previous and row.get("status") and previous != row["status"]:
+                        self._counts.move_status(previous, row["status"])
+            self._snapshot = None
+
+    def snapshot(self, granularity: str = "day", limit: int = 30) -> Dict[str, Any]:
+        """Current counts with the newest `limit` buckets of one granularity"""
+        with self._lock:
+            if self._snapshot is None:
+                counts = self._counts
+                self._snapshot = {
+                    "total": counts.total,
+                    **{name: dict(counter) for name, counter in counts.dimensions.items()},
+                    "buckets": {
+                        name: [
+                            {"start": key, "total": bucket["total"],
+                             "damage_type": dict(bucket["damage_type"]), "severity": dict(bucket["severity"])}
+                            for key, bucket in sorted(buckets.items(), reverse=True)
+                        ]
+                        for name, buckets in counts.buckets.items()
+                    },
+                }
+            snapshot = self._snapshot
+        return {
+            **{key: value for key, value in snapshot.items() if key != "buckets"},
+            "granularity": granularity,
+            "buckets": snapshot["buckets"][granularity][:limit],
+            "reconciled_at": datetime.fromtimestamp(self.reconciled_at, timezone.utc).isoformat()
+            if self.reconciled_at else None,
+            "last_drift": self.last_drift,
+        }
+
+    def _count_rows(self, pages: Iterable[List[Dict[str, Any]]]) -> _Counts:
+        counts = _Counts()
+        for rows in pages:
+            for row in rows:
+                counts.add(row)
+        return counts
+
+    async def rebuild(self) -> Dict[str, Any]:
+        """
+        Recount every report from the database and replace the counters
+
+        Returns how long it took and how far the live total had drifted.
+        """
+        async with self._rebuild_lock:
+            start = time.perf_counter()
+            counts = await asyncio.to_thread(
+                self._count_rows, supabase_service.iter_report_pages(columns=STATS_COLUMNS)
+            )
+            first = self.reconciled_at is None
+            with self._lock:
+                drift = 0 if first else self._counts.total - counts.total
+                self._counts = counts
+                self._snapshot = None
+            self.reconciled_at = time.time()
+            self.last_drift = drift
+            if drift:
+                logger.warning("Report stats drifted by %d reports; counters rebuilt", drift)
+            return {"total": counts.total, "drift": drift, "seconds": round(time.perf_counter() - start, 3)}
+
+    def start(self):
+        """Count the reports once and then reconcile periodically, in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _reconcile_loop(self):
+        while True:
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.warning("Report stats reconciliation failed: %s", e)
+            if self.reconcile_interval <= 0:
+                return
+            await asyncio.sleep(self.reconcile_interval)
+
+# Singleton instance
+report_stats = ReportStats()
+supabase_service.add_change_listener(report_stats.on_change)
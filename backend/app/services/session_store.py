@@ -0,0 +1,192 @@
+"""
+Server-side storage for chat conversation state
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from app.services.cache_service import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Session lifetime and in-memory capacity
+SESSION_TTL = float(os.getenv("CHAT_SESSION_TTL", "3600"))
+SESSION_MAX = int(os.getenv("CHAT_SESSION_MAX", "10000"))
+# Optional SQLite file shared by workers; memory-only when unset
+SESSION_DB_PATH = os.getenv("CHAT_SESSION_DB")
+# Seconds between deletions of expired sessions from the SQLite file
+SESSION_PURGE_INTERVAL = float(os.getenv("CHAT_SESSION_PURGE_INTERVAL", "300"))
+
+def serialize_state(state: Dict[str, Any]) -> str:
+    """Encode workflow state as JSON, converting LangChain messages to dicts"""
+    from langchain_core.messages import messages_to_dict
+
+    return json.dumps(
+        {**state, "messages": messages_to_dict(state.get("messages", []))},
+        default=str
+    )
+
+def deserialize_state(payload: str) -> Dict[str, Any]:
+    """Decode workflow state produced by serialize_state"""
+    from langchain_core.messages import messages_from_dict
+
+    state = json.loads(payload)
+    state["messages"] = messages_from_dict(state.get("messages", []))
+    return state
+
+class SQLiteSessionBackend:
+    """Persistent session backend in a local SQLite database"""
+
+    def __init__(self, path: str, ttl: float = SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        # WAL lets several worker processes read while one writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_sessions ("
+            "session_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Load a session, ignoring it if it has expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, updated_at FROM chat_sessions WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+        if row is None or row[1] + self.ttl <= time.time():
+            return None
+        return deserialize_state(row[0])
+
+    def load_if_changed(self, session_id: str,
+                        version: Optional[float]) -> Tuple[Optional[float], Optional[Dict[str, Any]]]:
+        """
+        Load a session unless it is still at `version`
+
+        Returns (version, state): state is None when the stored session is
+        unchanged, and both are None when it is unknown or expired. An
+        unchanged session costs one indexed lookup and no decoding.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at, CASE WHEN updated_at = ? THEN NULL ELSE state END "
+                "FROM chat_sessions WHERE session_id = ?",
+                (version, session_id)
+            ).fetchone()
+        if row is None or row[0] + self.ttl <= time.time():
+            return None, None
+        return row[0], deserialize_state(row[1]) if row[1] is not None else None
+
+    def save(self, session_id: str, state: Dict[str, Any]) -> float:
+        """Insert or replace a session; returns its new version"""
+        payload = serialize_state(state)
+        with self._lock:
+            # Versions are save times; never reuse the one being replaced
+            row = self._conn.execute(
+                "SELECT updated_at FROM chat_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            version = time.time()
+            if row is not None and version <= row[0]:
+                version = row[0] + 1e-6
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_sessions (session_id, state, updated_at) VALUES (?, ?, ?)",
+                (session_id, payload, version)
+            )
+            self._conn.commit()
+        return version
+
+    def delete(self, session_id: str):
+        """Remove a session"""
+        with self._lock:
+            self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired sessions and return how many were removed"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM chat_sessions WHERE updated_at < ?", (time.time() - self.ttl,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+class SessionStore:
+    """
+    Two-tier chat session store
+
+    Active sessions live in a bounded LRU/TTL cache. When a persistent backend
+    is configured every save is written through to it, and every read checks
+    the stored version first, so a session resumed on another worker is never
+    served (and then overwritten) from a stale in-memory copy. The cached
+    copy only saves decoding the state when nothing has changed.
+    """
+
+    def __init__(self, backend: Optional[SQLiteSessionBackend] = None,
+                 maxsize: int = SESSION_MAX, ttl: float = SESSION_TTL,
+                 purge_interval: float = SESSION_PURGE_INTERVAL):
+        # Entries are (version, state); the version is None without a backend
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.backend = backend
+        self.purge_interval = purge_interval
+        self._tasks: List[asyncio.Task] = []
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the state of a session, or None if unknown or expired"""
+        cached = self.memory.get(session_id)
+        if self.backend is None:
+            return cached[1] if cached is not None else None
+
+        version, state = await asyncio.to_thread(
+            self.backend.load_if_changed, session_id, cached[0] if cached is not None else None
+        )
+        if version is None:
+            self.memory.invalidate(session_id)
+            return None
+        if state is None:
+            return cached[1]
+        self.memory.set(session_id, (version, state))
+        return state
+
+    async def save(self, session_id: str, state: Dict[str, Any]):
+        """Store the state of a session"""
+        version = None
+        if self.backend is not None:
+            version = await asyncio.to_thread(self.backend.save, session_id, state)
+        self.memory.set(session_id, (version, state))
+
+    async def delete(self, session_id: str):
+        """Forget a session"""
+        self.memory.invalidate(session_id)
+        if self.backend is not None:
+            await asyncio.to_thread(self.backend.delete, session_id)
+
+    def start(self):
+        """Delete expired sessions from the backend periodically"""
+        if self.backend is not None and not self._tasks:
+            self._tasks.append(asyncio.create_task(self._purge_loop()))
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _purge_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.backend.purge_expired)
+            except Exception as e:
+                logger.exception("Could not purge chat sessions: %s", e)
+            await asyncio.sleep(self.purge_interval)
+
+# Singleton instance
+session_store = SessionStore(
+    backend=SQLiteSessionBackend(SESSION_DB_PATH) if SESSION_DB_PATH else None
+)
@@ -1,12 +1,18 @@
 """
 Service for handling image storage using Supabase Storage
 """
+import logging
 import os
 import uuid
 from pathlib import Path
 from typing import Optional
 from fastapi import UploadFile
 from supabase import create_client, Client
+from app.services.metrics import (
+    track_dependency, record_dependency_error, observe_payload, SUPABASE_STORAGE
+)
+
+logger = logging.getLogger(__name__)
 
 class StorageService:
     """Service for storing uploaded images in Supabase Storage"""
@@ -39,16 +45,18 @@ class StorageService:
             bucket_names = [bucket['name'] for bucket in buckets]
 
             if self.bucket_name not in bucket_names:
-                print(f"Bucket '{self.bucket_name}' does not exist. Please create it manually in Supabase Dashboard:")
-                print("1. Go to Storage in your Supabase project")
-                print("2. Create bucket: 'road-damage-images'")
-                print("3. Set it to Public")
-                print("4. Configure CORS and file size limits as needed")
+                logger.warning(
+                    "Bucket '%s' does not exist. Create it in the Supabase Dashboard under Storage, "
+                    "set it to Public and configure CORS and file size limits as needed",
+                    self.bucket_name
+                )
             else:
-                print(f"Bucket '{self.bucket_name}' exists")
+                logger.info("Bucket '%s' exists", self.bucket_name)
         except Exception as e:
-            print(f"Warning: Could not verify bucket existence: {e}")
-            print("Please ensure the bucket 'road-damage-images' exists and is public in your Supabase project")
+            logger.warning(
+                "Could not verify bucket existence: %s. Please ensure the bucket '%s' exists "
+                "and is public in your Supabase project", e, self.bucket_name
+            )
 
     async def save_image(self, file: UploadFile) -> Optional[str]:
         """
@@ -57,6 +65,24 @@ class StorageService:
         Args:
             file: Uploaded file object
 
+        Returns:
+            Public URL to the saved image or None if failed
+        """
+        content = await file.read()
+        return self.upload_image_bytes(content, file.filename, file.content_type)
+
+    def upload_image_bytes(self, content: bytes, filename: Optional[str],
+                           content_type: Optional[str] = None) -> Optional[str]:
+        """
+        Upload raw image bytes to Supabase Storage and return public URL
+
+        Used for submissions whose image was read and queued earlier.
+
+        Args:
+            content: Image file content
+            filename: Original file name, used for the extension
+            content_type: Image MIME type
+
         Returns:
             Public URL to the saved image or None if failed
         """
@@ -64,11 +90,8 @@ class StorageService:
             # Initialize client if needed
             self._initialize_client()
 
-            # Read file content
-            content = await file.read()
-
             # Generate unique filename
-            file_ext = Path(file.filename).suffix.lower()
+            file_ext = Path(filename or "").suffix.lower()
             if not file_ext:
                 file_ext = '.jpg'  # Default extension
 
@@ -76,33 +99,38 @@ class StorageService:
             file_path = f"uploads/{filename}"
 
             # Upload to Supabase Storage
-            response = self.supabase.storage.from_(self.bucket_name).upload(
-                file_path,
-                content,
-                file_options={
-                    "content-type": file.content_type or "image/jpeg",
-                    "cache-control": "3600"
-                }
-            )
+            observe_payload(SUPABASE_STORAGE, "upload", len(content))
+            with track_dependency(SUPABASE_STORAGE, "upload"):
+                response = self.supabase.storage.from_(self.bucket_name).upload(
+                    file_path,
+                    content,
+                    file_options={
+                        "content-type": content_type or "image/jpeg",
+                        "cache-control": "3600"
+                    }
+                )
+            if response.status_code != 200:
+                record_dependency_error(SUPABASE_STORAGE, "upload", f"http_{response.status_code}")
 
             if response.status_code == 200:
                 # Get public URL
                 public_url = self.supabase.storage.from_(self.bucket_name).get_public_url(file_path)
                 return public_url
             elif response.status_code == 400 and "bucket" in str(response.json()).lower():
-                print(f"Bucket '{self.bucket_name}' not found. Please create it in Supabase Dashboard -> Storage")
+                logger.error("Bucket '%s' not found. Please create it in Supabase Dashboard -> Storage", self.bucket_name)
                 return None
             else:
-                print(f"Supabase upload failed: {response.status_code}")
                 try:
                     error_details = response.json()
-                    print(f"Error details: {error_details}")
                 except:
-                    print(f"Response: {response.text}")
+                    error_details = response.text
+                logger.error(
+                    "Supabase upload failed", extra={"status_code": response.status_code, "details": error_details}
+                )
                 return None
 
         except Exception as e:
-            print(f"Error saving image to Supabase: {e}")
+            logger.exception("Error saving image to Supabase: %s", e)
             return None
 
     async def delete_image(self, image_url: str) -> bool:
@@ -127,11 +155,12 @@ class StorageService:
                 # Remove bucket name from path
                 file_path = path_part.replace(f"{self.bucket_name}/", "", 1)
 
-                response = self.supabase.storage.from_(self.bucket_name).remove([file_path])
+                with track_dependency(SUPABASE_STORAGE, "remove"):
+                    response = self.supabase.storage.from_(self.bucket_name).remove([file_path])
                 return response.status_code == 200
             return False
         except Exception as e:
-            print(f"Error deleting image: {e}")
+            logger.exception("Error deleting image: %s", e)
             return False
 
 # Singleton instance
@@ -0,0 +1,305 @@
+"""
+Durable local queue for asynchronous report submissions
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.schemas.report import JobStatus, Location, ReportCreate
+from app.services.authority_service import authority_service
+from app.services.logging_service import request_id_var
+from app.services.storage_service import storage_service
+from app.services.supabase_service import supabase_service
+from app.services.webhook_service import webhook_service
+
+logger = logging.getLogger(__name__)
+
+# Queue file, worker count and retry policy
+SUBMIT_QUEUE_DB = os.getenv("SUBMIT_QUEUE_DB", "submit_queue.db")
+SUBMIT_WORKERS = int(os.getenv("SUBMIT_WORKERS", "4"))
+SUBMIT_MAX_ATTEMPTS = int(os.getenv("SUBMIT_MAX_ATTEMPTS", "5"))
+SUBMIT_RETRY_DELAY = float(os.getenv("SUBMIT_RETRY_DELAY", "2"))
+# A processing job not touched for this long is assumed orphaned and re-run
+SUBMIT_JOB_LEASE = float(os.getenv("SUBMIT_JOB_LEASE", "300"))
+# Finished jobs stay queryable for this long
+SUBMIT_JOB_RETENTION = float(os.getenv("SUBMIT_JOB_RETENTION", "86400"))
+POLL_INTERVAL = 1.0
+PURGE_INTERVAL = 300.0
+
+# Processing stages, in order; a job records the last one it completed
+STAGES = ("upload", "insert", "authority", "notify")
+
+class SQLiteJobStore:
+    """Submission jobs in a local SQLite database, shared by worker processes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Autocommit mode so claim() can take an explicit write lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS submission_jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, stage TEXT, "
+            "payload TEXT NOT NULL, result TEXT NOT NULL DEFAULT '{}', "
+            "image BLOB, image_filename TEXT, image_content_type TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, error TEXT, "
+            "available_at REAL NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS submission_jobs_pending "
+            "ON submission_jobs (status, available_at)"
+        )
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"])
+        return job
+
+    def enqueue(self, payload: Dict[str, Any], image: Optional[bytes] = None,
+                image_filename: Optional[str] = None, image_content_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Persist a new job and return it
+
+        The report id is fixed here, so a retried insert writes the same row.
+        """
+        job_id = uuid.uuid4().hex
+        payload = dict(payload, report_id=str(uuid.uuid4()))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO submission_jobs (id, status, payload, image, image_filename, "
+                "image_content_type, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, JobStatus.QUEUED.value, json.dumps(payload), image,
+                 image_filename, image_content_type, now, now, now)
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM submission_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row is not None else None
+
+    def claim(self, lease: float = SUBMIT_JOB_LEASE) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest runnable job and mark it processing
+
+        Runnable means queued and due, or processing with an expired lease
+        (its worker died). The write lock makes the claim atomic across
+        processes.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM submission_jobs "
+                    "WHERE (status = ? AND available_at <= ?) OR (status = ? AND updated_at <= ?) "
+                    "ORDER BY available_at LIMIT 1",
+                    (JobStatus.QUEUED.value, now, JobStatus.PROCESSING.value, now - lease)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE submission_jobs SET status = ?, attempts = attempts + 1, updated_at = ? "
+                        "WHERE id = ?",
+                        (JobStatus.PROCESSING.value, now, row["id"])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = self._to_job(row)
+        job["attempts"] += 1
+        return job
+
+    def advance(self, job_id: str, stage: str, result: Dict[str, Any], drop_image: bool = False):
+        """Record a completed stage; also renews the job's lease"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE submission_jobs SET stage = ?, result = ?, updated_at = ?"
+                + (", image = NULL" if drop_image else "") + " WHERE id = ?",
+                (stage, json.dumps(result, default=str), time.time(), job_id)
+            )
+
+    def finish(self, job_id: str, status: JobStatus, error: Optional[str] = None, retry_at: Optional[float] = None):
+        """Complete or fail a job, or put it back in the queue until `retry_at`"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE submission_jobs SET status = ?, error = ?, available_at = ?, updated_at = ? WHERE id = ?",
+                (status.value, error, retry_at or now, now, job_id)
+            )
+
+    def purge_finished(self, retention: float = SUBMIT_JOB_RETENTION) -> int:
+        """Delete completed and failed jobs older than `retention` seconds"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM submission_jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (JobStatus.COMPLETED.value, JobStatus.FAILED.value, time.time() - retention)
+            )
+        return cursor.rowcount
+
+class SubmissionQueue:
+    """
+    Accepts validated submissions and processes them in background workers
+
+    The raw submission (fields plus image bytes) is written to SQLite before
+    the client gets its job id, so an accepted report survives a restart.
+    Workers run the upload, insert, authority and notification stages and
+    record each one as it completes; a failed job is retried from the first
+    unfinished stage with exponential backoff.
+    """
+
+    def __init__(self, db_path: str = SUBMIT_QUEUE_DB, workers: int = SUBMIT_WORKERS,
+                 max_attempts: int = SUBMIT_MAX_ATTEMPTS, retry_delay: float = SUBMIT_RETRY_DELAY):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._store: Optional[SQLiteJobStore] = None
+        self._store_lock = threading.Lock()
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def store(self) -> SQLiteJobStore:
+        """Open the job database on first use"""
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = SQLiteJobStore(self.db_path)
+        return self._store
+
+    async def enqueue(self, payload: Dict[str, Any], image: Optional[bytes] = None,
+                      image_filename: Optional[str] = None,
+                      image_content_type: Optional[str] = None) -> Dict[str, Any]:
+        """Durably queue a submission and wake a worker"""
+        job = await asyncio.to_thread(
+            self.store.enqueue, payload, image, image_filename, image_content_type
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self._tasks or self.workers <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._purge_loop()))
+
+    async def stop(self):
+        """Cancel the workers; jobs they were running are picked up again later"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim)
+            except Exception as e:
+                logger.exception("Could not claim submission job: %s", e)
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._process(job)
+            except Exception as e:
+                # The lease expires and another worker retries the job
+                logger.exception("Submission job %s could not be updated: %s", job["id"], e)
+
+    async def _purge_loop(self):
+        while True:
+            await asyncio.sleep(PURGE_INTERVAL)
+            try:
+                await asyncio.to_thread(self.store.purge_finished)
+            except Exception as e:
+                logger.exception("Could not purge submission jobs: %s", e)
+
+    async def _process(self, job: Dict[str, Any]):
+        """Run the stages a job has not completed yet"""
+        job_id, payload, result = job["id"], job["payload"], job["result"]
+        done = STAGES.index(job["stage"]) + 1 if job["stage"] else 0
+        # Log lines of this job carry its id; the "Submission queued" line
+        # links it to the request that created it
+        request_id_var.set(job_id)
+
+        fields = {key: value for key, value in payload.items() if key != "report_id"}
+        report_id = payload["report_id"]
+
+        try:
+            if done <= 0:
+                image_url = None
+                if job["image"] is not None:
+                    image_url = await asyncio.to_thread(
+                        storage_service.upload_image_bytes,
+                        job["image"], job["image_filename"], job["image_content_type"]
+                    )
+                    if not image_url:
+                        # Keep the bytes; the retry uploads them again
+                        raise RuntimeError("Image upload failed")
+                result["image_url"] = image_url
+                await asyncio.to_thread(self.store.advance, job_id, "upload", result, True)
+
+            if done <= 1:
+                report = ReportCreate(**fields, image_url=result.get("image_url"))
+                row = await asyncio.to_thread(supabase_service.insert_report_once, report, report_id)
+                result["report_id"] = str(row["id"])
+                result["report"] = row
+                await asyncio.to_thread(self.store.advance, job_id, "insert", result)
+
+            if done <= 2:
+                result["authority"] = authority_service.identify_authority(Location(**fields["location"]))
+                await asyncio.to_thread(self.store.advance, job_id, "authority", result)
+
+            if done <= 3:
+                try:
+                    sent = await webhook_service.send_notification(result["report"], result["authority"])
+                except Exception as e:
+                    logger.warning("Webhook notification error for report %s: %s", result["report_id"], e)
+                    sent = False
+                result["authority_notified"] = sent
+                await asyncio.to_thread(self.store.advance, job_id, "notify", result)
+
+            await asyncio.to_thread(self.store.finish, job_id, JobStatus.COMPLETED)
+            logger.info(
+                "Submission job completed",
+                extra={"sample": True, "report_id": result["report_id"], "attempts": job["attempts"]}
+            )
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)}"
+            if job["attempts"] >= self.max_attempts:
+                logger.error("Submission job %s failed after %d attempts: %s", job_id, job["attempts"], error)
+                await asyncio.to_thread(self.store.finish, job_id, JobStatus.FAILED, error)
+            else:
+                retry_at = time.time() + self.retry_delay * 2 ** (job["attempts"] - 1)
+                logger.warning("Submission job %s attempt %d failed, will retry: %s", job_id, job["attempts"], error)
+                await asyncio.to_thread(self.store.finish, job_id, JobStatus.QUEUED, error, retry_at)
+
+# Singleton instance
+submission_queue = SubmissionQueue()
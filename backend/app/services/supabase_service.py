@@ -1,16 +1,63 @@
 """
 Supabase service for database operations
 """
+import asyncio
+import logging
 import os
+import uuid
+from datetime import datetime, timezone
 from supabase import create_client, Client
-from typing import Optional, Dict, Any
-from app.schemas.report import ReportCreate, ReportStatus
+from typing import Optional, Dict, Any, Iterator, List, Callable
+from app.schemas.report import (
+    ReportCreate, ReportStatus, ReportFilter, StatusUpdateResult, ALLOWED_STATUS_TRANSITIONS
+)
+from app.services.cache_service import TTLCache
+from app.services.write_buffer import InsertBatcher
+from app.services.report_outbox import ReportOutbox
+from app.services.metrics import track_dependency, SUPABASE_DB
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip when scanning the reports table
+DEFAULT_PAGE_SIZE = int(os.getenv("REPORTS_PAGE_SIZE", "500"))
+
+# Read-through cache for single-report lookups
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "2048"))
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", "30"))
+
+# Optional write coalescing for single-report inserts under burst load
+WRITE_COALESCING = os.getenv("REPORT_WRITE_COALESCING", "").lower() in ("1", "true", "yes")
+WRITE_COALESCING_MAX_ROWS = int(os.getenv("REPORT_WRITE_COALESCING_MAX_ROWS", "50"))
+WRITE_COALESCING_MAX_DELAY_MS = float(os.getenv("REPORT_WRITE_COALESCING_MAX_DELAY_MS", "5"))
+
+# Optional local write-ahead store: submissions commit to SQLite and are
+# replicated to Supabase in the background
+WRITE_AHEAD = os.getenv("REPORT_WRITE_AHEAD", "").lower() in ("1", "true", "yes")
+
+class EmptyFilterError(Exception):
+    """A bulk operation was given a filter that selects every report"""
 
 class SupabaseService:
     """Service for interacting with Supabase database"""
     
     def __init__(self):
         self._client: Optional[Client] = None
+        self._change_listeners: List[Callable[[str, List[Dict[str, Any]]], None]] = []
+        
+        # Writes in this process refresh the cache; the TTL bounds staleness
+        # for writes made by other workers
+        self.report_cache = TTLCache(maxsize=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_TTL)
+        self.add_change_listener(self._refresh_report_cache)
+        
+        self.insert_batcher: Optional[InsertBatcher] = None
+        if WRITE_COALESCING:
+            self.insert_batcher = InsertBatcher(
+                self._insert_rows,
+                max_rows=WRITE_COALESCING_MAX_ROWS,
+                max_delay_ms=WRITE_COALESCING_MAX_DELAY_MS
+            )
+        
+        self.outbox: Optional[ReportOutbox] = ReportOutbox(self._upsert_rows) if WRITE_AHEAD else None
     
     @property
     def client(self) -> Client:
@@ -25,18 +72,45 @@ class SupabaseService:
             self._client = create_client(supabase_url, supabase_key)
         return self._client
     
-    async def create_report(self, report_data: ReportCreate, image_url: Optional[str] = None) -> Dict[str, Any]:
+    def _execute(self, query, operation: str):
+        """Run a query builder, timed and error-counted as a Supabase DB call"""
+        with track_dependency(SUPABASE_DB, operation):
+            return query.execute()
+    
+    def add_change_listener(self, listener: Callable[[str, List[Dict[str, Any]]], None]):
         """
-        Create a new report in the database
+        Register a callback for report writes
         
-        Args:
-            report_data: Report creation data
-            image_url: Optional URL to uploaded image
-            
-        Returns:
-            Dictionary containing the created report data
+        Listeners are called with ("created", rows) after inserts and with
+        ("status_changed", rows) after status updates, so caches and aggregates
+        stay in step with the write that changed them. Status-changed rows
+        carry the status they left in "previous_status".
         """
-        report_dict = {
+        self._change_listeners.append(listener)
+    
+    def _notify(self, event: str, rows: List[Dict[str, Any]]):
+        """Call change listeners; a failing listener never fails the write"""
+        if not rows:
+            return
+        for listener in self._change_listeners:
+            try:
+                listener(event, rows)
+            except Exception as e:
+                logger.exception("Report change listener failed on %s: %s", event, e)
+    
+    def _refresh_report_cache(self, event: str, rows: List[Dict[str, Any]]):
+        """Keep cached reports in step with writes"""
+        for row in rows:
+            report_id = str(row.get("id"))
+            if event == "created":
+                self.report_cache.set(report_id, row)
+            else:
+                # Drop the entry so the next read fetches the row as stored
+                self.report_cache.invalidate(report_id)
+    
+    def _build_report_row(self, report_data: ReportCreate, image_url: Optional[str] = None) -> Dict[str, Any]:
+        """Map a validated report onto a reports table row"""
+        return {
             "location_lat": report_data.location.lat,
             "location_lng": report_data.location.lng,
             "location_address": report_data.location.address,
@@ -46,31 +120,333 @@ class SupabaseService:
             "image_url": image_url,
             "status": ReportStatus.SUBMITTED.value,
         }
+    
+    async def create_report(self, report_data: ReportCreate, image_url: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Create a new report in the database
+        
+        Args:
+            report_data: Report creation data
+            image_url: Optional URL to uploaded image
+            
+        Returns:
+            Dictionary containing the created report data
+        """
+        report_dict = self._build_report_row(report_data, image_url)
         
-        result = self.client.table("reports").insert(report_dict).execute()
+        if self.outbox is not None:
+            # Committed locally with its final id and timestamps; the syncer
+            # writes the same row to Supabase
+            now = datetime.now(timezone.utc).isoformat()
+            report_dict.update(id=str(uuid.uuid4()), created_at=now, updated_at=now)
+            row = await self.outbox.append(report_dict)
+            self._notify("created", [row])
+            return row
+        
+        if self.insert_batcher is not None:
+            # Coalesced with concurrent submissions; the insert already
+            # returns the full stored row, so no follow-up select is needed
+            row = await self.insert_batcher.submit(report_dict)
+            self._notify("created", [row])
+            return row
+        
+        result = self._execute(self.client.table("reports").insert(report_dict), "insert")
 
         if result.data:
             # Get the created record with all fields including timestamps
             report_id = result.data[0]["id"]
-            full_result = self.client.table("reports").select("*").eq("id", report_id).execute()
+            full_result = self._execute(self.client.table("reports").select("*").eq("id", report_id), "select")
 
             if full_result.data:
+                self._notify("created", full_result.data[:1])
                 return full_result.data[0]
 
         raise Exception("Failed to create report in database")
     
+    async def create_reports(self, reports: List[ReportCreate]) -> List[Dict[str, Any]]:
+        """
+        Insert several reports in a single round trip
+        
+        Args:
+            reports: Validated reports; each keeps its own image_url
+            
+        Returns:
+            Created rows, in the same order as the input
+        """
+        # The Supabase client blocks; keep the round trip off the event loop
+        return await asyncio.to_thread(self.insert_reports, reports)
+    
+    def insert_reports(self, reports: List[ReportCreate]) -> List[Dict[str, Any]]:
+        """
+        Blocking form of create_reports, for callers running in a worker thread
+        
+        Args:
+            reports: Validated reports; each keeps its own image_url
+            
+        Returns:
+            Created rows, in the same order as the input
+        """
+        if not reports:
+            return []
+        
+        rows = [self._build_report_row(report, report.image_url) for report in reports]
+        created = self._insert_rows(rows)
+        
+        if len(created) != len(rows):
+            raise Exception("Failed to create reports in database")
+        self._notify("created", created)
+        return created
+    
+    def _insert_rows(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert rows with one round trip and return them as stored"""
+        result = self._execute(self.client.table("reports").insert(rows), "insert_many")
+        return result.data or []
+    
+    def _upsert_rows(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert rows that carry their own id, skipping ids that already exist
+        
+        Returns only the rows this call inserted.
+        """
+        result = self._execute(
+            self.client.table("reports").upsert(rows, on_conflict="id", ignore_duplicates=True), "upsert_many"
+        )
+        return result.data or []
+    
+    def insert_report_once(self, report: ReportCreate, report_id: str) -> Dict[str, Any]:
+        """
+        Insert a report under an id chosen in advance; safe to repeat
+        
+        A retry after a crash between the insert and recording it finds the
+        row already stored and returns it instead of inserting a duplicate.
+        Change listeners only hear about the first insert.
+        
+        Args:
+            report: Validated report, with its image_url
+            report_id: Id the report is stored under
+            
+        Returns:
+            The stored row
+        """
+        row = dict(self._build_report_row(report, report.image_url), id=report_id)
+        created = self._upsert_rows([row])
+        if created:
+            self._notify("created", created[:1])
+            return created[0]
+        
+        existing = self._execute(self.client.table("reports").select("*").eq("id", report_id), "select")
+        if not existing.data:
+            raise Exception("Failed to create report in database")
+        return existing.data[0]
+    
     async def get_report(self, report_id: str) -> Optional[Dict[str, Any]]:
-        """Retrieve a report by ID"""
-        result = self.client.table("reports").select("*").eq("id", report_id).execute()
+        """Retrieve a report by ID, served from the report cache when possible"""
+        # Cache entries are invalidated under the canonical id the database
+        # returns, so lookups use that form too; a malformed id matches nothing
+        try:
+            report_id = str(uuid.UUID(report_id))
+        except ValueError:
+            return None
+        cached = self.report_cache.get(report_id)
+        if cached is not None:
+            return cached
+        
+        result = self._execute(self.client.table("reports").select("*").eq("id", report_id), "select")
         
         if result.data:
+            self.report_cache.set(report_id, result.data[0])
             return result.data[0]
+        if self.outbox is not None:
+            # Submitted here but not replicated yet
+            return self.outbox.get(report_id)
         return None
     
     async def update_report_status(self, report_id: str, status: ReportStatus) -> bool:
         """Update the status of a report"""
-        result = self.client.table("reports").update({"status": status.value}).eq("id", report_id).execute()
+        current = self._execute(self.client.table("reports").select("status").eq("id", report_id), "select")
+        if not current.data:
+            return False
+        previous = current.data[0].get("status")
+        
+        result = self._execute(
+            self.client.table("reports").update({"status": status.value}).eq("id", report_id), "update_status"
+        )
+        self._notify("status_changed", [dict(row, previous_status=previous) for row in result.data])
         return len(result.data) > 0
+    
+    async def update_reports_status(
+        self,
+        status: ReportStatus,
+        report_ids: Optional[List[str]] = None,
+        filters: Optional[ReportFilter] = None,
+        all_reports: bool = False,
+        batch_size: int = DEFAULT_PAGE_SIZE
+    ) -> List[StatusUpdateResult]:
+        """
+        Move many reports to a new status
+        
+        Reports are selected by id or by filter and processed in batches. Within
+        a batch the current statuses are read in one query, transitions are
+        checked against ALLOWED_STATUS_TRANSITIONS, and one set-based update is
+        issued per source status. Each update is guarded on the source status,
+        so a report changed concurrently is reported rather than overwritten.
+        
+        Ids are canonicalized first, so results carry the canonical form;
+        an id that is not a UUID fails on its own. An empty filter would select
+        every report and is refused unless `all_reports` is set.
+        
+        Args:
+            status: Target status
+            report_ids: Reports to update
+            filters: Alternatively, update every report matching these filters
+            all_reports: Confirms that an empty filter is meant to update every report
+            batch_size: Reports handled per round trip
+            
+        Returns:
+            One result per selected report
+        """
+        # Every batch is a blocking round trip; a broad filter can cover the
+        # whole table, so the run stays off the event loop
+        return await asyncio.to_thread(self.transition_reports, status, report_ids, filters, all_reports, batch_size)
+    
+    def transition_reports(
+        self,
+        status: ReportStatus,
+        report_ids: Optional[List[str]] = None,
+        filters: Optional[ReportFilter] = None,
+        all_reports: bool = False,
+        batch_size: int = DEFAULT_PAGE_SIZE
+    ) -> List[StatusUpdateResult]:
+        """Blocking implementation of update_reports_status"""
+        results: List[StatusUpdateResult] = []
+        
+        if report_ids is not None:
+            canonical_ids = []
+            for report_id in report_ids:
+                try:
+                    canonical_ids.append(str(uuid.UUID(str(report_id))))
+                except ValueError:
+                    results.append(StatusUpdateResult(
+                        report_id=str(report_id), success=False, error="Invalid report id"
+                    ))
+            unique_ids = list(dict.fromkeys(canonical_ids))
+            for start in range(0, len(unique_ids), batch_size):
+                batch = unique_ids[start:start + batch_size]
+                found = self._execute(self.client.table("reports").select("id,status").in_("id", batch), "select_many")
+                rows_by_id = {str(uuid.UUID(str(row["id"]))): row for row in (found.data or [])}
+                
+                for report_id in batch:
+                    if report_id not in rows_by_id:
+                        results.append(StatusUpdateResult(
+                            report_id=report_id, success=False, error="Report not found"
+                        ))
+                results.extend(self._transition_rows(list(rows_by_id.values()), status))
+        else:
+            if not all_reports and (filters is None or not filters.model_dump(exclude_none=True)):
+                raise EmptyFilterError("An empty filter selects every report; set all_reports to confirm")
+            for rows in self.iter_report_pages(filters, page_size=batch_size, columns="id,status"):
+                results.extend(self._transition_rows(rows, status))
+        
+        return results
+    
+    def _transition_rows(self, rows: List[Dict[str, Any]], status: ReportStatus) -> List[StatusUpdateResult]:
+        """Apply a status transition to rows holding their current id and status"""
+        results: List[StatusUpdateResult] = []
+        ids_by_source: Dict[ReportStatus, List[str]] = {}
+        
+        for row in rows:
+            report_id = str(row["id"])
+            current = ReportStatus(row["status"]) if row.get("status") else ReportStatus.PENDING
+            
+            if current == status:
+                results.append(StatusUpdateResult(report_id=report_id, success=True, previous_status=current))
+            elif status not in ALLOWED_STATUS_TRANSITIONS[current]:
+                results.append(StatusUpdateResult(
+                    report_id=report_id,
+                    success=False,
+                    previous_status=current,
+                    error=f"Cannot change status from {current.value} to {status.value}"
+                ))
+            else:
+                ids_by_source.setdefault(current, []).append(report_id)
+        
+        for source, ids in ids_by_source.items():
+            updated = self._execute(
+                self.client.table("reports")
+                .update({"status": status.value})
+                .in_("id", ids)
+                .eq("status", source.value),
+                "update_status_many"
+            )
+            updated_rows = updated.data or []
+            self._notify("status_changed", [dict(row, previous_status=source.value) for row in updated_rows])
+            
+            updated_ids = {str(row["id"]) for row in updated_rows}
+            for report_id in ids:
+                if report_id in updated_ids:
+                    results.append(StatusUpdateResult(report_id=report_id, success=True, previous_status=source))
+                else:
+                    results.append(StatusUpdateResult(
+                        report_id=report_id,
+                        success=False,
+                        previous_status=source,
+                        error="Report status changed concurrently"
+                    ))
+        
+        return results
+
+    def _apply_filters(self, query, filters: Optional[ReportFilter]):
+        """Apply listing filters to a reports query"""
+        if filters is None:
+            return query
+        if filters.status:
+            query = query.eq("status", filters.status.value)
+        if filters.damage_type:
+            query = query.eq("damage_type", filters.damage_type.value)
+        if filters.severity:
+            query = query.eq("severity", filters.severity.value)
+        if filters.created_after:
+            query = query.gte("created_at", filters.created_after.isoformat())
+        if filters.created_before:
+            query = query.lt("created_at", filters.created_before.isoformat())
+        return query
+    
+    def iter_report_pages(
+        self,
+        filters: Optional[ReportFilter] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        columns: str = "*"
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Scan matching reports page by page
+        
+        Pages are keyed on the last seen id rather than an offset, so each
+        round trip costs the same no matter how deep into the table the scan is.
+        Only one page is held in memory at a time.
+        
+        Args:
+            filters: Optional listing filters
+            page_size: Maximum rows fetched per round trip
+            columns: Column list passed to select()
+            
+        Yields:
+            Lists of report rows, ordered by id
+        """
+        last_id = None
+        while True:
+            query = self._apply_filters(self.client.table("reports").select(columns), filters)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            result = self._execute(query.order("id").limit(page_size), "select_page")
+            
+            rows = result.data or []
+            if not rows:
+                return
+            yield rows
+            
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]["id"]
 
 # Singleton instance
 supabase_service = SupabaseService()
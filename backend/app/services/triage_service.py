@@ -0,0 +1,274 @@
+"""
+Priority ranking of open reports into per-authority work queues
+"""
+import asyncio
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.schemas.report import ReportStatus
+from app.services.authority_service import authority_service
+from app.services.open_reports_index import (
+    open_reports_index, OpenReportsIndex, AUTHORITY_CODES, SEVERITY_CODES, STATUS_CODES
+)
+
+logger = logging.getLogger(__name__)
+
+# Reports kept ranked per authority, and how often every score is recomputed
+# (ages grow and neighbours come and go between rescores)
+TRIAGE_QUEUE_SIZE = int(os.getenv("TRIAGE_QUEUE_SIZE", "200"))
+TRIAGE_RESCORE_INTERVAL = float(os.getenv("TRIAGE_RESCORE_INTERVAL", "300"))
+# Reports within roughly this distance corroborate each other
+TRIAGE_NEARBY_METERS = float(os.getenv("TRIAGE_NEARBY_METERS", "100"))
+
+# Score weights; each component is scaled to 0..1 before weighting
+WEIGHTS = {"severity": 3.0, "age": 1.5, "nearby": 2.0, "road_class": 1.0}
+SEVERITY_SCORES = {"low": 1 / 3, "medium": 2 / 3, "high": 1.0}
+ROAD_CLASS_SCORES = {"highway": 1.0, "county": 0.6, "local": 0.4}
+# Reports already being worked on rank below untouched ones
+STATUS_FACTORS = {
+    ReportStatus.SUBMITTED.value: 1.0,
+    ReportStatus.PENDING.value: 1.0,
+    ReportStatus.IN_PROGRESS.value: 0.5,
+}
+# Age (hours) and corroborating-report count at which those components saturate
+AGE_SATURATION_HOURS = 24 * 30
+NEARBY_SATURATION = 10
+
+METERS_PER_DEGREE = 111_320.0
+
+# The same tables, indexed by the open reports index's int8 codes
+_SEVERITY_BY_CODE = np.array([SEVERITY_SCORES.get(value, SEVERITY_SCORES["low"]) for value in SEVERITY_CODES])
+_STATUS_BY_CODE = np.array([STATUS_FACTORS.get(value, 0.0) for value in STATUS_CODES])
+_ROAD_CLASS_BY_CODE = np.array([
+    ROAD_CLASS_SCORES.get(authority_service.AUTHORITY_MAPPING[authority_id]["road_class"], ROAD_CLASS_SCORES["local"])
+    for authority_id in AUTHORITY_CODES
+])
+
+def _cells(lat: np.ndarray, lng: np.ndarray, meters: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Grid cells about `meters` wide; longitude is scaled by latitude"""
+    return (
+        np.floor(lat * METERS_PER_DEGREE / meters).astype(np.int64),
+        np.floor(lng * np.cos(np.radians(lat)) * METERS_PER_DEGREE / meters).astype(np.int64),
+    )
+
+def score_reports(severity: np.ndarray, age_hours: np.ndarray, nearby: np.ndarray,
+                  road_class: np.ndarray, status_factor: np.ndarray) -> np.ndarray:
+    """
+    Priority scores for arrays of reports
+
+    severity and road_class are already scaled to 0..1; age and the number
+    of nearby open reports grow logarithmically and saturate.
+    """
+    age = np.minimum(np.log1p(np.maximum(age_hours, 0.0)) / math.log1p(AGE_SATURATION_HOURS), 1.0)
+    corroboration = np.minimum(np.log1p(nearby) / math.log1p(NEARBY_SATURATION), 1.0)
+    return status_factor * (
+        WEIGHTS["severity"] * severity
+        + WEIGHTS["age"] * age
+        + WEIGHTS["nearby"] * corroboration
+        + WEIGHTS["road_class"] * road_class
+    )
+
+class TriageEngine:
+    """
+    Ranked work queues of open reports per authority
+
+    Scores weigh severity, age, the number of other open reports nearby,
+    the road class of the responsible authority and status. They are
+    computed vectorized over the columns of the open reports index; a full
+    rescore keeps the top TRIAGE_QUEUE_SIZE per authority in a min-heap.
+    Between rescores, index changes update the heaps incrementally; a queue
+    that has lost a quarter of its reports is re-ranked from that
+    authority's open reports.
+    """
+
+    def __init__(self, index: OpenReportsIndex = open_reports_index, queue_size: int = TRIAGE_QUEUE_SIZE,
+                 rescore_interval: float = TRIAGE_RESCORE_INTERVAL, nearby_meters: float = TRIAGE_NEARBY_METERS):
+        self.index = index
+        self.queue_size = queue_size
+        self.rescore_interval = rescore_interval
+        self.nearby_meters = nearby_meters
+        # Per authority: min-heap of (score, report id), and the queued ids
+        # with their score and nearby count
+        self._heaps: Dict[str, List[Tuple[float, str]]] = {}
+        self._queued: Dict[str, Dict[str, Tuple[float, int]]] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.rescored_at: Optional[float] = None
+
+    @staticmethod
+    def _nearby_all(cells_y: np.ndarray, cells_x: np.ndarray,
+                    probe_y: Optional[np.ndarray] = None, probe_x: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Reports in the cell of each probe and the 8 around it, not counting
+        the probe itself (probes default to every report)
+        """
+        if probe_y is None:
+            probe_y, probe_x = cells_y, cells_x
+        # Pack cells into one sortable int64 key; the offset keeps both halves
+        # non-negative (cell indexes stay far below 2**28 for any cell size >= 1 m)
+        pack = lambda y, x: (y + (1 << 28)) * (1 << 30) + (x + (1 << 28))
+        keys, counts = np.unique(pack(cells_y, cells_x), return_counts=True)
+        nearby = np.zeros(len(probe_y), dtype=np.int64)
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                probe = pack(probe_y + dy, probe_x + dx)
+                index = np.minimum(np.searchsorted(keys, probe), len(keys) - 1)
+                nearby += np.where(keys[index] == probe, counts[index], 0)
+        return nearby - 1
+
+    def _score(self, positions: Optional[np.ndarray], now: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores and nearby counts for index rows (all of them by default)
+
+        Call with the index lock held.
+        """
+        index = self.index
+        n = index.size
+        cells_y, cells_x = _cells(index.lat[:n], index.lng[:n], self.nearby_meters)
+        if positions is None:
+            positions = np.arange(n)
+            nearby = self._nearby_all(cells_y, cells_x)
+        else:
+            # Only cells within one of the probes' cell range can be neighbours
+            probe_y, probe_x = cells_y[positions], cells_x[positions]
+            window = (
+                (cells_y >= probe_y.min() - 1) & (cells_y <= probe_y.max() + 1)
+                & (cells_x >= probe_x.min() - 1) & (cells_x <= probe_x.max() + 1)
+            )
+            nearby = self._nearby_all(cells_y[window], cells_x[window], probe_y, probe_x)
+        scores = score_reports(
+            _SEVERITY_BY_CODE[index.severity[positions]],
+            (now - index.created[positions]) / 3600,
+            nearby,
+            _ROAD_CLASS_BY_CODE[index.authority[positions]],
+            _STATUS_BY_CODE[index.status[positions]],
+        )
+        return scores, nearby
+
+    def _rank(self, authority_id: str, positions: np.ndarray, scores: np.ndarray, nearby: np.ndarray):
+        """Rebuild one authority's heap from scored index rows"""
+        count = min(self.queue_size, len(positions))
+        top = np.argpartition(-scores, count - 1)[:count] if count else []
+        queued = {self.index.ids[positions[i]]: (float(scores[i]), int(nearby[i])) for i in top}
+        heap = [(score, report_id) for report_id, (score, _) in queued.items()]
+        heapq.heapify(heap)
+        self._heaps[authority_id] = heap
+        self._queued[authority_id] = queued
+
+    def _rank_authority(self, authority_id: str, now: float):
+        index = self.index
+        code = AUTHORITY_CODES.index(authority_id)
+        positions = np.flatnonzero(index.authority[:index.size] == code)
+        self._rank(authority_id, positions, *self._score(positions, now))
+
+    def rescore(self):
+        """Score every open report and rebuild all queues"""
+        now = time.time()
+        with self._lock, self.index.lock:
+            index = self.index
+            scores, nearby = self._score(None, now)
+            authorities = index.authority[:index.size]
+            self._heaps, self._queued = {}, {}
+            for code in np.unique(authorities):
+                members = np.flatnonzero(authorities == code)
+                self._rank(AUTHORITY_CODES[code], members, scores[members], nearby[members])
+            self.rescored_at = now
+
+    def _push(self, authority_id: str, report_id: str, score: float, nearby: int):
+        heap = self._heaps.setdefault(authority_id, [])
+        queued = self._queued.setdefault(authority_id, {})
+        if len(heap) < self.queue_size:
+            heapq.heappush(heap, (score, report_id))
+        elif score > heap[0][0]:
+            _, dropped = heapq.heapreplace(heap, (score, report_id))
+            queued.pop(dropped, None)
+        else:
+            return
+        queued[report_id] = (score, nearby)
+
+    def _remove(self, report_id: str) -> Optional[str]:
+        """Take a report out of whichever queue holds it; returns that authority"""
+        for authority_id, queued in self._queued.items():
+            if queued.pop(report_id, None) is not None:
+                heap = self._heaps[authority_id]
+                heap[:] = [entry for entry in heap if entry[1] != report_id]
+                heapq.heapify(heap)
+                return authority_id
+        return None
+
+    def on_index_change(self, event: str, report_ids: List[str]):
+        """OpenReportsIndex listener"""
+        if event == "reloaded":
+            self.rescore()
+            return
+        now = time.time()
+        with self._lock, self.index.lock:
+            index = self.index
+            drained = set()
+            for report_id in report_ids:
+                authority_id = self._remove(report_id)
+                if authority_id is not None:
+                    drained.add(authority_id)
+            positions = np.array(
+                [p for p in (index.position(report_id) for report_id in report_ids) if p is not None], dtype=np.int64
+            )
+            if len(positions):
+                scores, nearby = self._score(positions, now)
+                for i, position in enumerate(positions):
+                    self._push(AUTHORITY_CODES[index.authority[position]], index.ids[position],
+                               float(scores[i]), int(nearby[i]))
+            # Refilling a queue scores all of the authority's open reports, so
+            # it waits until a quarter of the queue has been taken out
+            for authority_id in drained:
+                heap = self._heaps[authority_id]
+                if len(heap) <= self.queue_size * 3 // 4 and index.count(authority_id) > len(heap):
+                    self._rank_authority(authority_id, now)
+
+    def queue(self, authority_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Highest-priority open reports of one authority, best first"""
+        with self._lock, self.index.lock:
+            ranked = heapq.nlargest(limit, self._heaps.get(authority_id, []))
+            queued = self._queued.get(authority_id, {})
+            rows = []
+            for score, report_id in ranked:
+                position = self.index.position(report_id)
+                if position is None:
+                    continue
+                row = self.index.row(position)
+                del row["authority_id"]
+                row.update(priority_score=round(score, 4), nearby_reports=queued[report_id][1])
+                rows.append(row)
+            return rows
+
+    def open_count(self, authority_id: str) -> int:
+        return self.index.count(authority_id)
+
+    def start(self):
+        """Rescore periodically in the background (the index triggers the first ranking when it loads)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._rescore_loop())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _rescore_loop(self):
+        while True:
+            await asyncio.sleep(self.rescore_interval)
+            try:
+                await asyncio.to_thread(self.rescore)
+            except Exception as e:
+                logger.warning("Triage queue rescore failed: %s", e)
+
+# Singleton instance
+triage_engine = TriageEngine()
+open_reports_index.add_listener(triage_engine.on_index_change)
@@ -1,10 +1,18 @@
 """
 Service for sending webhook notifications to relay.app
 """
+import logging
 import os
+import asyncio
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 import json
+from app.services.metrics import track_dependency, observe_payload, RELAY_WEBHOOK
+
+logger = logging.getLogger(__name__)
+
+# Maximum webhook requests in flight for bulk notifications
+DEFAULT_CONCURRENCY = int(os.getenv("WEBHOOK_CONCURRENCY", "10"))
 
 class WebhookService:
     """Service for sending webhook notifications"""
@@ -36,9 +44,71 @@ class WebhookService:
         """
         # Check if webhook is configured
         if not self.is_configured():
-            print("Warning: RELAY_APP_WEBHOOK_URL not configured. Skipping webhook notification.")
+            logger.warning("RELAY_APP_WEBHOOK_URL not configured. Skipping webhook notification.")
             return False
 
+        payload = self._build_payload(report_data, authority)
+        
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                return await self._post(client, payload)
+        except Exception as e:
+            logger.warning("Webhook notification failed for report %s: %s", report_data.get("id"), e)
+            return False
+    
+    async def send_notifications(
+        self,
+        notifications: List[Tuple[Dict[str, Any], Dict[str, str]]],
+        concurrency: int = DEFAULT_CONCURRENCY
+    ) -> int:
+        """
+        Send webhook notifications for many reports over one connection pool
+
+        Args:
+            notifications: (report_data, authority) pairs
+            concurrency: Maximum requests in flight at once
+
+        Returns:
+            Number of notifications delivered
+        """
+        if not notifications:
+            return 0
+        if not self.is_configured():
+            logger.warning("RELAY_APP_WEBHOOK_URL not configured. Skipping webhook notifications.")
+            return 0
+
+        semaphore = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+        async with httpx.AsyncClient(timeout=10.0, limits=limits) as client:
+            async def deliver(report_data: Dict[str, Any], authority: Dict[str, str]) -> bool:
+                async with semaphore:
+                    try:
+                        return await self._post(client, self._build_payload(report_data, authority))
+                    except Exception as e:
+                        logger.warning("Webhook notification failed for report %s: %s", report_data.get("id"), e)
+                        return False
+
+            results = await asyncio.gather(
+                *(deliver(report_data, authority) for report_data, authority in notifications)
+            )
+        return sum(1 for sent in results if sent)
+    
+    async def _post(self, client: httpx.AsyncClient, payload: Dict[str, Any]) -> bool:
+        """POST a payload to the webhook, raising on HTTP errors"""
+        body = json.dumps(payload).encode("utf-8")
+        observe_payload(RELAY_WEBHOOK, "notify", len(body))
+        with track_dependency(RELAY_WEBHOOK, "notify"):
+            response = await client.post(
+                self.webhook_url,
+                content=body,
+                headers={"Content-Type": "application/json"}
+            )
+            response.raise_for_status()
+        return True
+    
+    def _build_payload(self, report_data: Dict[str, Any], authority: Dict[str, str]) -> Dict[str, Any]:
+        """Build the relay.app payload for a report"""
         # Structure the payload with flat variables that match relay.app email template
         # The email template uses {{variable_name}} so we need top-level string fields
         payload = {
@@ -85,19 +155,7 @@ class WebhookService:
             "status": report_data.get("status"),
             "priority": self._calculate_priority(report_data.get("severity"))
         }
-        
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    self.webhook_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                return True
-        except Exception as e:
-            print(f"Webhook notification failed: {e}")
-            return False
+        return payload
     
     def _calculate_priority(self, severity: str) -> str:
         """Calculate priority based on severity"""
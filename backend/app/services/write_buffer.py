@@ -0,0 +1,116 @@
+"""
+Write-coalescing buffer for report inserts
+"""
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class InsertBatcher:
+    """
+    Coalesce concurrent single-row inserts into multi-row inserts
+
+    Rows submitted within `max_delay_ms` of the first pending row (or until
+    `max_rows` are pending) are written with one insert. Each caller awaits
+    its own row, matched by position in the insert result. If a batch fails,
+    its rows are retried one at a time so only the offending caller sees an
+    error.
+    """
+
+    def __init__(
+        self,
+        insert_rows: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+        max_rows: int = 50,
+        max_delay_ms: float = 5.0
+    ):
+        self._insert_rows = insert_rows
+        self.max_rows = max_rows
+        self.max_delay = max_delay_ms / 1000
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Running flush tasks; asyncio only keeps weak references to tasks
+        self._flushes: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.rows = 0
+
+    async def submit(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a row for insertion and wait for the stored row"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+
+        if len(self._pending) >= self.max_rows:
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush_pending)
+
+        return await future
+
+    def _flush_pending(self):
+        """Hand the pending rows to a flush task and start a new batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task):
+        self._flushes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Insert batch flush failed", exc_info=task.exception())
+
+    async def close(self):
+        """Flush pending rows and wait for every running flush to finish"""
+        self._flush_pending()
+        if self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """Insert a batch off the event loop and resolve its waiters"""
+        self.batches += 1
+        self.rows += len(batch)
+        try:
+            stored = await asyncio.to_thread(self._insert_rows, [row for row, _ in batch])
+            if len(stored) != len(batch):
+                raise Exception("Insert returned a different number of rows than were sent")
+            for (_, future), row in zip(batch, stored):
+                if not future.done():
+                    future.set_result(row)
+        except Exception as e:
+            if len(batch) == 1:
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(e)
+                return
+            for row, future in batch:
+                await self._insert_single(row, future)
+        finally:
+            # Cancelled mid-flight: never leave a caller waiting forever
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Insert batch was cancelled"))
+
+    async def _insert_single(self, row: Dict[str, Any], future: asyncio.Future):
+        """Insert one row and resolve its waiter with the row or the error"""
+        try:
+            stored = await asyncio.to_thread(self._insert_rows, [row])
+            if not stored:
+                raise Exception("Failed to create report in database")
+            if not future.done():
+                future.set_result(stored[0])
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch counters"""
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "rows_per_batch": round(self.rows / self.batches, 2) if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the agent workflow
+
+Drives /api/chat turns (through chat_endpoint, without HTTP) for many
+concurrent sessions against the compiled LangGraph workflow. The OpenAI
+model is replaced by a deterministic fake chat model with configurable
+latency, so runs need no network and are comparable across machines.
+
+Reports session throughput, per-turn and per-node latency, and the cost of
+the state reducers that copy report_data and the message history. Results
+are written as JSON so CI runs can be diffed.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.agents import workflow as workflow_module
+from app.agents.llm_cache import CachedChatModel, LLMResponseCache
+from app.agents.tracing import tracer
+from app.routers.chat import ChatMessage, chat_endpoint
+from app.services.session_store import session_store
+
+# Client input for each turn of a scripted reporting conversation
+CONVERSATION = [
+    {"message": "Hi, I want to report a pothole"},
+    {"message": "Here is the photo", "report_data": {"image": "uploads/benchmark.jpg"}},
+    {"message": "It is on Main Street", "report_data": {"location": {"lat": 40.71, "lng": -74.0, "address": "Main Street"}}},
+    {"message": "It's a pothole", "report_data": {"damage_type": "pothole"}},
+    {"message": "Pretty bad", "report_data": {"severity": "high"}},
+]
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic chat model that waits `latency` seconds per call"""
+
+    latency: float = 0.05
+    temperature: float = 0.0
+    model_name: str = "fake-chat"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _reply(self, messages: List[Any]) -> ChatResult:
+        digest = hashlib.sha1(str(messages[-1].content).encode("utf-8")).hexdigest()[:8]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"ack {digest}"))])
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+def _llm_backed(name: str, agent):
+    """Make an agent pay for one LLM call per invocation, as LLM-backed agents will"""
+    def node(state):
+        workflow_module.get_llm().invoke(
+            [SystemMessage(content=f"You are the {name} agent."), *state["messages"][-4:]]
+        )
+        return agent(state)
+    return node
+
+def _percentiles(samples: List[float]) -> dict:
+    ordered = sorted(samples)
+    pick = lambda pct: ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+    return {
+        "mean": round(statistics.mean(ordered), 3),
+        "p50": round(pick(50), 3),
+        "p95": round(pick(95), 3),
+        "p99": round(pick(99), 3),
+    }
+
+async def _run_session(index: int, turns: int, semaphore: asyncio.Semaphore, latencies: List[float]):
+    session_id = f"bench-{index}"
+    for turn in range(turns):
+        payload = CONVERSATION[turn % len(CONVERSATION)]
+        async with semaphore:
+            start = time.perf_counter()
+            await chat_endpoint(ChatMessage(session_id=session_id, **payload))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+def _measure_state_copies(iterations: int = 2000) -> dict:
+    """Time the report_data and messages reducers on the largest session state seen"""
+    messages_reducer = workflow_module.AgentState.__annotations__["messages"].__metadata__[0]
+    states = [state for (_, state), _ in session_store.memory._entries.values()]
+    largest = max(states, key=lambda state: len(state["messages"]))
+
+    report_data = dict(largest["report_data"])
+    history = largest["messages"]
+    new_message = [AIMessage(content="benchmark")]
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        workflow_module.merge_report_data(report_data, {"benchmark": True})
+    report_data_us = (time.perf_counter() - start) / iterations * 1e6
+
+    # Each append builds on the previous result, as successive agent steps do
+    log = history
+    start = time.perf_counter()
+    for _ in range(iterations):
+        log = messages_reducer(log, new_message)
+    messages_us = (time.perf_counter() - start) / iterations * 1e6
+
+    return {
+        "report_data_fields": len(report_data),
+        "history_messages": len(history),
+        "report_data_merge_us": round(report_data_us, 3),
+        "messages_append_us": round(messages_us, 3),
+    }
+
+async def run_benchmark(args) -> dict:
+    model = FakeChatModel(latency=args.llm_latency_ms / 1000)
+    cache = LLMResponseCache(db_path=None) if args.llm_cache else None
+    workflow_module.set_llm(CachedChatModel(model, cache) if cache is not None else model)
+
+    # Patch before the first get_workflow() call so the compiled graph uses them
+    for name in args.llm_nodes:
+        attribute = f"{name}_agent"
+        setattr(workflow_module, attribute, _llm_backed(name, getattr(workflow_module, attribute)))
+
+    tracer.enabled = True
+    tracer.reset()
+    workflow_module.get_workflow()
+
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _run_session(index, args.turns, semaphore, latencies) for index in range(args.sessions)
+    ))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "sessions": args.sessions,
+            "turns_per_session": args.turns,
+            "concurrency": args.concurrency,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_nodes": args.llm_nodes,
+            "llm_cache": args.llm_cache,
+        },
+        "throughput": {
+            "elapsed_s": round(elapsed, 3),
+            "turns": len(latencies),
+            "turns_per_s": round(len(latencies) / elapsed, 2),
+            "sessions_per_s": round(args.sessions / elapsed, 2),
+        },
+        "turn_latency_ms": _percentiles(latencies),
+        "nodes": tracer.stats()["nodes"],
+        "state_copy": _measure_state_copies(),
+        "llm_cache": cache.stats()["nodes"] if cache is not None else None,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark for the agent workflow")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=len(CONVERSATION))
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument(
+        "--llm-nodes", nargs="*", default=["greeting"],
+        help="Agents made to pay one extra fake LLM call per invocation (validation already calls the model)"
+    )
+    parser.add_argument("--llm-cache", action="store_true", help="Answer repeated prompts from LLMResponseCache")
+    parser.add_argument("--output", default="bench_agents.json")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    throughput = results["throughput"]
+    print(f"{throughput['turns']} turns in {throughput['elapsed_s']}s "
+          f"({throughput['turns_per_s']} turns/s), turn latency {results['turn_latency_ms']}")
+    for node, stats in results["nodes"].items():
+        print(f"  {node:>20}: p50 {stats['p50_ms']}ms  p95 {stats['p95_ms']}ms  p99 {stats['p99_ms']}ms")
+    print(f"State copies: {results['state_copy']}")
+    if results["llm_cache"] is not None:
+        print(f"LLM cache: {results['llm_cache']}")
+    print(f"Results written to {args.output}", file=sys.stderr)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Local load test for the HTTP API
+
+Starts fake_services.py (stand-ins for Supabase, the relay.app webhook and
+OpenAI, with configurable latency and error injection) and the app under
+uvicorn, pointed at them, then drives each scenario at a fixed concurrency:
+
+- submit: POST /api/reports/submit with a small image
+- submit-async: the same with ?async=true
+- analyze: POST /api/analyze-image
+- chat: multi-turn /api/chat sessions
+
+The app is restarted for every scenario so peak RSS is per scenario.
+Reports requests per second, p50/p95/p99 latency, error counts, peak RSS
+and what the fake services saw, and writes the results as JSON.
+
+    python benchmark_load.py --requests 2000 --concurrency 32 --latency db=20 storage=40 openai=400
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from fake_services import DEFAULT_PORTS, add_arguments, parse_settings
+
+SCENARIOS = ("submit", "submit-async", "analyze", "chat")
+
+# Smallest valid JPEG-like payload worth uploading; the services never decode it
+IMAGE = b"\xff\xd8\xff\xe0" + bytes(2048) + b"\xff\xd9"
+
+SUBMISSION = {
+    "location": json.dumps({"lat": 40.7128, "lng": -74.006, "address": "Main Street"}),
+    "damage_type": "pothole",
+    "severity": "high",
+    "remarks": "Load test report",
+}
+
+# Client input for each turn of a scripted reporting conversation
+CONVERSATION = [
+    {"message": "Hi, I want to report a pothole"},
+    {"message": "Here is the photo", "report_data": {"image": "uploads/benchmark.jpg"}},
+    {"message": "It is on Main Street", "report_data": {"location": {"lat": 40.71, "lng": -74.0, "address": "Main Street"}}},
+    {"message": "It's a pothole", "report_data": {"damage_type": "pothole"}},
+    {"message": "Pretty bad", "report_data": {"severity": "high"}},
+]
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _peak_rss_mb(pid: int) -> Optional[float]:
+    """Peak resident set size of a process, from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def _percentiles(samples: List[float]) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda pct: ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+    return {
+        "mean": round(statistics.mean(ordered), 3),
+        "p50": round(pick(50), 3),
+        "p95": round(pick(95), 3),
+        "p99": round(pick(99), 3),
+    }
+
+async def _wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{process.args} exited with code {process.returncode}")
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"{url} did not come up within {timeout}s")
+
+def _stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+class Scenario:
+    """Issues one kind of request; `call` returns the response"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._sessions = itertools.count()
+
+    async def call(self, client: httpx.AsyncClient, index: int) -> httpx.Response:
+        if self.name in ("submit", "submit-async"):
+            return await client.post(
+                "/api/reports/submit",
+                params={"async": "true"} if self.name == "submit-async" else None,
+                data=SUBMISSION,
+                files={"image": ("damage.jpg", IMAGE, "image/jpeg")},
+                headers={"Idempotency-Key": uuid.uuid4().hex},
+            )
+        if self.name == "analyze":
+            return await client.post("/api/analyze-image", files={"image": ("damage.jpg", IMAGE, "image/jpeg")})
+        return await self._chat(client)
+
+    async def _chat(self, client: httpx.AsyncClient) -> httpx.Response:
+        """One whole conversation; latency is reported per session"""
+        session_id = None
+        for turn in CONVERSATION:
+            response = await client.post("/api/chat", json={**turn, "session_id": session_id})
+            if response.status_code != 200:
+                return response
+            session_id = response.json().get("session_id")
+        return response
+
+async def _drive(base_url: str, scenario: Scenario, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Run `requests` calls with `concurrency` callers and collect latencies"""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = itertools.count()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        async def caller():
+            while (index := next(counter)) < requests:
+                start = time.perf_counter()
+                try:
+                    response = await scenario.call(client, index)
+                    outcome = str(response.status_code)
+                except httpx.HTTPError as e:
+                    outcome = type(e).__name__
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[outcome] = statuses.get(outcome, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(caller() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    ok = sum(count for status, count in statuses.items() if status in ("200", "201", "202"))
+    return {
+        "requests": len(latencies),
+        "errors": len(latencies) - ok,
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": _percentiles(latencies),
+    }
+
+async def _fake_service_stats(ports: Dict[str, int]) -> Dict[str, Any]:
+    async with httpx.AsyncClient() as client:
+        return {
+            name: (await client.get(f"http://127.0.0.1:{port}/_stats")).json()
+            for name, port in ports.items()
+        }
+
+async def run_scenario(name: str, args, ports: Dict[str, int], workdir: str) -> Dict[str, Any]:
+    app_port = _free_port()
+    env = {
+        **os.environ,
+        "SUPABASE_URL": f"http://127.0.0.1:{ports['supabase']}",
+        # supabase-py only checks that the key looks like a JWT
+        "SUPABASE_KEY": "load.test.key",
+        "RELAY_APP_WEBHOOK_URL": f"http://127.0.0.1:{ports['relay']}/webhook",
+        "OPENAI_API_KEY": "sk-load-test",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{ports['openai']}/v1",
+        "OPENAI_API_BASE": f"http://127.0.0.1:{ports['openai']}/v1",
+        "SUBMIT_QUEUE_DB": os.path.join(workdir, f"{name}_queue.db"),
+        "LOG_LEVEL": args.log_level,
+        # All load comes from one client, which the per-client limits would throttle
+        "RATE_LIMIT_RATE": "0",
+        "MAX_IN_FLIGHT": str(max(args.concurrency * 2, 64)),
+    }
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(app_port), "--log-level", "warning", "--no-access-log"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env, stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{app_port}"
+    try:
+        await _wait_until_up(f"{base_url}/health", app)
+        scenario = Scenario(name)
+        if args.warmup:
+            await _drive(base_url, scenario, args.warmup, min(args.concurrency, args.warmup))
+        before = await _fake_service_stats(ports)
+        result = await _drive(base_url, scenario, args.requests, args.concurrency)
+        result["peak_rss_mb"] = _peak_rss_mb(app.pid)
+        result["fake_services"] = {"before": before, "after": await _fake_service_stats(ports)}
+        return result
+    finally:
+        _stop(app)
+
+async def run_benchmark(args) -> dict:
+    ports = {name: _free_port() for name in DEFAULT_PORTS}
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_services.py")]
+    for name, port in ports.items():
+        command += [f"--{name}-port", str(port)]
+    for option in ("latency", "jitter", "errors"):
+        if getattr(args, option):
+            command += [f"--{option}", *getattr(args, option)]
+
+    fakes = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    results = {}
+    try:
+        for name, port in ports.items():
+            await _wait_until_up(f"http://127.0.0.1:{port}/_stats", fakes)
+        with tempfile.TemporaryDirectory() as workdir:
+            for name in args.scenarios:
+                results[name] = await run_scenario(name, args, ports, workdir)
+                summary = results[name]
+                print(f"{name:>13}: {summary['requests']} requests, {summary['errors']} errors, "
+                      f"{summary['rps']} req/s, latency {summary['latency_ms']}, "
+                      f"peak RSS {summary['peak_rss_mb']} MB", flush=True)
+    finally:
+        _stop(fakes)
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "latency_ms": parse_settings(args.latency),
+            "jitter_ms": parse_settings(args.jitter),
+            "error_rate": parse_settings(args.errors),
+        },
+        "scenarios": results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local load test against fake Supabase, relay.app and OpenAI")
+    parser.add_argument("--scenarios", nargs="*", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario (chat: sessions)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", default="bench_load.json")
+    add_arguments(parser)
+    args = parser.parse_args()
+    # Fail on a bad SERVICE=VALUE before starting anything
+    for option in ("latency", "jitter", "errors"):
+        parse_settings(getattr(args, option))
+
+    results = asyncio.run(run_benchmark(args))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark cached vs. uncached report lookups
+
+Runs SupabaseService.get_report against an in-memory reports table that
+sleeps for a configurable round-trip time, so no Supabase project is needed.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.services.supabase_service import supabase_service
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+class _SlowQuery:
+    """Just enough of the PostgREST query builder for get_report"""
+
+    def __init__(self, rows, latency):
+        self._rows = rows
+        self._latency = latency
+        self._id = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self._id = value
+        return self
+
+    def execute(self):
+        time.sleep(self._latency)
+        row = self._rows.get(self._id)
+        return _Result([row] if row else [])
+
+class _SlowClient:
+    def __init__(self, rows, latency):
+        self._rows = rows
+        self._latency = latency
+
+    def table(self, name):
+        return _SlowQuery(self._rows, self._latency)
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def _measure(report_ids, iterations, use_cache):
+    samples = []
+    for i in range(iterations):
+        if not use_cache:
+            supabase_service.report_cache.clear()
+        start = time.perf_counter()
+        await supabase_service.get_report(report_ids[i % len(report_ids)])
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+async def run_benchmark(reports, iterations, latency_ms):
+    rows = {f"report-{i}": {"id": f"report-{i}", "status": "submitted"} for i in range(reports)}
+    supabase_service._client = _SlowClient(rows, latency_ms / 1000)
+    report_ids = list(rows)
+
+    uncached = await _measure(report_ids, iterations, use_cache=False)
+
+    supabase_service.report_cache.clear()
+    supabase_service.report_cache.hits = supabase_service.report_cache.misses = 0
+    cached = await _measure(report_ids, iterations, use_cache=True)
+
+    print(f"=== get_report: {iterations} lookups over {reports} reports, {latency_ms}ms DB latency ===")
+    for label, samples in (("uncached", uncached), ("cached", cached)):
+        print(
+            f"{label:>9}: mean {statistics.mean(samples):8.3f}ms  "
+            f"p50 {_percentile(samples, 50):8.3f}ms  p99 {_percentile(samples, 99):8.3f}ms"
+        )
+    print(f"Cache stats: {supabase_service.report_cache.stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.reports, args.iterations, args.latency_ms))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark response serialization and compression for a page of report rows
+
+Compares FastAPI's default path (jsonable_encoder + JSONResponse) with
+returning ORJSONResponse directly, the json and orjson NDJSON export
+encoders, and the compression levels CompressionMiddleware can use. Reports
+CPU time per page of `--rows` rows; no server or database is involved.
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.services.compression import BROTLI_QUALITY, GZIP_LEVEL, brotli
+
+def _rows(count):
+    """Rows shaped like the reports table as PostgREST returns them"""
+    random.seed(7)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(count):
+        created = (now - timedelta(minutes=random.randint(0, 60 * 24 * 90))).isoformat()
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "created_at": created,
+            "updated_at": created,
+            "status": random.choice(["pending", "submitted", "in_progress", "resolved", "closed"]),
+            "damage_type": random.choice(["pothole", "crack", "debris", "other"]),
+            "severity": random.choice(["low", "medium", "high"]),
+            "location_lat": round(40 + random.random(), 6),
+            "location_lng": round(-74 + random.random(), 6),
+            "location_address": f"{random.randint(1, 9999)} Main Street, Springfield",
+            "remarks": "Large pothole in the right lane, about 30 cm across" if i % 3 else None,
+            "image_url": f"https://example.supabase.co/storage/v1/object/public/road-damage/{uuid.uuid4()}.jpg",
+            "authority_name": "City Public Works Department",
+            "authority_contact": "publicworks@city.gov",
+            "webhook_sent": bool(i % 2),
+        })
+    return rows
+
+def _cpu_ms(func, iterations):
+    """Mean CPU milliseconds per call, and the last result"""
+    result = func()
+    start = time.process_time()
+    for _ in range(iterations):
+        result = func()
+    return (time.process_time() - start) * 1000 / iterations, result
+
+def run_benchmark(rows, iterations):
+    page = _rows(rows)
+    payload = {"total": rows, "reports": page}
+
+    serializers = {
+        "jsonable_encoder + JSONResponse": lambda: JSONResponse(jsonable_encoder(payload)).body,
+        "ORJSONResponse": lambda: ORJSONResponse(payload).body,
+        "NDJSON json.dumps": lambda: "".join(json.dumps(row, default=str) + "\n" for row in page).encode("utf-8"),
+        "NDJSON orjson.dumps": lambda: b"".join(orjson.dumps(row, default=str) + b"\n" for row in page),
+    }
+    print(f"=== Serialization: {rows}-row page, {iterations} iterations (CPU ms per page) ===")
+    results = {}
+    for label, serialize in serializers.items():
+        ms, body = _cpu_ms(serialize, iterations)
+        results[label] = ms
+        print(f"{label:>32}: {ms:8.3f}ms  {len(body):>9} bytes")
+    baseline = results["jsonable_encoder + JSONResponse"]
+    print(f"ORJSONResponse speedup: {baseline / results['ORJSONResponse']:.1f}x")
+    print(f"NDJSON speedup: {results['NDJSON json.dumps'] / results['NDJSON orjson.dumps']:.1f}x")
+
+    body = ORJSONResponse(payload).body
+    compressors = {
+        f"gzip level {GZIP_LEVEL}": lambda: gzip.compress(body, GZIP_LEVEL),
+        "gzip level 9 (GZipMiddleware)": lambda: gzip.compress(body, 9),
+    }
+    if brotli is not None:
+        compressors[f"brotli quality {BROTLI_QUALITY}"] = lambda: brotli.compress(body, quality=BROTLI_QUALITY)
+    print(f"=== Compression of the {len(body)}-byte JSON page ===")
+    for label, compress in compressors.items():
+        ms, compressed = _cpu_ms(compress, iterations)
+        print(f"{label:>32}: {ms:8.3f}ms  {len(compressed):>9} bytes  ({len(body) / len(compressed):.1f}x smaller)")
+    if brotli is None:
+        print("brotli is not installed; install it to compare brotli compression")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    run_benchmark(args.rows, args.iterations)
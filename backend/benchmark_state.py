@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the agent state reducers over long conversations
+
+Simulates sessions of many turns, each adding a user message and an agent
+reply and merging a few report_data fields, and compares the copying
+reducers (`x + y`, `{**a, **b}`) with the append-only MessageLog and the
+field-level report_data merge. Cost per turn should grow with history for
+the copying message reducer and stay flat for MessageLog; report_data has a
+bounded set of fields, so both of its reducers stay flat.
+"""
+import argparse
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.agents.state import append_messages, merge_report_data
+
+def _copying_messages(current, update):
+    return current + update
+
+def _copying_report_data(current, update):
+    return {**current, **update}
+
+def _run(turns: int, messages_reducer, report_data_reducer, checkpoints):
+    """Return cumulative seconds spent in the reducers at each checkpoint turn"""
+    messages, report_data = [], {}
+    timings, elapsed = {}, 0.0
+    for turn in range(1, turns + 1):
+        user = [HumanMessage(content=f"turn {turn}")]
+        reply = [AIMessage(content=f"reply {turn}")]
+        fields = {"step": turn, f"field_{turn % 16}": turn}
+
+        start = time.perf_counter()
+        messages = messages_reducer(messages, user)
+        messages = messages_reducer(messages, reply)
+        report_data = report_data_reducer(report_data, fields)
+        elapsed += time.perf_counter() - start
+
+        if turn in checkpoints:
+            timings[turn] = elapsed
+    assert len(messages) == 2 * turns
+    return timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark agent state reducers over long sessions")
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--sessions", type=int, default=20)
+    args = parser.parse_args()
+
+    checkpoints = sorted({10, 100, args.turns // 2, args.turns} & set(range(1, args.turns + 1)))
+    for label, reducers in (
+        ("copying", (_copying_messages, _copying_report_data)),
+        ("append-only", (append_messages, merge_report_data)),
+    ):
+        totals = dict.fromkeys(checkpoints, 0.0)
+        for _ in range(args.sessions):
+            for turn, seconds in _run(args.turns, *reducers, set(checkpoints)).items():
+                totals[turn] += seconds
+
+        print(f"{label} reducers ({args.sessions} sessions x {args.turns} turns):")
+        previous_turn, previous_total = 0, 0.0
+        for turn in checkpoints:
+            per_turn_us = (totals[turn] - previous_total) / (turn - previous_turn) / args.sessions * 1e6
+            print(f"  turns {previous_turn + 1:>5}-{turn:<5} {per_turn_us:8.2f} us/turn   "
+                  f"total {totals[turn] / args.sessions * 1000:8.2f} ms/session")
+            previous_turn, previous_total = turn, totals[turn]
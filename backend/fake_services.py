@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the services the backend calls, for load testing
+
+Serves, each on its own port:
+- supabase: the PostgREST (/rest/v1) and Storage (/storage/v1) paths used
+  by SupabaseService and StorageService, backed by in-memory tables
+- relay: a webhook sink that accepts relay.app notifications
+- openai: an OpenAI-compatible /v1/chat/completions (vision or text),
+  with or without streaming
+
+Every endpoint sleeps for a configurable latency (plus jitter) and can fail
+a configurable share of requests with 503. GET /_stats on each server
+returns request and injected-error counts.
+
+    python fake_services.py --latency db=20 storage=40 webhook=30 openai=400 --errors webhook=0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+SERVICES = ("db", "storage", "webhook", "openai")
+DEFAULT_PORTS = {"supabase": 54321, "relay": 54322, "openai": 54323}
+
+class Faults:
+    """Latency, jitter and error injection for one kind of call"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.counts: Counter = Counter()
+
+    async def apply(self, operation: str) -> Optional[Response]:
+        """Wait out the configured latency; return a 503 response if this call should fail"""
+        self.counts[operation] += 1
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and random.random() < self.error_rate:
+            self.counts[f"{operation}_injected_errors"] += 1
+            return JSONResponse({"message": "Injected failure", "code": "503"}, status_code=503)
+        return None
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _parse_list(value: str) -> List[str]:
+    """Parse a PostgREST list literal: (a,"b,c",d)"""
+    items, current, quoted = [], "", False
+    for char in value.strip()[1:-1]:
+        if char == '"':
+            quoted = not quoted
+        elif char == "," and not quoted:
+            items.append(current)
+            current = ""
+        else:
+            current += char
+    if current or items:
+        items.append(current)
+    return items
+
+def _matches(row: Dict[str, Any], column: str, expression: str) -> bool:
+    operator, _, operand = expression.partition(".")
+    value = row.get(column)
+    text = None if value is None else str(value)
+    if operator == "eq":
+        return text == operand
+    if operator == "neq":
+        return text != operand
+    if operator == "in":
+        return text in _parse_list(operand)
+    if operator == "is":
+        return value is None if operand == "null" else text == operand
+    if text is None:
+        return False
+    if operator == "gt":
+        return text > operand
+    if operator == "gte":
+        return text >= operand
+    if operator == "lt":
+        return text < operand
+    if operator == "lte":
+        return text <= operand
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+class FakeSupabase:
+    """In-memory PostgREST tables and Storage buckets"""
+
+    RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+    def __init__(self, db: Faults, storage: Faults):
+        self.db = db
+        self.storage = storage
+        self.tables: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.objects: Dict[str, int] = {}
+
+    def _select(self, table: str, request: Request) -> List[Dict[str, Any]]:
+        params = request.query_params
+        rows = [
+            row for row in self.tables.get(table, {}).values()
+            if all(
+                _matches(row, column, expression)
+                for column, expression in params.multi_items()
+                if column not in self.RESERVED_PARAMS
+            )
+        ]
+        if "order" in params:
+            for term in reversed(params["order"].split(",")):
+                column, _, direction = term.partition(".")
+                rows.sort(key=lambda row: str(row.get(column, "")), reverse=direction.startswith("desc"))
+        offset = int(params.get("offset", 0))
+        if "limit" in params:
+            rows = rows[offset:offset + int(params["limit"])]
+        elif offset:
+            rows = rows[offset:]
+        return rows
+
+    @staticmethod
+    def _project(rows: List[Dict[str, Any]], select: Optional[str]) -> List[Dict[str, Any]]:
+        if not select or select == "*":
+            return rows
+        columns = [column.strip() for column in select.split(",")]
+        return [{column: row.get(column) for column in columns} for row in rows]
+
+    async def rest(self, request: Request) -> Response:
+        table = request.path_params["table"]
+        failure = await self.db.apply(f"{request.method.lower()}_{table}")
+        if failure is not None:
+            return failure
+
+        wants_rows = "return=minimal" not in request.headers.get("prefer", "")
+        if request.method == "GET":
+            rows = self._select(table, request)
+            return JSONResponse(self._project(rows, request.query_params.get("select")))
+
+        if request.method == "POST":
+            body = json.loads(await request.body())
+            prefer = request.headers.get("prefer", "")
+            rows = self.tables.setdefault(table, {})
+            created = []
+            for item in body if isinstance(body, list) else [body]:
+                row = {"id": str(uuid.uuid4()), "created_at": _now(), "updated_at": _now(), **item}
+                if row["id"] in rows:
+                    # Upserts: on_conflict=id with ignore-duplicates or merge-duplicates
+                    if "resolution=ignore-duplicates" in prefer:
+                        continue
+                    if "resolution=merge-duplicates" not in prefer:
+                        return JSONResponse({"code": "23505", "message": "duplicate key value"}, status_code=409)
+                rows[row["id"]] = row
+                created.append(row)
+            return JSONResponse(created if wants_rows else None, status_code=201)
+
+        if request.method == "PATCH":
+            changes = json.loads(await request.body())
+            rows = self._select(table, request)
+            for row in rows:
+                row.update(changes, updated_at=_now())
+            return JSONResponse(rows if wants_rows else None)
+
+        if request.method == "DELETE":
+            rows = self._select(table, request)
+            for row in rows:
+                self.tables[table].pop(row["id"], None)
+            return JSONResponse(rows if wants_rows else None)
+
+        return JSONResponse({"message": "Method not allowed"}, status_code=405)
+
+    async def list_buckets(self, request: Request) -> Response:
+        failure = await self.storage.apply("list_buckets")
+        if failure is not None:
+            return failure
+        return JSONResponse([{
+            "id": "road-damage-images", "name": "road-damage-images", "owner": "",
+            "public": True, "created_at": _now(), "updated_at": _now(),
+            "file_size_limit": None, "allowed_mime_types": None,
+        }])
+
+    async def upload(self, request: Request) -> Response:
+        failure = await self.storage.apply("upload")
+        if failure is not None:
+            return failure
+        key = f"{request.path_params['bucket']}/{request.path_params['path']}"
+        self.objects[key] = len(await request.body())
+        return JSONResponse({"Key": key, "Id": str(uuid.uuid4())})
+
+    async def remove(self, request: Request) -> Response:
+        failure = await self.storage.apply("remove")
+        if failure is not None:
+            return failure
+        prefixes = json.loads(await request.body()).get("prefixes", [])
+        for prefix in prefixes:
+            self.objects.pop(f"{request.path_params['bucket']}/{prefix}", None)
+        return JSONResponse([{"name": prefix} for prefix in prefixes])
+
+    async def stats(self, request: Request) -> Response:
+        return JSONResponse({
+            "db": dict(self.db.counts),
+            "storage": dict(self.storage.counts),
+            "rows": {table: len(rows) for table, rows in self.tables.items()},
+            "objects": len(self.objects),
+        })
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/rest/v1/{table}", self.rest, methods=["GET", "POST", "PATCH", "DELETE"]),
+            Route("/storage/v1/bucket", self.list_buckets, methods=["GET"]),
+            Route("/storage/v1/object/{bucket}/{path:path}", self.upload, methods=["POST", "PUT"]),
+            Route("/storage/v1/object/{bucket}", self.remove, methods=["DELETE"]),
+            Route("/_stats", self.stats, methods=["GET"]),
+        ])
+
+class FakeRelay:
+    """Webhook sink counting delivered notifications"""
+
+    def __init__(self, faults: Faults):
+        self.faults = faults
+        self.received = 0
+        self.bytes = 0
+
+    async def webhook(self, request: Request) -> Response:
+        failure = await self.faults.apply("webhook")
+        if failure is not None:
+            return failure
+        body = await request.body()
+        self.received += 1
+        self.bytes += len(body)
+        return JSONResponse({"status": "ok"})
+
+    async def stats(self, request: Request) -> Response:
+        return JSONResponse({"webhook": dict(self.faults.counts), "received": self.received, "bytes": self.bytes})
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/_stats", self.stats, methods=["GET"]),
+            Route("/{path:path}", self.webhook, methods=["POST"]),
+        ])
+
+class FakeOpenAI:
+    """OpenAI-compatible chat completions, with canned road damage analysis"""
+
+    REPLY = "The image shows a pothole with surface damage and cracks along the edge of the lane."
+
+    def __init__(self, faults: Faults):
+        self.faults = faults
+
+    @staticmethod
+    def _has_image(messages: List[Dict[str, Any]]) -> bool:
+        return any(
+            isinstance(message.get("content"), list)
+            and any(part.get("type") == "image_url" for part in message["content"])
+            for message in messages
+        )
+
+    async def chat_completions(self, request: Request) -> Response:
+        body = json.loads(await request.body())
+        operation = "vision" if self._has_image(body.get("messages", [])) else "chat"
+        failure = await self.faults.apply(operation)
+        if failure is not None:
+            return failure
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        model = body.get("model", "gpt-4")
+
+        if body.get("stream"):
+            async def chunks():
+                for index, word in enumerate(self.REPLY.split(" ")):
+                    delta = {"content": word if index == 0 else f" {word}"}
+                    if index == 0:
+                        delta["role"] = "assistant"
+                    yield "data: " + json.dumps({
+                        "id": completion_id, "object": "chat.completion.chunk", "created": created,
+                        "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+                    }) + "\n\n"
+                yield "data: " + json.dumps({
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created,
+                    "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                }) + "\n\n"
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(chunks(), media_type="text/event-stream")
+
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.REPLY},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+        })
+
+    async def stats(self, request: Request) -> Response:
+        return JSONResponse({"openai": dict(self.faults.counts)})
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/v1/chat/completions", self.chat_completions, methods=["POST"]),
+            Route("/_stats", self.stats, methods=["GET"]),
+        ])
+
+def parse_settings(pairs: Optional[List[str]], default: float = 0.0) -> Dict[str, float]:
+    """Parse ["db=20", "webhook=30"] into a value per service"""
+    settings = dict.fromkeys(SERVICES, default)
+    for pair in pairs or []:
+        name, _, value = pair.partition("=")
+        if name not in settings:
+            raise ValueError(f"Unknown service {name!r}; expected one of {', '.join(SERVICES)}")
+        settings[name] = float(value)
+    return settings
+
+def build_apps(latency: Dict[str, float], errors: Dict[str, float],
+               jitter: Dict[str, float]) -> Dict[str, Starlette]:
+    faults = {name: Faults(latency[name], jitter[name], errors[name]) for name in SERVICES}
+    return {
+        "supabase": FakeSupabase(faults["db"], faults["storage"]).app(),
+        "relay": FakeRelay(faults["webhook"]).app(),
+        "openai": FakeOpenAI(faults["openai"]).app(),
+    }
+
+async def serve(apps: Dict[str, Starlette], ports: Dict[str, int], host: str = "127.0.0.1"):
+    """Run every fake service until cancelled"""
+    servers = [
+        uvicorn.Server(uvicorn.Config(app, host=host, port=ports[name], log_level="warning", access_log=False))
+        for name, app in apps.items()
+    ]
+    await asyncio.gather(*(server.serve() for server in servers))
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Fault-injection options shared with benchmark_load.py"""
+    parser.add_argument("--latency", nargs="*", metavar="SERVICE=MS",
+                        help=f"Response latency in ms per service ({', '.join(SERVICES)})")
+    parser.add_argument("--jitter", nargs="*", metavar="SERVICE=MS",
+                        help="Extra uniform random latency in ms per service")
+    parser.add_argument("--errors", nargs="*", metavar="SERVICE=RATE",
+                        help="Share of requests (0-1) answered with 503 per service")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-ins for Supabase, relay.app and OpenAI")
+    add_arguments(parser)
+    for name, port in DEFAULT_PORTS.items():
+        parser.add_argument(f"--{name}-port", type=int, default=port)
+    args = parser.parse_args()
+
+    apps = build_apps(parse_settings(args.latency), parse_settings(args.errors), parse_settings(args.jitter))
+    ports = {name: getattr(args, f"{name}_port") for name in DEFAULT_PORTS}
+    print("Serving " + ", ".join(f"{name} on :{port}" for name, port in ports.items()), flush=True)
+    try:
+        asyncio.run(serve(apps, ports))
+    except KeyboardInterrupt:
+        pass
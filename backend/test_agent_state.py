@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Check that the workflow's state reducers leave earlier values untouched
+
+Runs a workflow turn and checks that the caller's input dict and the
+report_data of every streamed snapshot keep the fields they had, and that
+an older message log keeps its length after later appends.
+"""
+import os
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.agents import workflow as workflow_module
+from app.agents.state import MessageLog, merge_report_data
+
+def test_merge_returns_a_new_dict():
+    current = {"image": "pothole.jpg"}
+    merged = merge_report_data(current, {"severity": "high"})
+    assert merged == {"image": "pothole.jpg", "severity": "high"}
+    assert current == {"image": "pothole.jpg"}
+    assert merge_report_data(None, {"severity": "low"}) == {"severity": "low"}
+
+def test_turn_does_not_mutate_input_or_snapshots():
+    key = os.environ.pop("OPENAI_API_KEY", None)
+    workflow_module.set_llm(None)
+    try:
+        report_data = {"image": "pothole.jpg"}
+        state = {
+            "step": "analyze_image",
+            "messages": [HumanMessage(content="here is the photo")],
+            "report_data": report_data,
+            "validation_status": "",
+            "next_action": "",
+        }
+        snapshots = [
+            (snapshot["report_data"], dict(snapshot["report_data"]))
+            for snapshot in workflow_module.create_workflow().stream(state, stream_mode="values")
+        ]
+    finally:
+        if key is not None:
+            os.environ["OPENAI_API_KEY"] = key
+
+    assert report_data == {"image": "pothole.jpg"}
+    assert snapshots[-1][0]["image_analyzed"] is True
+    for seen, copied_then in snapshots:
+        assert seen == copied_then
+
+def test_older_message_log_keeps_its_length():
+    first = MessageLog([HumanMessage(content="hi")])
+    second = first.append(AIMessage(content="hello"))
+    third = second.append(HumanMessage(content="pothole"))
+    fork = second.append(HumanMessage(content="crack"))
+    assert [len(log) for log in (first, second, third, fork)] == [1, 2, 3, 3]
+    assert third[-1].content == "pothole" and fork[-1].content == "crack"
+
+if __name__ == "__main__":
+    test_merge_returns_a_new_dict()
+    test_turn_does_not_mutate_input_or_snapshots()
+    test_older_message_log_keeps_its_length()
+    print("Agent state checks passed")
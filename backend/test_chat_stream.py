@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Check the Server-Sent Events of /api/chat/stream
+
+Checks that a turn opens with the session id, that every agent's events
+sit between its node_enter and node_exit, that LLM tokens arrive before
+the complete message they make up, and that the turn ends with next_step
+and done after the session was saved. Runs without an OpenAI key; the
+token check installs a fake chat model.
+"""
+import json
+import os
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from app.agents import workflow as workflow_module
+from app.main import app
+
+@contextmanager
+def _model(model=None):
+    """Run the agents with `model`, or on their fixed replies"""
+    key = os.environ.pop("OPENAI_API_KEY", None)
+    workflow_module.set_llm(model)
+    try:
+        yield
+    finally:
+        workflow_module.set_llm(None)
+        if key is not None:
+            os.environ["OPENAI_API_KEY"] = key
+
+def _events(client, body):
+    """Post one turn; returns its (event, data) pairs in order of arrival"""
+    response = client.post("/api/chat/stream", json=body)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def _check_nesting(events):
+    """Node events only happen while their node is running"""
+    running = set()
+    for event, data in events:
+        if event == "node_enter":
+            assert data["node"] not in running
+            running.add(data["node"])
+        elif event == "node_exit":
+            running.remove(data["node"])
+            assert data["error"] is None
+        elif event in ("token", "message"):
+            assert data["node"] in running, (event, data)
+    assert not running
+
+def test_turn_events_arrive_in_order():
+    client = TestClient(app)
+    with _model():
+        events = _events(client, {"message": "hi"})
+        session_id = events[0][1]["session_id"]
+        assert events[0][0] == "session"
+        assert [event for event, _ in events[-2:]] == ["next_step", "done"]
+        assert events[-1][1] == {"session_id": session_id}
+        assert events[-2][1] == {"next_step": "image", "requires_input": True}
+        _check_nesting(events)
+        assert any(event == "message" and data["node"] == "greeting" for event, data in events)
+
+        # The session was saved before done, so the next turn continues it
+        events = _events(client, {"message": "photo", "session_id": session_id,
+                                  "report_data": {"image": "pothole.jpg"}})
+        assert events[0][1]["session_id"] == session_id
+        assert events[-2][1]["next_step"] == "location"
+
+def test_tokens_arrive_before_their_message():
+    client = TestClient(app)
+    model = GenericFakeChatModel(messages=iter([AIMessage(content="Where did you see it?")]))
+    with _model(model):
+        events = _events(client, {"message": "next", "step": "location",
+                                  "report_data": {"damage_type": "pothole"}})
+    _check_nesting(events)
+    validation = [(event, data["content"]) for event, data in events
+                  if event in ("token", "message") and data["node"] == "validation"]
+    assert len(validation) > 2
+    assert all(event == "token" for event, _ in validation[:-1])
+    assert validation[-1] == ("message", "Where did you see it?")
+    assert "".join(content for _, content in validation[:-1]) == "Where did you see it?"
+
+if __name__ == "__main__":
+    test_turn_events_arrive_in_order()
+    test_tokens_arrive_before_their_message()
+    print("Chat stream checks passed")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Check CompressionMiddleware content negotiation
+
+Drives the middleware with small ASGI apps: large JSON bodies are gzipped
+(through compressobj, so this runs on every supported Python), small bodies
+and Server-Sent Events pass through, a client that only accepts br never
+receives gzip, and streamed bodies are compressed with the negotiated
+encoding chunk by chunk. The brotli cases run only when brotli is installed.
+"""
+import asyncio
+import gzip
+import zlib
+
+from app.services import compression as compression_module
+from app.services.compression import CompressionMiddleware
+
+LARGE = b'{"reports": [' + b'{"id": 1, "status": "pending"}, ' * 200 + b'{}]}'
+CHUNKS = [b'{"id": %d, "status": "pending"}\n' % i * 50 for i in range(3)]
+
+def _app(content_type, chunks):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", content_type), (b"etag", b'"v1"')]})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+    return app
+
+def _request(app, accept_encoding):
+    """Run one request; returns the response headers and the body messages"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    headers = [(b"accept-encoding", accept_encoding.encode("latin-1"))] if accept_encoding else []
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+    asyncio.run(CompressionMiddleware(app)(scope, receive, send))
+    return dict(messages[0]["headers"]), [message["body"] for message in messages[1:]]
+
+def test_large_body_is_gzipped():
+    headers, bodies = _request(_app(b"application/json", [LARGE]), "gzip, deflate")
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"etag"] == b'W/"v1"'
+    assert int(headers[b"content-length"]) == len(bodies[0])
+    assert gzip.decompress(bodies[0]) == LARGE
+
+def test_small_body_and_event_streams_pass_through():
+    headers, bodies = _request(_app(b"application/json", [b'{"ok": true}']), "gzip")
+    assert b"content-encoding" not in headers and bodies == [b'{"ok": true}']
+
+    headers, bodies = _request(_app(b"text/event-stream", [LARGE]), "gzip")
+    assert b"content-encoding" not in headers and bodies == [LARGE]
+
+def test_no_gzip_for_clients_that_only_accept_br():
+    for content_type, chunks in ((b"application/json", [LARGE]), (b"application/x-ndjson", CHUNKS)):
+        headers, bodies = _request(_app(content_type, chunks), "br")
+        if compression_module.brotli is None:
+            assert b"content-encoding" not in headers
+            assert bodies == chunks
+        else:
+            assert headers[b"content-encoding"] == b"br"
+            assert compression_module.brotli.decompress(b"".join(bodies)) == b"".join(chunks)
+
+def test_streamed_body_is_compressed_per_chunk():
+    headers, bodies = _request(_app(b"application/x-ndjson", CHUNKS), "gzip")
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    assert len(bodies) == len(CHUNKS)
+    # Every chunk decodes on arrival, before the stream ends
+    decoder = zlib.decompressobj(31)
+    for chunk, body in zip(CHUNKS, bodies):
+        assert decoder.decompress(body) == chunk
+
+    if compression_module.brotli is not None:
+        headers, bodies = _request(_app(b"application/x-ndjson", CHUNKS), "br;q=1.0, gzip;q=0.5")
+        assert headers[b"content-encoding"] == b"br"
+        decoder = compression_module.brotli.Decompressor()
+        for chunk, body in zip(CHUNKS, bodies):
+            assert decoder.process(body) == chunk
+
+def test_gzip_refused_with_q_zero():
+    headers, _ = _request(_app(b"application/json", [LARGE]), "gzip;q=0, identity")
+    assert b"content-encoding" not in headers
+
+if __name__ == "__main__":
+    test_large_body_is_gzipped()
+    test_small_body_and_event_streams_pass_through()
+    test_no_gzip_for_clients_that_only_accept_br()
+    test_streamed_body_is_compressed_per_chunk()
+    test_gzip_refused_with_q_zero()
+    print("Compression negotiation checks passed")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Check the streamed report export formats
+
+Feeds pages of report rows through ExportService and checks that NDJSON,
+CSV and GeoJSON decode back to the rows across page boundaries (including
+empty pages), that the CSV header goes out before the first page is read,
+and that a gzipped export decodes chunk by chunk as it arrives.
+"""
+import csv
+import io
+import json
+import zlib
+from contextlib import contextmanager
+
+from app.schemas.report import ExportFormat
+from app.services import export_service as export_module
+from app.services.export_service import export_service
+
+PAGES = [
+    [
+        {"id": "r1", "status": "pending", "severity": "high", "location_lat": 40.7, "location_lng": -74.0,
+         "location_address": "1 Main Street, Springfield", "remarks": 'a "deep" one'},
+        {"id": "r2", "status": "resolved", "severity": "low", "location_lat": 40.8, "location_lng": -73.9,
+         "location_address": None, "remarks": None},
+    ],
+    [],
+    [
+        {"id": "r3", "status": "submitted", "severity": "medium", "location_lat": 41.0, "location_lng": -74.1,
+         "location_address": "Route 9", "remarks": "line one\nline two"},
+    ],
+]
+ROWS = [row for page in PAGES for row in page]
+
+@contextmanager
+def _pages(pages):
+    """Serve the export from `pages` instead of the reports table"""
+    service = export_module.supabase_service
+    service.iter_report_pages = lambda filters=None: iter(pages)
+    try:
+        yield
+    finally:
+        del service.iter_report_pages
+
+def _export(export_format, compress=False):
+    with _pages(PAGES):
+        return list(export_service.stream(export_format, compress=compress))
+
+def test_ndjson_round_trips():
+    chunks = _export(ExportFormat.NDJSON)
+    assert len(chunks) == len(PAGES)
+    assert [json.loads(line) for line in b"".join(chunks).splitlines()] == ROWS
+
+def test_csv_header_comes_first_and_rows_round_trip():
+    read = []
+
+    def pages():
+        read.append(True)
+        yield from PAGES
+
+    with _pages(pages()):
+        chunks = export_service.stream(ExportFormat.CSV)
+        header = next(chunks)
+        assert not read
+        body = header + b"".join(chunks)
+
+    assert header.decode("utf-8").strip() == ",".join(export_service.CSV_COLUMNS)
+    parsed = list(csv.DictReader(io.StringIO(body.decode("utf-8"))))
+    assert [row["id"] for row in parsed] == ["r1", "r2", "r3"]
+    assert parsed[0]["remarks"] == 'a "deep" one' and parsed[2]["remarks"] == "line one\nline two"
+    assert parsed[1]["location_address"] == ""
+
+def test_geojson_is_one_valid_collection():
+    collection = json.loads(b"".join(_export(ExportFormat.GEOJSON)))
+    assert collection["type"] == "FeatureCollection"
+    features = collection["features"]
+    assert [feature["properties"]["id"] for feature in features] == ["r1", "r2", "r3"]
+    assert features[0]["geometry"] == {"type": "Point", "coordinates": [-74.0, 40.7]}
+    assert "location_lat" not in features[0]["properties"]
+
+def test_gzipped_export_decodes_as_it_arrives():
+    plain = _export(ExportFormat.NDJSON)
+    chunks = _export(ExportFormat.NDJSON, compress=True)
+    decoder = zlib.decompressobj(31)
+    # Every non-empty page can be read before the next chunk arrives
+    decoded = [decoder.decompress(chunk) for chunk in chunks]
+    assert [chunk for chunk in decoded if chunk] == [chunk for chunk in plain if chunk]
+    assert decoder.eof
+
+if __name__ == "__main__":
+    test_ndjson_round_trips()
+    test_csv_header_comes_first_and_rows_round_trip()
+    test_geojson_is_one_valid_collection()
+    test_gzipped_export_decodes_as_it_arrives()
+    print("Export checks passed")
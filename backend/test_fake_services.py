@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Check the load-test stand-ins in fake_services.py
+
+The fake PostgREST must filter, order, page, upsert and patch the way the
+backend's queries expect, error injection must answer 503 and be counted,
+and the fake OpenAI stream must add up to the same reply as the plain
+completion. Everything runs in process; no ports are opened.
+"""
+import json
+
+from starlette.testclient import TestClient
+
+from fake_services import FakeOpenAI, build_apps, parse_settings
+
+def _clients(errors=None):
+    apps = build_apps(parse_settings(None), parse_settings(errors), parse_settings(None))
+    return {name: TestClient(app) for name, app in apps.items()}
+
+def test_rest_filters_orders_and_pages():
+    supabase = _clients()["supabase"]
+    rows = [{"id": f"r{n}", "status": status, "severity": "high"}
+            for n, status in enumerate(["pending", "resolved", "pending", "in_progress"])]
+    assert supabase.post("/rest/v1/reports", json=rows).status_code == 201
+
+    found = supabase.get("/rest/v1/reports", params={
+        "select": "id,status", "status": "in.(pending,in_progress)", "order": "id.desc", "limit": "2"
+    }).json()
+    assert found == [{"id": "r3", "status": "in_progress"}, {"id": "r2", "status": "pending"}]
+    assert [row["id"] for row in supabase.get("/rest/v1/reports", params={"id": "gt.r1", "order": "id"}).json()] \
+        == ["r2", "r3"]
+
+    patched = supabase.patch("/rest/v1/reports", params={"status": "eq.pending"}, json={"status": "resolved"})
+    assert [row["id"] for row in patched.json()] == ["r0", "r2"]
+    assert supabase.get("/_stats").json()["rows"] == {"reports": 4}
+
+def test_upserts_honour_conflict_resolution():
+    supabase = _clients()["supabase"]
+    supabase.post("/rest/v1/reports", json={"id": "r1", "status": "pending"})
+
+    conflict = supabase.post("/rest/v1/reports", json={"id": "r1", "status": "resolved"})
+    assert conflict.status_code == 409 and conflict.json()["code"] == "23505"
+    ignored = supabase.post("/rest/v1/reports", json=[{"id": "r1", "status": "resolved"}],
+                            headers={"Prefer": "resolution=ignore-duplicates"})
+    assert ignored.json() == []
+    merged = supabase.post("/rest/v1/reports", json=[{"id": "r1", "status": "resolved"}],
+                           headers={"Prefer": "resolution=merge-duplicates,return=minimal"})
+    assert merged.status_code == 201 and merged.json() is None
+    assert supabase.get("/rest/v1/reports", params={"id": "eq.r1"}).json()[0]["status"] == "resolved"
+
+def test_injected_errors_are_counted():
+    relay = _clients(errors=["webhook=1"])["relay"]
+    for _ in range(3):
+        assert relay.post("/hooks/report", json={"id": "r1"}).status_code == 503
+    stats = relay.get("/_stats").json()
+    assert stats["received"] == 0
+    assert stats["webhook"] == {"webhook": 3, "webhook_injected_errors": 3}
+
+    try:
+        parse_settings(["database=20"])
+        raise AssertionError("an unknown service was accepted")
+    except ValueError:
+        pass
+
+def test_openai_stream_matches_completion():
+    openai = _clients()["openai"]
+    body = {"model": "gpt-4", "messages": [{"role": "user", "content": "hi"}]}
+    reply = openai.post("/v1/chat/completions", json=body).json()["choices"][0]["message"]["content"]
+
+    streamed = openai.post("/v1/chat/completions", json={**body, "stream": True}).text
+    events = [line[len("data: "):] for line in streamed.splitlines() if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(event)["choices"][0] for event in events[:-1]]
+    assert "".join(chunk["delta"].get("content", "") for chunk in chunks) == reply == FakeOpenAI.REPLY
+    assert chunks[-1]["finish_reason"] == "stop"
+
+    vision = {**body, "messages": [{"role": "user", "content": [
+        {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}}
+    ]}]}
+    openai.post("/v1/chat/completions", json=vision)
+    assert openai.get("/_stats").json()["openai"] == {"chat": 2, "vision": 1}
+
+if __name__ == "__main__":
+    test_rest_filters_orders_and_pages()
+    test_upserts_honour_conflict_resolution()
+    test_injected_errors_are_counted()
+    test_openai_stream_matches_completion()
+    print("Fake services checks passed")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Check Idempotency-Key handling in IdempotencyStore
+
+Covers replay of a completed key, rejection of a key reused for another
+payload, retries waiting for the original attempt, release after a failed
+attempt, two workers sharing one SQLite backend, takeover of an abandoned
+attempt, and expiry and purging of old keys by the background loop.
+"""
+import asyncio
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from app.services.idempotency_store import (
+    IdempotencyStore, SQLiteIdempotencyBackend, IdempotencyKeyMismatch, IdempotencyKeyInFlight
+)
+
+@contextmanager
+def _db_path():
+    with tempfile.TemporaryDirectory() as directory:
+        yield os.path.join(directory, "idempotency.db")
+
+def _rows(backend):
+    return backend._conn.execute("SELECT COUNT(*) FROM idempotency_keys").fetchone()[0]
+
+def test_completed_key_replays_and_rejects_other_payload():
+    async def scenario():
+        store = IdempotencyStore()
+        assert await store.begin("k1", "payload-a") is None
+        await store.complete("k1", "payload-a", 201, {"report_id": "r1"})
+
+        record = await store.begin("k1", "payload-a")
+        assert record["status_code"] == 201 and record["body"] == {"report_id": "r1"}
+        try:
+            await store.begin("k1", "payload-b")
+            raise AssertionError("a reused key with another payload was accepted")
+        except IdempotencyKeyMismatch:
+            pass
+
+    asyncio.run(scenario())
+
+def test_retry_waits_for_the_original_attempt():
+    async def scenario():
+        store = IdempotencyStore()
+        assert await store.begin("k1", "payload") is None
+        retry = asyncio.create_task(store.begin("k1", "payload"))
+        await asyncio.sleep(0.05)
+        assert not retry.done()
+
+        await store.complete("k1", "payload", 200, {"ok": True})
+        assert (await retry)["body"] == {"ok": True}
+
+    asyncio.run(scenario())
+
+def test_retry_gives_up_after_lock_timeout():
+    async def scenario():
+        store = IdempotencyStore(lock_timeout=0.05)
+        assert await store.begin("k1", "payload") is None
+        try:
+            await store.begin("k1", "payload")
+            raise AssertionError("the retry did not time out")
+        except IdempotencyKeyInFlight:
+            pass
+
+    asyncio.run(scenario())
+
+def test_released_key_runs_again():
+    async def scenario():
+        with _db_path() as path:
+            store = IdempotencyStore(backend=SQLiteIdempotencyBackend(path))
+            assert await store.begin("k1", "payload") is None
+            waiting = asyncio.create_task(store.begin("k1", "payload"))
+            await asyncio.sleep(0.01)
+            await store.release("k1")
+            # The waiting retry becomes the attempt that runs
+            assert await waiting is None
+            assert _rows(store.backend) == 1
+
+    asyncio.run(scenario())
+
+def test_workers_share_keys_through_sqlite():
+    async def scenario():
+        with _db_path() as path:
+            first = IdempotencyStore(backend=SQLiteIdempotencyBackend(path))
+            second = IdempotencyStore(backend=SQLiteIdempotencyBackend(path))
+
+            assert await first.begin("k1", "payload") is None
+            retry = asyncio.create_task(second.begin("k1", "payload"))
+            await asyncio.sleep(0.15)
+            assert not retry.done()
+
+            await first.complete("k1", "payload", 201, {"report_id": "r1"})
+            assert (await retry)["body"] == {"report_id": "r1"}
+            try:
+                await second.begin("k1", "other payload")
+                raise AssertionError("a reused key with another payload was accepted")
+            except IdempotencyKeyMismatch:
+                pass
+
+    asyncio.run(scenario())
+
+def test_abandoned_attempt_is_taken_over():
+    with _db_path() as path:
+        backend = SQLiteIdempotencyBackend(path, lock_timeout=0.05)
+        assert backend.claim("k1", "payload") == ("acquired", None)
+        assert backend.claim("k1", "payload")[0] == "in_flight"
+        time.sleep(0.06)
+        # The worker holding the key died; the next request runs it
+        assert backend.claim("k1", "payload") == ("acquired", None)
+
+def test_expired_keys_are_purged():
+    async def scenario():
+        with _db_path() as path:
+            backend = SQLiteIdempotencyBackend(path, ttl=0.05)
+            backend.claim("old", "payload")
+            backend.complete("old", {"fingerprint": "payload", "status_code": 200, "body": {}, "headers": {}})
+            time.sleep(0.06)
+            backend.claim("new", "payload")
+
+            # An expired record is not replayed
+            assert backend.claim("old", "payload") == ("acquired", None)
+            backend.release("old")
+
+            store = IdempotencyStore(backend=backend, purge_interval=0.01)
+            store.start()
+            await asyncio.sleep(0.1)
+            await store.stop()
+            assert backend._conn.execute("SELECT key FROM idempotency_keys").fetchall() == []
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    test_completed_key_replays_and_rejects_other_payload()
+    test_retry_waits_for_the_original_attempt()
+    test_retry_gives_up_after_lock_timeout()
+    test_released_key_runs_again()
+    test_workers_share_keys_through_sqlite()
+    test_abandoned_attempt_is_taken_over()
+    test_expired_keys_are_purged()
+    print("Idempotency store checks passed")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Check InsertBatcher write coalescing
+
+Covers concurrent submits sharing one insert, the row cap starting a batch
+early, a failed batch being retried row by row so only the bad caller sees
+the error, close() flushing rows still waiting for the timer, and callers
+of a cancelled flush getting an error instead of waiting forever.
+"""
+import asyncio
+import threading
+
+from app.services.write_buffer import InsertBatcher
+
+class FakeTable:
+    """Records each insert; refuses rows marked bad"""
+
+    def __init__(self):
+        self.inserts = []
+
+    def insert(self, rows):
+        self.inserts.append([row["n"] for row in rows])
+        if any(row.get("bad") for row in rows):
+            raise ValueError("bad row")
+        return [dict(row, id=f"id-{row['n']}") for row in rows]
+
+def test_concurrent_submits_share_an_insert():
+    async def scenario():
+        table = FakeTable()
+        batcher = InsertBatcher(table.insert, max_rows=50, max_delay_ms=10)
+        stored = await asyncio.gather(*(batcher.submit({"n": n}) for n in range(5)))
+        assert [row["id"] for row in stored] == [f"id-{n}" for n in range(5)]
+        assert table.inserts == [[0, 1, 2, 3, 4]]
+        assert batcher.stats()["rows_per_batch"] == 5.0
+
+    asyncio.run(scenario())
+
+def test_row_cap_starts_a_batch():
+    async def scenario():
+        table = FakeTable()
+        batcher = InsertBatcher(table.insert, max_rows=3, max_delay_ms=10)
+        await asyncio.gather(*(batcher.submit({"n": n}) for n in range(7)))
+        assert table.inserts == [[0, 1, 2], [3, 4, 5], [6]]
+
+    asyncio.run(scenario())
+
+def test_failed_batch_only_fails_the_bad_row():
+    async def scenario():
+        table = FakeTable()
+        batcher = InsertBatcher(table.insert, max_delay_ms=10)
+        results = await asyncio.gather(
+            batcher.submit({"n": 0}), batcher.submit({"n": 1, "bad": True}), batcher.submit({"n": 2}),
+            return_exceptions=True
+        )
+        assert results[0]["id"] == "id-0" and results[2]["id"] == "id-2"
+        assert isinstance(results[1], ValueError)
+        assert table.inserts == [[0, 1, 2], [0], [1], [2]]
+
+    asyncio.run(scenario())
+
+def test_close_flushes_waiting_rows():
+    async def scenario():
+        table = FakeTable()
+        batcher = InsertBatcher(table.insert, max_delay_ms=60_000)
+        waiting = asyncio.create_task(batcher.submit({"n": 0}))
+        await asyncio.sleep(0.01)
+        assert table.inserts == []
+        await batcher.close()
+        assert (await waiting)["id"] == "id-0"
+
+    asyncio.run(scenario())
+
+def test_cancelled_flush_fails_its_callers():
+    release = threading.Event()
+
+    def blocking_insert(rows):
+        release.wait(5)
+        return rows
+
+    async def scenario():
+        batcher = InsertBatcher(blocking_insert, max_delay_ms=1)
+        waiting = asyncio.create_task(batcher.submit({"n": 0}))
+        await asyncio.sleep(0.05)
+        for task in list(batcher._flushes):
+            task.cancel()
+        try:
+            await asyncio.wait_for(waiting, 1)
+            raise AssertionError("the caller of a cancelled flush got a row")
+        except RuntimeError:
+            pass
+        finally:
+            # Let the worker thread finish so the loop can shut down
+            release.set()
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    test_concurrent_submits_share_an_insert()
+    test_row_cap_starts_a_batch()
+    test_failed_batch_only_fails_the_bad_row()
+    test_close_flushes_waiting_rows()
+    test_cancelled_flush_fails_its_callers()
+    print("Insert batcher checks passed")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Check that agent LLM calls are answered from the response cache
+
+Installs a counting fake chat model behind CachedChatModel and runs two
+identical workflow turns: the validation agent's call goes to the model the
+first time and is a cache hit, counted for the validation node, the second.
+"""
+from typing import Any, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.agents import workflow as workflow_module
+from app.agents.llm_cache import CachedChatModel, LLMResponseCache
+
+class CountingChatModel(BaseChatModel):
+    """Answers every prompt with the same text and counts the calls"""
+
+    calls: int = 0
+    temperature: float = 0.7
+    model_name: str = "counting-chat"
+
+    @property
+    def _llm_type(self) -> str:
+        return "counting-chat"
+
+    def _generate(self, messages: List[Any], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="Could you share the location?"))])
+
+def _turn():
+    return {
+        "step": "location",
+        "messages": [],
+        "report_data": {"image": "uploads/test.jpg", "damage_type": "pothole", "severity": "high"},
+        "validation_status": "",
+        "next_action": "",
+    }
+
+def test_validation_reply_is_cached():
+    model = CountingChatModel()
+    cache = LLMResponseCache(db_path=None)
+    workflow_module.set_llm(CachedChatModel(model, cache))
+    try:
+        graph = workflow_module.create_workflow()
+        first = graph.invoke(_turn())
+        second = graph.invoke(_turn())
+    finally:
+        workflow_module.set_llm(None)
+
+    assert model.calls == 1
+    assert first["messages"][-1].content == "Could you share the location?"
+    assert second["messages"][-1].content == first["messages"][-1].content
+    counters = cache.stats()["nodes"]["validation"]
+    assert counters["misses"] == 1 and counters["hits"] == 1 and counters["bypassed"] == 0
+
+def test_sampled_calls_bypass_the_cache():
+    model = CountingChatModel()
+    cache = LLMResponseCache(db_path=None)
+    cached = CachedChatModel(model, cache)
+    prompt = [AIMessage(content="hello")]
+    cached.invoke(prompt, node="greeting")
+    cached.invoke(prompt, node="greeting")
+    cached.invoke(prompt, node="greeting", temperature=0)
+    cached.invoke(prompt, node="greeting", temperature=0)
+
+    assert model.calls == 3
+    assert cache.stats()["nodes"]["greeting"] == {"hits": 1, "misses": 1, "bypassed": 2, "hit_rate": 0.5}
+
+if __name__ == "__main__":
+    test_validation_reply_is_cached()
+    test_sampled_calls_bypass_the_cache()
+    print("LLM response cache checks passed")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Check request correlation ids and the structured log pipeline
+
+RequestContextMiddleware keeps a client's X-Request-ID (or makes one up),
+exposes it to the handler and to worker threads, and echoes it back.
+Records pass through the queue handler with their message rendered and the
+request id attached, sampled success logs are dropped while warnings are
+kept, and the JSON formatter emits the extra fields.
+"""
+import asyncio
+import json
+import logging
+import queue
+
+from app.services.logging_service import (
+    ContextFilter, JsonFormatter, NonBlockingQueueHandler, RequestContextMiddleware, request_id_var
+)
+
+def _request(app, request_id=None):
+    """Run one request; returns the response headers"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    headers = [(b"x-request-id", request_id.encode("latin-1"))] if request_id else []
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+    asyncio.run(RequestContextMiddleware(app)(scope, receive, send))
+    return dict(messages[0]["headers"])
+
+def _pipeline(sample_rate=1.0):
+    """A logger feeding a queue the way configure_logging sets it up"""
+    records = queue.SimpleQueue()
+    handler = NonBlockingQueueHandler(records)
+    handler.addFilter(ContextFilter(sample_rate))
+    logger = logging.getLogger(f"test_logging.{sample_rate}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger, records
+
+def _drain(records):
+    found = []
+    while not records.empty():
+        found.append(records.get())
+    return found
+
+def test_request_id_reaches_handler_and_threads():
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(request_id_var.get())
+        seen.append(await asyncio.to_thread(request_id_var.get))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    headers = _request(app, "client-id-1")
+    assert headers[b"x-request-id"] == b"client-id-1"
+    assert seen == ["client-id-1", "client-id-1"]
+
+    headers = _request(app)
+    generated = headers[b"x-request-id"].decode("latin-1")
+    assert len(generated) == 32 and seen[-1] == generated
+    assert request_id_var.get() is None
+
+def test_records_carry_request_id_and_extras():
+    logger, records = _pipeline()
+    token = request_id_var.set("req-7")
+    try:
+        logger.info("Report %s stored", "r1", extra={"stages_ms": {"insert": 12.5}})
+        try:
+            raise ValueError("bad row")
+        except ValueError:
+            logger.exception("Insert failed")
+    finally:
+        request_id_var.reset(token)
+
+    stored, failed = _drain(records)
+    # Rendered on the caller's side, so the listener needs no arguments
+    assert stored.msg == "Report r1 stored" and stored.args is None
+    entry = json.loads(JsonFormatter().format(stored))
+    assert entry["message"] == "Report r1 stored"
+    assert entry["request_id"] == "req-7" and entry["stages_ms"] == {"insert": 12.5}
+    assert entry["level"] == "INFO"
+
+    entry = json.loads(JsonFormatter().format(failed))
+    assert entry["level"] == "ERROR" and "ValueError: bad row" in entry["exception"]
+
+def test_sampled_success_logs_are_dropped():
+    logger, records = _pipeline(sample_rate=0.0)
+    logger.info("Report submitted", extra={"sample": True})
+    logger.warning("Webhook failed", extra={"sample": True})
+    logger.info("Startup complete")
+    assert [record.msg for record in _drain(records)] == ["Webhook failed", "Startup complete"]
+
+if __name__ == "__main__":
+    test_request_id_reaches_handler_and_threads()
+    test_records_carry_request_id_and_extras()
+    test_sampled_success_logs_are_dropped()
+    print("Logging checks passed")
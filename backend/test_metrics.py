@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Check the Prometheus route and dependency metrics
+
+Requests go through the app, so routes are labelled by their template,
+paths that match no route share the "unmatched" label, and /metrics
+serves the samples. track_dependency times both successful and failing
+calls and counts failures by exception type.
+"""
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.main import app
+from app.services.metrics import track_dependency, UNMATCHED_ROUTE
+
+def _count(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_routes_are_labelled_by_template():
+    client = TestClient(app)
+    route = {"method": "GET", "route": "/api/reports/{report_id}", "status": "404"}
+    unmatched = {"method": "GET", "route": UNMATCHED_ROUTE, "status": "404"}
+    before = _count("http_request_duration_seconds_count", **route)
+    before_unmatched = _count("http_request_duration_seconds_count", **unmatched)
+
+    # Invalid ids are answered without a database call
+    for report_id in ("not-a-uuid", "also-not-a-uuid"):
+        assert client.get(f"/api/reports/{report_id}").status_code == 404
+    assert client.get("/wp-login.php").status_code == 404
+
+    assert _count("http_request_duration_seconds_count", **route) == before + 2
+    assert _count("http_request_duration_seconds_count", **unmatched) == before_unmatched + 1
+    assert _count("http_requests_in_flight") == 0
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'route="/api/reports/{report_id}"' in response.text
+    assert "/wp-login.php" not in response.text
+
+def test_dependency_calls_are_timed_and_failures_counted():
+    labels = {"dependency": "test_dependency", "operation": "lookup"}
+    errors = dict(labels, error="TimeoutError")
+
+    with track_dependency("test_dependency", "lookup"):
+        pass
+    try:
+        with track_dependency("test_dependency", "lookup"):
+            raise TimeoutError("no answer")
+        raise AssertionError("the failure was swallowed")
+    except TimeoutError:
+        pass
+
+    assert _count("dependency_request_duration_seconds_count", **labels) == 2
+    assert _count("dependency_request_errors_total", **errors) == 1
+    assert _count("dependency_requests_in_flight", dependency="test_dependency") == 0
+
+if __name__ == "__main__":
+    test_routes_are_labelled_by_template()
+    test_dependency_calls_are_timed_and_failures_counted()
+    print("Metrics checks passed")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Check the columnar open reports index
+
+Covers changes that arrive while a reload is scanning the table, a failed
+reload keeping the current contents, removals keeping the id-to-row map
+consistent, listener events, and filtered and nearby queries against a
+plain Python scan of the same rows.
+"""
+import math
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.services.open_reports_index import OpenReportsIndex
+
+NOW = datetime.now(timezone.utc)
+
+def _row(report_id=None, status="pending", **fields):
+    row = {
+        "id": report_id or str(uuid.uuid4()),
+        "status": status,
+        "damage_type": "pothole",
+        "severity": "high",
+        "location_lat": 40.0,
+        "location_lng": -74.0,
+        "location_address": "1 Main Street",
+        "created_at": NOW.isoformat(),
+    }
+    row.update(fields)
+    return row
+
+def _random_rows(count):
+    random.seed(11)
+    return [
+        _row(
+            status=random.choice(["pending", "submitted", "in_progress"]),
+            damage_type=random.choice(["pothole", "crack", "debris", "other"]),
+            severity=random.choice(["low", "medium", "high"]),
+            location_lat=40 + random.random() * 0.05,
+            location_lng=-74 + random.random() * 0.05,
+            created_at=(NOW - timedelta(hours=random.random() * 500)).isoformat(),
+        )
+        for _ in range(count)
+    ]
+
+def _haversine(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    return 2 * 6_371_000 * math.asin(math.sqrt(a))
+
+def _assert_consistent(index):
+    assert index.size == len(index.ids) == len(index.addresses) == len(index._positions)
+    for position, report_id in enumerate(index.ids):
+        assert index._positions[report_id] == position
+
+def test_reload_replays_changes_made_during_the_scan():
+    index = OpenReportsIndex()
+    index.load([[_row("r1"), _row("r2")]])
+    events = []
+    index.add_listener(lambda event, ids: events.append((event, ids)))
+
+    def pages():
+        # This page was read before the changes below
+        yield [_row("r1"), _row("r2")]
+        index.on_change("created", [_row("r3")])
+        index.on_change("status_changed", [{"id": "r1", "status": "resolved"}])
+        index.on_change("status_changed", [{"id": "r2", "status": "in_progress"}])
+        yield []
+
+    index.load(pages())
+    assert sorted(index.ids) == ["r2", "r3"]
+    assert index.row(index.position("r2"))["status"] == "in_progress"
+    assert index._reload_changes is None
+    assert events[-1] == ("reloaded", [])
+    assert ("changed", ["r1"]) in events
+    _assert_consistent(index)
+
+def test_failed_reload_keeps_current_contents():
+    index = OpenReportsIndex()
+    index.load([[_row("r1")]])
+
+    def pages():
+        yield [_row("r2")]
+        raise RuntimeError("database went away")
+
+    try:
+        index.load(pages())
+        raise AssertionError("the failed reload was not reported")
+    except RuntimeError:
+        pass
+    assert index.ids == ["r1"]
+    assert index._reload_changes is None
+    # Changes are applied directly again, not buffered for a reload
+    index.on_change("created", [_row("r3")])
+    assert sorted(index.ids) == ["r1", "r3"]
+
+def test_removals_keep_positions_consistent():
+    rows = _random_rows(300)
+    index = OpenReportsIndex(capacity=16)
+    index.load([rows[:150], rows[150:]])
+    assert index.size == 300
+
+    random.seed(5)
+    closed = random.sample(rows, 120)
+    for row in closed:
+        index.on_change("status_changed", [{"id": row["id"], "status": "closed"}])
+    _assert_consistent(index)
+    assert set(index.ids) == {row["id"] for row in rows} - {row["id"] for row in closed}
+
+    # A status change inside the open set keeps the other indexed fields
+    survivor = next(row for row in rows if row["id"] in index._positions)
+    index.on_change("status_changed", [{"id": survivor["id"], "status": "in_progress"}])
+    kept = index.row(index.position(survivor["id"]))
+    assert kept["status"] == "in_progress" and kept["severity"] == survivor["severity"]
+
+def test_queries_match_a_plain_scan():
+    rows = _random_rows(2000)
+    index = OpenReportsIndex()
+    index.load([rows])
+
+    total, found = index.query(severity="high", damage_type="crack", limit=5000)
+    expected = [row for row in rows if row["severity"] == "high" and row["damage_type"] == "crack"]
+    assert total == len(expected) == len(found)
+    created = [item["created_at"] for item in found]
+    assert created == sorted(created, reverse=True)
+
+    bbox = (40.01, -73.99, 40.03, -73.97)
+    total, _ = index.query(bbox=bbox, limit=1)
+    assert total == sum(
+        1 for row in rows
+        if bbox[0] <= row["location_lat"] <= bbox[2] and bbox[1] <= row["location_lng"] <= bbox[3]
+    )
+
+    center = (40.025, -73.975, 800.0)
+    total, found = index.query(near=center, limit=5000)
+    assert total == sum(
+        1 for row in rows if _haversine(center[0], center[1], row["location_lat"], row["location_lng"]) <= center[2]
+    )
+    distances = [item["distance_m"] for item in found]
+    assert distances == sorted(distances) and distances[-1] <= center[2]
+
+if __name__ == "__main__":
+    test_reload_replays_changes_made_during_the_scan()
+    test_failed_reload_keeps_current_contents()
+    test_removals_keep_positions_consistent()
+    test_queries_match_a_plain_scan()
+    print("Open reports index checks passed")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Check AdmissionControlMiddleware and the rate limit backends
+
+Drives the middleware with small ASGI apps: a client that spends its
+bucket gets 429 with Retry-After while other clients and routes outside
+/api are unaffected, requests over the in-flight cap get 503 except on
+streaming routes, a failing backend lets requests through, and the SQLite
+backend shares buckets between workers and purges the ones that refilled.
+"""
+import asyncio
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from app.services.rate_limiter import AdmissionControlMiddleware, RateLimiter, SQLiteRateLimitBackend
+
+async def _ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+@contextmanager
+def _db_path():
+    with tempfile.TemporaryDirectory() as directory:
+        yield os.path.join(directory, "rate_limit.db")
+
+async def _request(middleware, method, path, api_key=None, client="10.0.0.1"):
+    """Run one request; returns the status and the response headers"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    headers = [(b"x-api-key", api_key.encode("latin-1"))] if api_key else []
+    scope = {"type": "http", "method": method, "path": path, "headers": headers, "client": (client, 5000)}
+    await middleware(scope, receive, send)
+    return messages[0]["status"], dict(messages[0]["headers"])
+
+def test_spent_bucket_gets_429():
+    async def scenario():
+        middleware = AdmissionControlMiddleware(_ok, limiter=RateLimiter(rate=1, burst=10))
+        # POST /api/chat costs 2 tokens
+        for _ in range(5):
+            assert (await _request(middleware, "POST", "/api/chat"))[0] == 200
+        status, headers = await _request(middleware, "POST", "/api/chat")
+        assert status == 429 and headers[b"retry-after"] == b"2"
+
+        # Other clients, API keys and unlimited routes are not affected
+        assert (await _request(middleware, "POST", "/api/chat", client="10.0.0.2"))[0] == 200
+        assert (await _request(middleware, "POST", "/api/chat", api_key="k1"))[0] == 200
+        assert (await _request(middleware, "GET", "/health"))[0] == 200
+
+    asyncio.run(scenario())
+
+def test_in_flight_cap_skips_streaming_routes():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow(scope, receive, send):
+            await release.wait()
+            await _ok(scope, receive, send)
+
+        middleware = AdmissionControlMiddleware(slow, limiter=RateLimiter(rate=0), max_in_flight=1)
+        first = asyncio.create_task(_request(middleware, "GET", "/api/reports"))
+        await asyncio.sleep(0.01)
+
+        status, headers = await _request(middleware, "GET", "/api/reports")
+        assert status == 503 and headers[b"retry-after"] == b"1"
+        stream = asyncio.create_task(_request(middleware, "POST", "/api/chat/stream"))
+        await asyncio.sleep(0.01)
+        assert not stream.done()
+
+        release.set()
+        assert (await first)[0] == 200 and (await stream)[0] == 200
+        assert middleware.in_flight == 0
+
+    asyncio.run(scenario())
+
+def test_failing_backend_admits_requests():
+    class BrokenBackend:
+        def take(self, key, cost, rate, burst):
+            raise RuntimeError("database is locked")
+
+    async def scenario():
+        limiter = RateLimiter(rate=1, burst=1, backend=BrokenBackend())
+        middleware = AdmissionControlMiddleware(_ok, limiter=limiter)
+        for _ in range(3):
+            assert (await _request(middleware, "POST", "/api/reports/submit"))[0] == 200
+
+    asyncio.run(scenario())
+
+def test_sqlite_buckets_are_shared_and_purged():
+    with _db_path() as path:
+        first, second = SQLiteRateLimitBackend(path), SQLiteRateLimitBackend(path)
+        assert first.take("ip:a", 5, rate=100, burst=10) == 0
+        # The other worker sees the spent tokens
+        assert second.take("ip:a", 10, rate=100, burst=10) > 0
+        assert second.take("ip:b", 10, rate=100, burst=10) == 0
+
+        time.sleep(0.06)
+        # ip:a was missing 5 tokens and has refilled; ip:b was missing 10
+        assert first.purge_full(rate=100, burst=10) == 1
+        keys = first._conn.execute("SELECT key FROM rate_limit_buckets").fetchall()
+        assert keys == [("ip:b",)]
+
+if __name__ == "__main__":
+    test_spent_bucket_gets_429()
+    test_in_flight_cap_skips_streaming_routes()
+    test_failing_backend_admits_requests()
+    test_sqlite_buckets_are_shared_and_purged()
+    print("Rate limiter checks passed")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Check the local report outbox and its replication to Supabase
+
+Runs the outbox against an in-memory stand-in for the reports table:
+committed rows survive a restart and are readable until they sync, an
+outage is retried with backoff without duplicating rows, a row Supabase
+refuses is retried alone and parked as failed while the rest of its batch
+lands, and synced rows are purged after the retention period.
+"""
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+
+from app.services.report_outbox import ReportOutbox, PENDING, SYNCED, FAILED
+
+class APIError(Exception):
+    """Carries a SQLSTATE code the way PostgREST errors do"""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+class FakeReportsTable:
+    """Upserts rows by id; fails while `down` and refuses rows marked bad"""
+
+    def __init__(self):
+        self.rows = {}
+        self.sent = []
+        self.calls = 0
+        self.down = False
+
+    def upsert(self, rows):
+        self.calls += 1
+        if self.down:
+            raise APIError("connection refused")
+        if any(row.get("bad") for row in rows):
+            raise APIError("violates check constraint", code="23514")
+        for row in rows:
+            self.rows[row["id"]] = row
+            self.sent.append(row["id"])
+
+@contextmanager
+def _db_path():
+    with tempfile.TemporaryDirectory() as directory:
+        yield os.path.join(directory, "outbox.db")
+
+def _row(**fields):
+    return {"id": str(uuid.uuid4()), "status": "pending", "severity": "high", **fields}
+
+async def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+def test_committed_rows_survive_restart_and_sync():
+    async def scenario():
+        with _db_path() as path:
+            table = FakeReportsTable()
+            outbox = ReportOutbox(table.upsert, db_path=path)
+            rows = await asyncio.gather(*(outbox.append(_row()) for _ in range(5)))
+            await outbox.stop()
+            # The concurrent appends shared one local commit
+            assert outbox.stats()["local_commits"]["batches"] == 1
+
+            restarted = ReportOutbox(table.upsert, db_path=path)
+            assert restarted.get(rows[0]["id"]) == rows[0]
+            assert await restarted.sync_once() == 5
+            assert set(table.rows) == {row["id"] for row in rows}
+            assert restarted.get(rows[0]["id"]) is None
+            assert restarted.store.counts() == {PENDING: 0, SYNCED: 5, FAILED: 0}
+
+    asyncio.run(scenario())
+
+def test_outage_is_retried_without_duplicates():
+    async def scenario():
+        with _db_path() as path:
+            table = FakeReportsTable()
+            table.down = True
+            outbox = ReportOutbox(table.upsert, db_path=path, interval=0.01, max_backoff=0.05)
+            outbox.start()
+            try:
+                rows = [await outbox.append(_row()) for _ in range(3)]
+                await asyncio.sleep(0.1)
+                assert not table.rows and outbox.store.counts()[PENDING] == 3
+                # Backing off: far fewer attempts than one per interval
+                assert table.calls < 10
+
+                table.down = False
+                await _wait_for(lambda: outbox.store.counts()[PENDING] == 0)
+                assert sorted(table.sent) == sorted(row["id"] for row in rows)
+                assert outbox.synced == 3
+            finally:
+                await outbox.stop()
+
+    asyncio.run(scenario())
+
+def test_refused_row_is_parked_and_batch_lands():
+    async def scenario():
+        with _db_path() as path:
+            table = FakeReportsTable()
+            outbox = ReportOutbox(table.upsert, db_path=path, max_attempts=2)
+            good = [await outbox.append(_row()) for _ in range(2)]
+            bad = await outbox.append(_row(bad=True))
+
+            await outbox.sync_once()
+            assert set(table.rows) == {row["id"] for row in good}
+            assert outbox.store.counts() == {PENDING: 1, SYNCED: 2, FAILED: 0}
+
+            await outbox.sync_once()
+            assert outbox.store.counts() == {PENDING: 0, SYNCED: 2, FAILED: 1}
+            # A parked row is still readable and no longer sent
+            assert outbox.get(bad["id"])["bad"] is True
+            calls = table.calls
+            assert await outbox.sync_once() == 0 and table.calls == calls
+
+    asyncio.run(scenario())
+
+def test_synced_rows_are_purged_after_retention():
+    async def scenario():
+        with _db_path() as path:
+            table = FakeReportsTable()
+            outbox = ReportOutbox(table.upsert, db_path=path)
+            await outbox.append(_row())
+            await outbox.sync_once()
+            await outbox.append(_row())
+
+            assert outbox.store.purge_synced(retention=3600) == 0
+            time.sleep(0.02)
+            assert outbox.store.purge_synced(retention=0.01) == 1
+            assert outbox.store.counts() == {PENDING: 1, SYNCED: 0, FAILED: 0}
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    test_committed_rows_survive_restart_and_sync()
+    test_outage_is_retried_without_duplicates()
+    test_refused_row_is_parked_and_batch_lands()
+    test_synced_rows_are_purged_after_retention()
+    print("Report outbox checks passed")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Check the live report counters in ReportStats
+
+Covers counters following creation and status-change events, time buckets
+and their retention, a snapshot being refreshed after a change, and a
+recount replacing the counters and reporting how far they had drifted.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.services import report_stats as stats_module
+from app.services.report_stats import ReportStats, BUCKET_RETENTION
+
+START = datetime(2024, 3, 4, 10, 30, tzinfo=timezone.utc)
+
+def _row(n, status="pending", damage_type="pothole", severity="high", address="1 Main Street", hours=0):
+    return {
+        "id": f"r{n}", "status": status, "damage_type": damage_type, "severity": severity,
+        "location_lat": 40.7, "location_lng": -74.0, "location_address": address,
+        "created_at": (START + timedelta(hours=hours)).isoformat(),
+    }
+
+def test_counters_follow_change_events():
+    stats = ReportStats()
+    stats.on_change("created", [_row(1), _row(2, severity="low", address="Interstate 95"), _row(3, hours=24)])
+    snapshot = stats.snapshot()
+    assert snapshot["total"] == 3
+    assert snapshot["status"] == {"pending": 3}
+    assert snapshot["severity"] == {"high": 2, "low": 1}
+    assert snapshot["authority"] == {"City Public Works Department": 2, "State Department of Transportation": 1}
+    assert [(bucket["start"], bucket["total"]) for bucket in snapshot["buckets"]] == [
+        ("2024-03-05", 1), ("2024-03-04", 2)
+    ]
+    assert stats.snapshot("week")["buckets"][0] == {
+        "start": "2024-03-04", "total": 3, "damage_type": {"pothole": 3}, "severity": {"high": 2, "low": 1}
+    }
+    assert stats.snapshot("hour", limit=1)["buckets"][0]["start"] == "2024-03-05T10:00:00Z"
+
+    stats.on_change("status_changed", [
+        {"id": "r1", "previous_status": "pending", "status": "resolved"},
+        {"id": "r2", "previous_status": "pending", "status": "pending"},
+    ])
+    assert stats.snapshot()["status"] == {"pending": 2, "resolved": 1}
+    stats.on_change("status_changed", [
+        {"id": "r2", "previous_status": "pending", "status": "resolved"},
+        {"id": "r3", "previous_status": "pending", "status": "resolved"},
+    ])
+    # An emptied status disappears rather than showing 0
+    assert stats.snapshot()["status"] == {"resolved": 3}
+
+def test_old_buckets_are_dropped():
+    stats = ReportStats()
+    retention = BUCKET_RETENTION["hour"]
+    stats.on_change("created", [_row(n, hours=n) for n in range(retention + 5)])
+    buckets = stats.snapshot("hour", limit=retention + 10)["buckets"]
+    assert len(buckets) == retention
+    assert buckets[-1]["start"] == (START + timedelta(hours=5)).strftime("%Y-%m-%dT%H:00:00Z")
+    assert stats.snapshot()["total"] == retention + 5
+
+def test_rebuild_replaces_counters_and_reports_drift():
+    rows = [_row(n) for n in range(4)]
+    service = stats_module.supabase_service
+    service.iter_report_pages = lambda filters=None, columns="*": iter([rows[:3], rows[3:]])
+    try:
+        stats = ReportStats()
+        assert asyncio.run(stats.rebuild())["drift"] == 0
+        assert stats.snapshot()["total"] == 4
+
+        # Two creations the database never recorded
+        stats.on_change("created", [_row(9), _row(10)])
+        assert stats.snapshot()["total"] == 6
+        assert asyncio.run(stats.rebuild())["drift"] == 2
+        snapshot = stats.snapshot()
+        assert snapshot["total"] == 4 and snapshot["last_drift"] == 2
+        assert snapshot["reconciled_at"] is not None
+    finally:
+        del service.iter_report_pages
+
+if __name__ == "__main__":
+    test_counters_follow_change_events()
+    test_old_buckets_are_dropped()
+    test_rebuild_replaces_counters_and_reports_drift()
+    print("Report stats checks passed")
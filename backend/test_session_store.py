@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Check chat session storage in SessionStore
+
+Covers messages surviving the SQLite round trip, two workers sharing a
+session file without serving each other stale state, LRU eviction and TTL
+expiry of the memory tier, and expiry and purging of old sessions.
+"""
+import asyncio
+import os
+import tempfile
+from contextlib import contextmanager
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.services.session_store import SessionStore, SQLiteSessionBackend
+
+@contextmanager
+def _db_path():
+    with tempfile.TemporaryDirectory() as directory:
+        yield os.path.join(directory, "sessions.db")
+
+def _state(*messages, **report_data):
+    return {"step": "location", "messages": list(messages), "report_data": report_data,
+            "validation_status": "", "next_action": ""}
+
+def test_messages_survive_the_backend():
+    async def scenario():
+        with _db_path() as path:
+            await SessionStore(backend=SQLiteSessionBackend(path)).save(
+                "s1", _state(HumanMessage(content="hi"), AIMessage(content="hello"), image="pothole.jpg")
+            )
+            state = await SessionStore(backend=SQLiteSessionBackend(path)).get("s1")
+            assert [type(message) for message in state["messages"]] == [HumanMessage, AIMessage]
+            assert state["messages"][1].content == "hello"
+            assert state["report_data"] == {"image": "pothole.jpg"}
+
+    asyncio.run(scenario())
+
+def test_workers_see_each_others_saves():
+    async def scenario():
+        with _db_path() as path:
+            first = SessionStore(backend=SQLiteSessionBackend(path))
+            second = SessionStore(backend=SQLiteSessionBackend(path))
+
+            await first.save("s1", _state(HumanMessage(content="turn 1")))
+            assert len((await second.get("s1"))["messages"]) == 1
+            await second.save("s1", _state(HumanMessage(content="turn 1"), HumanMessage(content="turn 2")))
+
+            # first still caches turn 1 in memory, but must not serve it
+            assert len((await first.get("s1"))["messages"]) == 2
+
+            await second.delete("s1")
+            assert await first.get("s1") is None
+
+    asyncio.run(scenario())
+
+def test_memory_tier_evicts_and_expires():
+    async def scenario():
+        store = SessionStore(maxsize=2, ttl=0.05)
+        for session_id in ("s1", "s2", "s3"):
+            await store.save(session_id, _state())
+        # The least recently used session was evicted
+        assert await store.get("s1") is None
+        assert await store.get("s3") is not None
+        await asyncio.sleep(0.06)
+        assert await store.get("s3") is None
+
+    asyncio.run(scenario())
+
+def test_expired_sessions_are_purged():
+    async def scenario():
+        with _db_path() as path:
+            backend = SQLiteSessionBackend(path, ttl=0.05)
+            store = SessionStore(backend=backend, purge_interval=0.01)
+            await store.save("old", _state())
+            await asyncio.sleep(0.06)
+            # Expired sessions are not resumed, even before they are purged
+            assert backend.load("old") is None
+            assert await SessionStore(backend=backend).get("old") is None
+
+            store.start()
+            await asyncio.sleep(0.05)
+            await store.stop()
+            assert backend._conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0] == 0
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    test_messages_survive_the_backend()
+    test_workers_see_each_others_saves()
+    test_memory_tier_evicts_and_expires()
+    test_expired_sessions_are_purged()
+    print("Session store checks passed")
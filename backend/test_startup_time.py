@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Startup-time regression check for the API
+
+Imports app.main in a fresh interpreter with `-X importtime` and checks that
+the agent stack stays out of the startup path and that total import time
+stays within budget. Run directly to print the slowest imports.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Budget for `import app.main`, in milliseconds
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+
+# Packages that must only load after startup (lazily or in the pre-warm task)
+DEFERRED_PACKAGES = ("langgraph", "langchain", "langchain_core", "langchain_openai", "openai", "app.agents")
+
+BACKEND_DIR = Path(__file__).parent
+
+def profile_imports():
+    """
+    Import app.main in a subprocess and parse the -X importtime output
+
+    Returns:
+        Dictionary of module name to cumulative import time in microseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import app.main failed:\n{result.stderr}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        try:
+            timings[module.strip()] = int(cumulative.strip())
+        except ValueError:
+            continue  # header line
+    return timings
+
+def test_agent_stack_not_imported_at_startup():
+    """The LangGraph/LangChain/OpenAI packages must not load with the app"""
+    timings = profile_imports()
+    eager = [
+        module for module in timings
+        if any(module == package or module.startswith(package + ".") for package in DEFERRED_PACKAGES)
+    ]
+    assert not eager, f"Imported at startup: {sorted(eager)[:10]}"
+
+def test_startup_import_budget():
+    """Importing the app stays within the startup budget"""
+    timings = profile_imports()
+    total_ms = timings["app.main"] / 1000
+    assert total_ms <= STARTUP_BUDGET_MS, (
+        f"import app.main took {total_ms:.0f}ms (budget {STARTUP_BUDGET_MS:.0f}ms)"
+    )
+
+if __name__ == "__main__":
+    timings = profile_imports()
+    print(f"import app.main: {timings['app.main'] / 1000:.0f}ms (budget {STARTUP_BUDGET_MS:.0f}ms)")
+    print("Slowest imports (cumulative):")
+    for module, micros in sorted(timings.items(), key=lambda item: item[1], reverse=True)[:15]:
+        print(f"  {micros / 1000:8.1f}ms  {module}")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Check that submission jobs survive crashes and failed stages
+
+Runs the job store on a temporary SQLite file with storage, database and
+webhook calls replaced by stubs: an abandoned job is claimed again once its
+lease expires, a failed upload keeps the image for the retry, and a job
+retried after crashing mid-insert writes the same report id again.
+"""
+import asyncio
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from app.schemas.report import JobStatus
+from app.services import submission_queue as queue_module
+from app.services.submission_queue import SQLiteJobStore, SubmissionQueue
+
+PAYLOAD = {
+    "location": {"lat": 40.0, "lng": -74.0, "address": "1 Main Street"},
+    "damage_type": "pothole",
+    "severity": "high",
+    "remarks": "Deep pothole",
+}
+IMAGE = b"\xff\xd8 not really a jpeg"
+
+@contextmanager
+def _patched(target, name, value):
+    original = getattr(target, name)
+    setattr(target, name, value)
+    try:
+        yield
+    finally:
+        setattr(target, name, original)
+
+@contextmanager
+def _queue():
+    with tempfile.TemporaryDirectory() as directory:
+        yield SubmissionQueue(db_path=os.path.join(directory, "jobs.db"), workers=0, retry_delay=0.01)
+
+def test_expired_lease_is_claimed_again():
+    """A job whose worker died is re-run once its lease runs out"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteJobStore(os.path.join(directory, "jobs.db"))
+        queued = store.enqueue(PAYLOAD)
+
+        first = store.claim(lease=60)
+        assert first["id"] == queued["id"] and first["attempts"] == 1
+        # Still leased to the first worker
+        assert store.claim(lease=60) is None
+
+        time.sleep(0.01)
+        second = store.claim(lease=0.001)
+        assert second["id"] == queued["id"]
+        assert second["attempts"] == 2
+        assert second["payload"]["report_id"] == first["payload"]["report_id"]
+
+def test_failed_upload_keeps_image_and_retries():
+    """An upload that returns no URL requeues the job without dropping the image"""
+    with _queue() as queue, \
+            _patched(queue_module.storage_service, "upload_image_bytes", lambda *args: None):
+        queue.store.enqueue(PAYLOAD, IMAGE, "damage.jpg", "image/jpeg")
+        job = queue.store.claim()
+        asyncio.run(queue._process(job))
+
+        stored = queue.store.get(job["id"])
+        assert stored["status"] == JobStatus.QUEUED.value
+        assert stored["stage"] is None
+        assert stored["image"] == IMAGE
+        assert "upload" in stored["error"].lower()
+
+def test_retry_after_crash_reuses_report_id():
+    """A crash between the insert and recording it re-inserts under the same id"""
+    inserted = []
+
+    def insert_report_once(report, report_id):
+        inserted.append(report_id)
+        return {"id": report_id, "image_url": report.image_url}
+
+    async def send_notification(report, authority):
+        return True
+
+    def crash_after_insert(job_id, stage, result, drop_image=False):
+        if stage == "insert":
+            # The worker is killed before the stage is recorded
+            raise asyncio.CancelledError()
+        advance(job_id, stage, result, drop_image)
+
+    with _queue() as queue, \
+            _patched(queue_module.storage_service, "upload_image_bytes", lambda *args: "https://images/1.jpg"), \
+            _patched(queue_module.supabase_service, "insert_report_once", insert_report_once), \
+            _patched(queue_module.webhook_service, "send_notification", send_notification):
+        queue.store.enqueue(PAYLOAD, IMAGE, "damage.jpg", "image/jpeg")
+        advance = queue.store.advance
+
+        job = queue.store.claim()
+        with _patched(queue.store, "advance", crash_after_insert):
+            try:
+                asyncio.run(queue._process(job))
+            except asyncio.CancelledError:
+                pass
+        # The upload was recorded, so the image is gone but its URL is kept
+        assert queue.store.get(job["id"])["stage"] == "upload"
+
+        time.sleep(0.01)
+        retry = queue.store.claim(lease=0.001)
+        assert retry["id"] == job["id"]
+        asyncio.run(queue._process(retry))
+
+        stored = queue.store.get(job["id"])
+        assert stored["status"] == JobStatus.COMPLETED.value
+        assert inserted == [job["payload"]["report_id"]] * 2
+        assert stored["result"]["report_id"] == job["payload"]["report_id"]
+        assert stored["result"]["image_url"] == "https://images/1.jpg"
+
+if __name__ == "__main__":
+    test_expired_lease_is_claimed_again()
+    test_failed_upload_keeps_image_and_retries()
+    test_retry_after_crash_reuses_report_id()
+    print("Submission queue crash and retry checks passed")
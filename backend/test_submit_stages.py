@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Check the stages of a synchronous report submission
+
+Posts to /api/reports/submit with the storage, database, authority and
+webhook calls replaced by slow in-process stand-ins, and checks that the
+upload and authority lookup overlap, that the insert gets the uploaded
+image URL, that every stage is reported in Server-Timing, and that a
+failed insert returns 500 without sending the webhook.
+"""
+import json
+import time
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.authority_service import authority_service
+from app.services.storage_service import storage_service
+from app.services.supabase_service import supabase_service
+from app.services.webhook_service import webhook_service
+
+STAGE_SECONDS = 0.2
+
+FORM = {
+    "location": json.dumps({"lat": 40.71, "lng": -74.0, "address": "1 Main Street"}),
+    "damage_type": "pothole",
+    "severity": "high",
+}
+
+@contextmanager
+def _services(fail_insert=False):
+    """Swap the outbound calls for stand-ins; yields the calls they saw"""
+    calls = {"insert": [], "webhook": []}
+    lookup = authority_service.identify_authority
+
+    def upload_image_bytes(content, filename, content_type):
+        time.sleep(STAGE_SECONDS)
+        return f"https://storage.example/{filename}"
+
+    def identify_authority(location):
+        time.sleep(STAGE_SECONDS)
+        return lookup(location)
+
+    async def create_report(report_data, image_url=None):
+        calls["insert"].append(image_url)
+        if fail_insert:
+            raise RuntimeError("database unavailable")
+        return {"id": "r1", "image_url": image_url}
+
+    async def send_notification(report, authority):
+        calls["webhook"].append(authority["name"])
+        return True
+
+    patches = [
+        (storage_service, "upload_image_bytes", upload_image_bytes),
+        (authority_service, "identify_authority", identify_authority),
+        (supabase_service, "create_report", create_report),
+        (webhook_service, "send_notification", send_notification),
+    ]
+    for service, name, replacement in patches:
+        setattr(service, name, replacement)
+    try:
+        yield calls
+    finally:
+        for service, name, _ in patches:
+            delattr(service, name)
+
+def _stages(header):
+    """Server-Timing header as {stage: milliseconds}"""
+    return {
+        name: float(duration.split("=")[1])
+        for name, duration in (stage.split(";") for stage in header.split(", "))
+    }
+
+def test_upload_and_authority_lookup_overlap():
+    client = TestClient(app)
+    with _services() as calls:
+        response = client.post("/api/reports/submit", data=FORM,
+                               files={"image": ("pothole.jpg", b"jpeg bytes", "image/jpeg")})
+    assert response.status_code == 200, response.text
+    assert response.json()["image_url"] == "https://storage.example/pothole.jpg"
+    assert calls == {"insert": ["https://storage.example/pothole.jpg"], "webhook": ["City Public Works Department"]}
+
+    stages = _stages(response.headers["server-timing"])
+    assert list(stages) == ["validate", "upload", "authority", "insert", "webhook", "total"]
+    assert stages["upload"] >= STAGE_SECONDS * 1000 and stages["authority"] >= STAGE_SECONDS * 1000
+    assert stages["total"] < (stages["upload"] + stages["authority"]) * 0.9
+
+def test_failed_insert_skips_the_webhook():
+    client = TestClient(app)
+    with _services(fail_insert=True) as calls:
+        response = client.post("/api/reports/submit", data=FORM)
+    assert response.status_code == 500
+    assert "database unavailable" in response.json()["detail"]
+    assert calls == {"insert": [None], "webhook": []}
+
+if __name__ == "__main__":
+    test_upload_and_authority_lookup_overlap()
+    test_failed_insert_skips_the_webhook()
+    print("Submit stage checks passed")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Check the spans the agent tracer exports for a chat turn
+
+Runs one /api/chat turn with tracing enabled and reads the in-memory
+exporter: the turn is an "agent.turn" root span, every workflow node that
+ran is a child span in the same trace, and all of them carry the request's
+X-Request-ID. A failing node is exported with an error status.
+"""
+import os
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+
+from app.agents import workflow as workflow_module
+from app.agents.tracing import memory_exporter, tracer
+from app.main import app
+
+@contextmanager
+def _tracing():
+    key = os.environ.pop("OPENAI_API_KEY", None)
+    workflow_module.set_llm(None)
+    enabled, tracer.enabled = tracer.enabled, True
+    memory_exporter.clear()
+    try:
+        yield
+    finally:
+        tracer.enabled = enabled
+        if key is not None:
+            os.environ["OPENAI_API_KEY"] = key
+
+def test_chat_turn_spans():
+    with _tracing():
+        response = TestClient(app).post(
+            "/api/chat",
+            json={"message": "hello", "report_data": {"image": "pothole.jpg"}},
+            headers={"X-Request-ID": "req-tracing-1"}
+        )
+        assert response.status_code == 200, response.text
+        spans = memory_exporter.get_finished_spans()
+
+    roots = [span for span in spans if span["name"] == "agent.turn"]
+    assert len(roots) == 1
+    root = roots[0]
+    assert root["parent_span_id"] is None
+    assert root["status"] == {"code": "OK"}
+
+    nodes = [span for span in spans if span is not root]
+    names = {span["name"] for span in nodes}
+    assert {"agent.greeting", "agent.vision_analysis", "agent.location_authority",
+            "agent.validation", "agent.decision"} <= names
+    for span in nodes:
+        assert span["parent_span_id"] == root["span_id"]
+        assert span["trace_id"] == root["trace_id"]
+        assert span["attributes"]["langgraph.node"] == span["name"][len("agent."):]
+        assert root["start_time_unix_nano"] <= span["start_time_unix_nano"] <= span["end_time_unix_nano"]
+        assert span["end_time_unix_nano"] <= root["end_time_unix_nano"]
+    for span in spans:
+        assert span["attributes"]["request.id"] == "req-tracing-1"
+
+def test_failing_node_span():
+    def broken(state):
+        raise ValueError("boom")
+
+    with _tracing():
+        node = tracer.wrap("broken", broken)
+        try:
+            with tracer.trace():
+                node({"messages": []})
+            raise AssertionError("the node error was swallowed")
+        except ValueError:
+            pass
+        spans = memory_exporter.get_finished_spans()
+
+    node_span, root = spans
+    assert node_span["name"] == "agent.broken" and root["name"] == "agent.turn"
+    assert node_span["parent_span_id"] == root["span_id"]
+    assert node_span["status"] == {"code": "ERROR", "message": "boom"}
+    assert node_span["events"][0]["attributes"]["exception.type"] == "ValueError"
+    assert root["status"]["code"] == "ERROR"
+
+if __name__ == "__main__":
+    test_chat_turn_spans()
+    test_failing_node_span()
+    print("Tracing span checks passed")
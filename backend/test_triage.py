@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Check the per-authority triage queues
+
+Covers ranking against scores computed directly, corroboration by nearby
+reports, index changes entering and leaving the queues between rescores,
+and a drained queue being refilled from the authority's open reports.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.services.open_reports_index import OpenReportsIndex
+from app.services.triage_service import TriageEngine, score_reports, SEVERITY_SCORES, ROAD_CLASS_SCORES
+
+NOW = datetime.now(timezone.utc)
+
+def _row(i, severity="medium", hours=1.0, address="1 Main Street", status="pending", lat=None):
+    return {
+        "id": str(uuid.uuid4()),
+        "status": status,
+        "damage_type": "pothole",
+        "severity": severity,
+        # About 1 km apart, so no report corroborates another
+        "location_lat": 40 + i * 0.01 if lat is None else lat,
+        "location_lng": -74.0,
+        "location_address": address,
+        "created_at": (NOW - timedelta(hours=hours)).isoformat(),
+    }
+
+def _engine(queue_size=200):
+    index = OpenReportsIndex()
+    engine = TriageEngine(index=index, queue_size=queue_size, nearby_meters=100)
+    index.add_listener(engine.on_index_change)
+    return index, engine
+
+def _expected_order(rows, road_class="local"):
+    """Ids of lone reports ordered by their directly computed score"""
+    scores = score_reports(
+        np.array([SEVERITY_SCORES[row["severity"]] for row in rows]),
+        np.array([(NOW - datetime.fromisoformat(row["created_at"])).total_seconds() / 3600 for row in rows]),
+        np.zeros(len(rows)),
+        np.full(len(rows), ROAD_CLASS_SCORES[road_class]),
+        np.ones(len(rows)),
+    )
+    return [rows[i]["id"] for i in np.argsort(-scores, kind="stable")]
+
+def _random_rows(count):
+    random.seed(3)
+    return [
+        _row(i, severity=random.choice(["low", "medium", "high"]), hours=random.random() * 600)
+        for i in range(count)
+    ]
+
+def test_queue_follows_scores():
+    rows = _random_rows(40)
+    index, engine = _engine(queue_size=10)
+    index.load([rows])
+
+    queue = engine.queue("default", limit=50)
+    assert [item["id"] for item in queue] == _expected_order(rows)[:10]
+    scores = [item["priority_score"] for item in queue]
+    assert scores == sorted(scores, reverse=True)
+    assert engine.open_count("default") == 40
+
+def test_road_class_and_nearby_reports_raise_priority():
+    index, engine = _engine()
+    lone = _row(0)
+    highway = _row(1, address="Interstate 95")
+    cluster = [_row(2, lat=40.5) for _ in range(3)]
+    index.load([[lone, highway] + cluster])
+
+    assert engine.queue("state_dot")[0]["priority_score"] > engine.queue("default")[-1]["priority_score"]
+    queue = engine.queue("default")
+    assert {item["id"] for item in queue[:3]} == {row["id"] for row in cluster}
+    assert [item["nearby_reports"] for item in queue] == [2, 2, 2, 0]
+
+def test_index_changes_update_the_queue():
+    rows = _random_rows(20)
+    index, engine = _engine(queue_size=5)
+    index.load([rows])
+
+    urgent = _row(50, severity="high", hours=700)
+    index.on_change("created", [urgent])
+    assert engine.queue("default")[0]["id"] == urgent["id"]
+    assert len(engine.queue("default")) == 5
+
+    trivial = _row(51, severity="low", hours=0)
+    index.on_change("created", [trivial])
+    assert trivial["id"] not in {item["id"] for item in engine.queue("default")}
+
+    # A report being worked on scores lower
+    index.on_change("status_changed", [{"id": urgent["id"], "status": "in_progress"}])
+    assert engine.queue("default")[0]["id"] != urgent["id"]
+
+    index.on_change("status_changed", [{"id": urgent["id"], "status": "resolved"}])
+    assert urgent["id"] not in {item["id"] for item in engine.queue("default")}
+
+def test_drained_queue_is_refilled():
+    rows = _random_rows(20)
+    index, engine = _engine(queue_size=4)
+    index.load([rows])
+    order = _expected_order(rows)
+
+    # Taking one report out leaves three, which is when the queue is re-ranked
+    index.on_change("status_changed", [{"id": order[0], "status": "resolved"}])
+    assert [item["id"] for item in engine.queue("default")] == order[1:5]
+
+    for report_id in order[1:5]:
+        index.on_change("status_changed", [{"id": report_id, "status": "closed"}])
+    assert [item["id"] for item in engine.queue("default")] == order[5:9]
+
+if __name__ == "__main__":
+    test_queue_follows_scores()
+    test_road_class_and_nearby_reports_raise_priority()
+    test_index_changes_update_the_queue()
+    test_drained_queue_is_refilled()
+    print("Triage checks passed")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Check that independent agents in the workflow run concurrently
+
+Replaces the vision analysis and location/authority agents with stubs that
+sleep, compiles the graph, and checks that a turn takes about as long as
+the slowest branch rather than the sum of both.
+"""
+import asyncio
+import time
+
+from app.agents import workflow as workflow_module
+
+AGENT_DELAY = 0.3
+
+def _slow_vision_agent(state):
+    time.sleep(AGENT_DELAY)
+    return {"report_data": {"image_analyzed": True}, "next_action": "collect_location"}
+
+def _slow_location_agent(state):
+    time.sleep(AGENT_DELAY)
+    return {"report_data": {"authority": "City Public Works Department"}, "next_action": "collect_damage_type"}
+
+def _compile_with_slow_agents():
+    """Compile the workflow with the two independent agents stubbed out"""
+    original = (workflow_module.vision_analysis_agent, workflow_module.location_authority_agent)
+    workflow_module.vision_analysis_agent = _slow_vision_agent
+    workflow_module.location_authority_agent = _slow_location_agent
+    try:
+        return workflow_module.create_workflow()
+    finally:
+        workflow_module.vision_analysis_agent, workflow_module.location_authority_agent = original
+
+def _initial_state():
+    return {
+        "step": "analyze_image",
+        "messages": [],
+        "report_data": {"image": "uploads/test.jpg"},
+        "validation_status": "",
+        "next_action": "",
+    }
+
+def test_independent_agents_run_concurrently():
+    """A turn costs the slowest branch, not the sum of the branches"""
+    graph = _compile_with_slow_agents()
+
+    start = time.perf_counter()
+    result = asyncio.run(graph.ainvoke(_initial_state()))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < AGENT_DELAY * 1.8, f"Turn took {elapsed:.2f}s; branches ran sequentially"
+
+    # Both branches' report fields survive the fan-in merge
+    assert result["report_data"]["image"] == "uploads/test.jpg"
+    assert result["report_data"]["image_analyzed"] is True
+    assert result["report_data"]["authority"] == "City Public Works Department"
+
+if __name__ == "__main__":
+    graph = _compile_with_slow_agents()
+    start = time.perf_counter()
+    result = asyncio.run(graph.ainvoke(_initial_state()))
+    elapsed = time.perf_counter() - start
+    print(f"Two {AGENT_DELAY}s agents finished in {elapsed:.2f}s "
+          f"(sequential would be {2 * AGENT_DELAY:.2f}s)")
+    print(f"Merged report data: {result['report_data']}")
@@ -5,7 +5,7 @@ import ImageUpload from './ImageUpload'
 import LocationPicker from './LocationPicker'
 import DamageTypeSelector from './DamageTypeSelector'
 import SeveritySelector from './SeveritySelector'
-import { submitReport, sendMessage } from '../utils/api'
+import { submitReport, sendMessage, streamChat } from '../utils/api'
 
 function ChatInterface() {
   const [messages, setMessages] = useState([])
@@ -26,6 +26,12 @@ function ChatInterface() {
   const [emailSubmitted, setEmailSubmitted] = useState(false)
   const [reportImageUrl, setReportImageUrl] = useState('')
   const messagesEndRef = useRef(null)
+  // Server-side chat session, and the report fields it has already been sent
+  const sessionIdRef = useRef(null)
+  const sentReportDataRef = useRef({})
+  // Idempotency-Key of the report being submitted, reused when the same
+  // report is retried so the backend does not create it twice
+  const submissionRef = useRef(null)
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
@@ -39,6 +45,31 @@ function ChatInterface() {
     setMessages(prev => [...prev, { role, content, timestamp: new Date(), ...metadata }])
   }
 
+  // The session keeps everything sent on earlier turns, so only report
+  // fields that changed since then go with the next message
+  const unsentReportData = () => {
+    const fields = {
+      // The image itself goes with the report; the chat only needs to know there is one
+      image: reportData.image?.name,
+      location: reportData.location,
+      damage_type: reportData.damageType,
+      severity: reportData.severity,
+    }
+    const changed = {}
+    for (const [key, value] of Object.entries(fields)) {
+      if (value && sentReportDataRef.current[key] !== value) {
+        changed[key] = value
+      }
+    }
+    return changed
+  }
+
+  const resetChatSession = () => {
+    sessionIdRef.current = null
+    sentReportDataRef.current = {}
+    submissionRef.current = null
+  }
+
   useEffect(() => {
     // Initialize with greeting message
     addMessage('assistant', 'Hello! I\'m your AI assistant for reporting road damage. I\'ll guide you through the process step by step. Let\'s start by uploading a photo of the road damage.')
@@ -110,7 +141,14 @@ function ChatInterface() {
         remarks: remarks || 'No additional remarks'
       }
 
-      const response = await submitReport(finalReport)
+      // A changed report needs a new key; the backend rejects a reused key with a different payload
+      const { image, ...fields } = finalReport
+      const payload = JSON.stringify([fields, image && [image.name, image.size, image.lastModified]])
+      if (submissionRef.current?.payload !== payload) {
+        submissionRef.current = { payload, key: crypto.randomUUID() }
+      }
+
+      const response = await submitReport(finalReport, { idempotencyKey: submissionRef.current.key })
       
       // Backend returns report_id on success
       if (response.report_id) {
@@ -147,23 +185,89 @@ function ChatInterface() {
     }
 
     setIsLoading(true)
+    const changedReportData = unsentReportData()
+    const turnKey = `turn-${Date.now()}`
     try {
-      const response = await sendMessage('/chat', { message: userMessage, step: currentStep, reportData })
-      
-      if (response.next_step) {
-        setCurrentStep(response.next_step)
+      await streamTurn(userMessage, changedReportData, turnKey)
+    } catch (streamError) {
+      console.warn('Chat stream failed, falling back to /api/chat:', streamError)
+      // Drop whatever was streamed before the failure; the turn runs again
+      setMessages(prev => prev.filter(msg => !msg.streamKey?.startsWith(turnKey)))
+      try {
+        const response = await sendMessage('/api/chat', {
+          message: userMessage,
+          session_id: sessionIdRef.current,
+          report_data: changedReportData,
+        })
+        finishTurn(response, changedReportData)
+        if (response.message) {
+          addMessage('assistant', response.message)
+        }
+      } catch (error) {
+        addMessage('assistant', 'I apologize, but I encountered an error. Please try again.')
       }
-      
-      if (response.message) {
-        addMessage('assistant', response.message)
-      }
-    } catch (error) {
-      addMessage('assistant', 'I apologize, but I encountered an error. Please try again.')
     } finally {
       setIsLoading(false)
     }
   }
 
+  // Record the session and next step once the server has stored a turn
+  const finishTurn = ({ session_id: sessionId, next_step: nextStep }, changedReportData) => {
+    if (sessionId) {
+      sessionIdRef.current = sessionId
+      sentReportDataRef.current = { ...sentReportDataRef.current, ...changedReportData }
+    }
+    if (nextStep) {
+      setCurrentStep(nextStep)
+    }
+  }
+
+  // Create or update the assistant bubble an agent is streaming into
+  const updateStreamedMessage = (streamKey, update) => {
+    setMessages(prev => {
+      const index = prev.findIndex(msg => msg.streamKey === streamKey)
+      if (index === -1) {
+        return [...prev, { role: 'assistant', content: update(''), timestamp: new Date(), streamKey }]
+      }
+      const next = [...prev]
+      next[index] = { ...next[index], content: update(next[index].content) }
+      return next
+    })
+  }
+
+  // Run a turn over /api/chat/stream, showing each agent's reply as its
+  // tokens arrive; throws if the stream fails or ends early
+  const streamTurn = async (userMessage, changedReportData, turnKey) => {
+    let nextStep = null
+    let sessionId = null
+    let completed = false
+    let streamError = null
+
+    await streamChat(
+      { message: userMessage, sessionId: sessionIdRef.current, reportData: changedReportData },
+      (event, data) => {
+        if (event === 'session') {
+          sessionId = data.session_id
+        } else if (event === 'token') {
+          updateStreamedMessage(`${turnKey}:${data.node}`, content => content + data.content)
+        } else if (event === 'message') {
+          // The complete message replaces the streamed tokens
+          updateStreamedMessage(`${turnKey}:${data.node}`, () => data.content)
+        } else if (event === 'next_step') {
+          nextStep = data.next_step
+        } else if (event === 'done') {
+          completed = true
+        } else if (event === 'error') {
+          streamError = new Error(data.detail)
+        }
+      }
+    )
+
+    if (streamError) throw streamError
+    if (!completed) throw new Error('Chat stream ended before the turn finished')
+    finishTurn({ session_id: sessionId, next_step: nextStep }, changedReportData)
+  }
+
   const handleEmailSubmit = async () => {
     if (!userEmail.trim()) return
 
@@ -307,6 +411,7 @@ function ChatInterface() {
             setShowEmailStep(false)
             setUserEmail('')
             setEmailSubmitted(false)
+            resetChatSession()
             addMessage('assistant', 'Hello! I\'m your AI assistant for reporting road damage. I\'ll guide you through the process step by step. Let\'s start by uploading a photo of the road damage.')
           }}
           className="btn-primary"
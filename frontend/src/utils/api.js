@@ -28,7 +28,9 @@ export const sendMessage = async (endpoint, data, isFormData = false) => {
   }
 }
 
-export const submitReport = async (reportData) => {
+// Pass the same idempotencyKey when retrying a submission so the server
+// replays the first result instead of creating a duplicate report.
+export const submitReport = async (reportData, { idempotencyKey } = {}) => {
   try {
     const formData = new FormData()
     
@@ -44,6 +46,7 @@ export const submitReport = async (reportData) => {
     const response = await api.post('/api/reports/submit', formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
+        ...(idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}),
       },
     })
     
@@ -54,5 +57,45 @@ export const submitReport = async (reportData) => {
   }
 }
 
+// Stream a chat turn from /api/chat/stream (Server-Sent Events over POST).
+// onEvent is called as (eventName, data) for session, node_enter, node_exit,
+// token, message, next_step, done and error events.
+export const streamChat = async ({ message, sessionId, reportData }, onEvent) => {
+  const baseURL = api.defaults.baseURL || ''
+  const response = await fetch(`${baseURL}/api/chat/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify({ message, session_id: sessionId, report_data: reportData }),
+  })
+  if (!response.ok || !response.body) {
+    throw new Error(`Chat stream failed with status ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    // Events are separated by a blank line
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+
+      let event = 'message'
+      let data = ''
+      for (const line of raw.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim()
+        else if (line.startsWith('data:')) data += line.slice(5).trim()
+      }
+      if (data) onEvent(event, JSON.parse(data))
+    }
+  }
+}
+
 export default api
 